@@ -0,0 +1,310 @@
+"""
+B_raw 이벤트 export(CSV / JSONL)로 세션 지표를 다시 계산하는 오프라인 분석 도구 (pandas).
+
+    python analytics.py b_raw_export.csv --out sessions.csv
+    python analytics.py runtime/wal/segment-*.jsonl --telemetry runtime/telemetry.jsonl --out sessions.parquet
+
+.parquet 출력은 pyarrow가 필요한 선택 기능 (앱 requirements.txt에는 없음 → 분석 환경에서만 pip install pyarrow).
+
+- session_summary 시트와 같은 컬럼 (SUMMARY_COLUMNS)
+- 단계별 체류 시간 (duration_<phase>)
+- 메모리 편집 사이 간격 (mem_edit_gap_mean / mem_edit_gap_median)
+- 턴별 LLM 지연 퍼센타일 (turn_timing 이벤트 기준, <key>_p50 / _p90 / _p99)
+- LLM 토큰 / 비용 (llm_usage 이벤트 기준, 세션별 컬럼 + --call-sites로 호출 위치별 표)
+  turn_timing / llm_usage는 B_raw가 아니라 앱의 텔레메트리 파일(TELEMETRY_FILE)에 기록됨 → --telemetry로 지정
+  (지정하지 않으면 예전 export처럼 B_raw 안의 같은 이벤트를 사용)
+
+파일은 chunksize 단위로 읽으면서 필요한 컬럼만 남기고, 계산은 전부 groupby 벡터 연산.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from session_metrics import EVENT_COLUMNS, SUMMARY_COLUMNS
+
+# 계산에 쓰는 컬럼만 읽음 (text / old_value 등 긴 문자열은 버림)
+USED_COLUMNS = ["timestamp", "session_id", "condition", "user_name", "phase", "event_type", "source", "value"]
+CATEGORY_COLUMNS = ["condition", "phase", "event_type", "source"]
+# value는 이 이벤트들에서만 사용
+VALUE_EVENTS = ("final_decision", "turn_timing", "llm_usage")
+
+PHASES = ("explore", "summary", "comparison", "product_detail", "purchase_decision")
+PHASE_TURN_COLUMNS = {
+    "explore": "explore_turns",
+    "summary": "summary_turns",
+    "comparison": "compare_turns",
+    "product_detail": "detail_turns",
+}
+MEMORY_EDIT_EVENTS = ("memory_add", "memory_delete", "memory_update")
+LATENCY_KEYS = ("turn_total", "gpt_reply", "extract_memory", "time_to_first_token")
+PERCENTILES = (0.5, 0.9, 0.99)
+TOKEN_KEYS = ("prompt_tokens", "cached_tokens", "completion_tokens", "cost_usd")
+
+
+# ======================================================
+# 읽기 (chunk 단위)
+# ======================================================
+def _has_header(path):
+    with open(path, encoding="utf-8") as f:
+        return f.readline().startswith("timestamp")
+
+
+def _read_chunks(path, chunksize):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        header = _has_header(path)
+        return pd.read_csv(
+            path,
+            chunksize=chunksize,
+            header=0 if header else None,
+            names=None if header else list(EVENT_COLUMNS),
+            usecols=USED_COLUMNS,
+            dtype=object,
+            keep_default_na=False,
+        )
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return pd.read_json(path, lines=True, chunksize=chunksize, dtype=False)
+    raise ValueError(f"지원하지 않는 파일 형식: {path}")
+
+
+def _compact_chunk(chunk):
+    if all(isinstance(c, int) for c in chunk.columns):
+        # 시트 row를 그대로 JSON 배열로 export한 경우
+        chunk.columns = list(EVENT_COLUMNS)[: len(chunk.columns)]
+    chunk = chunk.reindex(columns=USED_COLUMNS)
+    chunk["timestamp"] = pd.to_numeric(chunk["timestamp"], errors="coerce")
+    for col in ["session_id", "user_name", "value"] + CATEGORY_COLUMNS:
+        chunk[col] = chunk[col].fillna("").astype(str)
+    chunk["value"] = chunk["value"].where(chunk["event_type"].isin(VALUE_EVENTS), "")
+    for col in CATEGORY_COLUMNS:
+        chunk[col] = chunk[col].astype("category")
+    return chunk
+
+
+def read_events(paths, chunksize=200_000):
+    """여러 export 파일을 순서대로 읽어 하나의 DataFrame으로 (행 순서 = 이벤트 순서)"""
+    chunks = [
+        _compact_chunk(chunk)
+        for path in paths
+        for chunk in _read_chunks(path, chunksize)
+    ]
+    if not chunks:
+        return pd.DataFrame(columns=USED_COLUMNS)
+    df = pd.concat(chunks, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype(str).astype("category")
+    return df.dropna(subset=["timestamp"])
+
+
+# ======================================================
+# 지표 계산 (벡터 연산)
+# ======================================================
+def _count(mask, sid):
+    return mask.groupby(sid, sort=False).sum().astype("int64")
+
+
+def session_summary(df):
+    """session_summary 시트와 같은 컬럼의 DataFrame (session_metrics.SessionAggregator와 같은 값)"""
+    sid = df["session_id"]
+    et = df["event_type"].astype(str)
+    is_user_msg = et == "user_message"
+    phase = df["phase"].astype(str)
+    by_user = df["source"].astype(str) == "user"
+
+    out = pd.DataFrame(index=pd.Index(sid.unique(), name="session_id"))
+
+    named = df[df["user_name"] != ""].groupby("session_id", sort=False)["user_name"].last()
+    out["nickname"] = named.reindex(out.index).fillna("")
+    out["phone_number"] = ""          # B_raw에는 기록되지 않음
+    out["primary_style"] = ""
+    cond = df[df["condition"].astype(str) != ""].groupby("session_id", sort=False)["condition"].last()
+    out["condition"] = cond.astype(str).reindex(out.index).fillna("")
+
+    out["total_turns"] = _count(et.isin(["user_message", "assistant_message"]), sid)
+    for ph, col in PHASE_TURN_COLUMNS.items():
+        out[col] = _count(is_user_msg & (phase == ph), sid)
+
+    out["mem_add"] = _count(et == "memory_add", sid)
+    out["mem_delete"] = _count(et == "memory_delete", sid)
+    out["mem_update"] = _count(et == "memory_update", sid)
+    out["mem_edit_total"] = out["mem_add"] + out["mem_delete"] + out["mem_update"]
+    out["user_add_count"] = _count((et == "memory_add") & by_user, sid)
+    out["user_delete_count"] = _count((et == "memory_delete") & by_user, sid)
+    out["human_edit_total"] = out["user_add_count"] + out["user_delete_count"]
+
+    ts = df.groupby("session_id", sort=False)["timestamp"]
+    out["total_duration"] = ts.max() - ts.min()
+
+    final = df[et == "final_decision"].groupby("session_id", sort=False)[["value", "timestamp"]].first()
+    reco_ts = df[et == "show_candidates"].groupby("session_id", sort=False)["timestamp"].first()
+    out["final_choice"] = final["value"].reindex(out.index).fillna("")
+    decision = final["timestamp"].reindex(out.index) - reco_ts.reindex(out.index)
+    out["decision_time"] = decision.astype(object).where(decision.notna(), "")
+
+    return out.reset_index()[list(SUMMARY_COLUMNS)]
+
+
+def phase_durations(df):
+    """
+    단계별 체류 시간: 각 이벤트부터 같은 세션의 다음 이벤트까지 걸린 시간을 그 이벤트의 phase에 합산.
+    """
+    nxt = df.groupby("session_id", sort=False)["timestamp"].shift(-1)
+    dur = (nxt - df["timestamp"]).fillna(0.0)
+    table = pd.pivot_table(
+        pd.DataFrame({"session_id": df["session_id"], "phase": df["phase"].astype(str), "dur": dur}),
+        index="session_id",
+        columns="phase",
+        values="dur",
+        aggfunc="sum",
+        fill_value=0.0,
+        sort=False,
+    )
+    table = table.reindex(columns=sorted(set(PHASES) | set(table.columns), key=_phase_order), fill_value=0.0)
+    table.columns = [f"duration_{c}" for c in table.columns]
+    return table
+
+
+def _phase_order(phase):
+    return (PHASES.index(phase), phase) if phase in PHASES else (len(PHASES), phase)
+
+
+def memory_edit_gaps(df):
+    """같은 세션 안에서 메모리 편집(add/delete/update) 사이 간격(초)의 평균/중앙값"""
+    edits = df[df["event_type"].astype(str).isin(MEMORY_EDIT_EVENTS)]
+    gap = edits.groupby("session_id", sort=False)["timestamp"].diff()
+    stats = gap.groupby(edits["session_id"], sort=False).agg(["mean", "median"])
+    stats.columns = ["mem_edit_gap_mean", "mem_edit_gap_median"]
+    return stats
+
+
+def latency_frame(df):
+    """turn_timing 이벤트의 JSON value에서 LATENCY_KEYS 값만 뽑은 DataFrame (session_id 포함)"""
+    tt = df[df["event_type"].astype(str) == "turn_timing"]
+    out = pd.DataFrame({"session_id": tt["session_id"]})
+    for key in LATENCY_KEYS:
+        out[key] = pd.to_numeric(
+            tt["value"].str.extract(rf'"{key}":\s*(-?[0-9.]+(?:[eE][-+]?[0-9]+)?)', expand=False),
+            errors="coerce",
+        )
+    return out
+
+
+def latency_percentiles(lat, by_session=True):
+    """LLM 지연 퍼센타일. by_session=False면 전체 턴 기준 한 줄"""
+    if by_session:
+        q = lat.groupby("session_id", sort=False)[list(LATENCY_KEYS)].quantile(list(PERCENTILES))
+        q = q.unstack()
+    else:
+        q = lat[list(LATENCY_KEYS)].quantile(list(PERCENTILES)).unstack().to_frame().T
+    q.columns = [f"{key}_p{int(p * 100)}" for key, p in q.columns]
+    return q
+
+
+def token_usage_frame(df):
+    """llm_usage 이벤트(호출 1회 = 1줄)의 JSON value → session_id, call_site, TOKEN_KEYS"""
+    lu = df[df["event_type"].astype(str) == "llm_usage"]
+    out = pd.DataFrame({
+        "session_id": lu["session_id"],
+        "call_site": lu["value"].str.extract(r'"call_site":\s*"([^"]*)"', expand=False).fillna("other"),
+    })
+    for key in TOKEN_KEYS:
+        out[key] = pd.to_numeric(
+            lu["value"].str.extract(rf'"{key}":\s*(-?[0-9.]+(?:[eE][-+]?[0-9]+)?)', expand=False),
+            errors="coerce",
+        ).fillna(0)
+    return out
+
+
+def token_usage_totals(usage, by):
+    """by 기준 합계 + 호출 수 + cached_ratio (캐시된 입력 토큰 / 전체 입력 토큰)"""
+    totals = usage.groupby(by, sort=False)[list(TOKEN_KEYS)].sum()
+    totals.insert(0, "llm_calls", usage.groupby(by, sort=False).size())
+    totals["cached_ratio"] = (totals["cached_tokens"] / totals["prompt_tokens"].where(totals["prompt_tokens"] > 0)).fillna(0)
+    return totals
+
+
+def session_metrics_frame(df, telemetry=None):
+    """
+    세션당 한 줄: summary 컬럼 + 단계별 체류 시간 + 메모리 편집 간격 + LLM 지연 퍼센타일 + 토큰/비용
+    telemetry: 텔레메트리 파일을 read_events로 읽은 DataFrame (None이면 df 안의 turn_timing / llm_usage 사용)
+    """
+    ops = df if telemetry is None else telemetry
+    summary = session_summary(df).set_index("session_id")
+    tokens = token_usage_totals(token_usage_frame(ops), "session_id").rename(columns={"cost_usd": "llm_cost_usd"})
+    extra = [phase_durations(df), memory_edit_gaps(df), latency_percentiles(latency_frame(ops)), tokens]
+    out = summary.join(extra, how="left")
+    return out.reset_index()
+
+
+# ======================================================
+# CLI
+# ======================================================
+def write_frame(frame, path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        try:
+            import pyarrow  # noqa: F401  (parquet 출력에만 필요한 선택 의존성)
+        except ImportError:
+            raise ValueError(f"{path}: .parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow, 또는 .csv로 저장)")
+        # 빈 문자열/숫자가 섞인 컬럼은 parquet 스키마용으로 문자열 통일
+        frame = frame.copy()
+        for col in frame.columns[frame.dtypes == object]:
+            frame[col] = frame[col].astype(str)
+        frame.to_parquet(path, index=False)
+    elif ext == ".csv":
+        frame.to_csv(path, index=False)
+    else:
+        raise ValueError(f"지원하지 않는 출력 형식: {path} (.parquet / .csv)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="B_raw export로 세션 지표 계산")
+    parser.add_argument("paths", nargs="+", help="B_raw export 파일 (.csv / .jsonl)")
+    parser.add_argument("--out", required=True, help="세션별 결과 (.csv / .parquet — parquet은 pyarrow 필요)")
+    parser.add_argument("--telemetry", nargs="+", help="텔레메트리 JSONL (turn_timing / llm_usage, 앱의 TELEMETRY_FILE)")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--call-sites", help="호출 위치별 토큰/비용 표 (.csv / .parquet, 생략하면 stdout에만)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    df = read_events(args.paths, chunksize=args.chunksize)
+    telemetry = read_events(args.telemetry, chunksize=args.chunksize) if args.telemetry else None
+    ops = df if telemetry is None else telemetry
+    loaded = time.perf_counter()
+    sessions = session_metrics_frame(df, telemetry)
+    write_frame(sessions, args.out)
+    done = time.perf_counter()
+
+    print(
+        f"{len(df)} event(s), {len(sessions)} session(s) → {args.out} "
+        f"(read {loaded - started:.2f}s, compute+write {done - loaded:.2f}s)",
+        file=sys.stderr,
+    )
+
+    # 전체 턴 기준 LLM 지연 퍼센타일
+    overall = latency_percentiles(latency_frame(ops), by_session=False)
+    if len(overall):
+        print(json.dumps(
+            {k: (None if np.isnan(v) else round(float(v), 4)) for k, v in overall.iloc[0].items()},
+            ensure_ascii=False,
+            indent=2,
+        ))
+
+    # 호출 위치별 토큰 / 캐시 비율 / 비용 (세션당 평균 비용 포함)
+    usage = token_usage_frame(ops)
+    if len(usage):
+        by_site = token_usage_totals(usage, "call_site")
+        by_site["cost_per_session_usd"] = by_site["cost_usd"] / max(1, usage["session_id"].nunique())
+        print(by_site.round(6).to_string())
+        if args.call_sites:
+            write_frame(by_site.reset_index(), args.call_sites)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,187 @@
+import os
 import re
 import time
+import threading
 import html
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
-from openai import OpenAI
 
-from google.oauth2.service_account import Credentials
-import gspread
+# openai / gspread / google-auth / pandas(catalog_store)는 첫 화면(context_setting)에 필요 없어서
+# 처음 쓰는 함수 안에서 import (콜드 스타트 측정: benchmarks/bench_startup.py)
+from assets import AssetStore, start_asset_server
+from chat_render import TranscriptRenderer
+from event_wal import EventWAL, event_key, replay_unsent
+from faq_store import FAQStore, product_detail_prompt, with_budget_notice
+from keywords import KEYWORDS
+from llm_cache import LLMCache
+from log_shipper import LogShipper
+from memory_text import join_memory_text, naturalize_memory
+from memory_rules import extract_memory_with_rules
+from metrics import MetricsRegistry, SessionTracker, start_http_server
+from preferences import Preferences, parse_memory
+from session_metrics import SessionAggregator
+from session_store import check_session_id, open_session_store
+from sheets_client import SheetsClient
+from token_usage import UsageRecorder, bind_usage, record_usage, summarize
+from tracing import JsonlWriter, Tracer, subtree
+
+# ======================================================
+# 0) 트레이싱 (TRACING=1 이면 span을 JSONL 트레이스 파일에 기록)
+# ======================================================
+DEV_PANEL = os.environ.get("DEV_PANEL", "0") != "0"   # 사이드바에 마지막 턴 span 표시
+TRACING = os.environ.get("TRACING", "0") != "0" or DEV_PANEL
+TRACE_FILE = os.environ.get(
+    "TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime", "traces.jsonl"),
+)
+
+
+@st.cache_resource
+def get_tracer():
+    return Tracer(path=TRACE_FILE if TRACING else None, enabled=TRACING)
+
+
+# 운영 텔레메트리 (턴별 소요 시간, LLM 호출별 토큰 사용량) — 참가자 이벤트 로그(B_raw)와 분리해서 JSONL로 기록
+# 한 줄 = {timestamp, session_id, event_type, value(JSON 문자열)} → analytics.py --telemetry로 읽음 (빈 값이면 기록 안 함)
+TELEMETRY_FILE = os.environ.get(
+    "TELEMETRY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime", "telemetry.jsonl"),
+)
+
+
+@st.cache_resource
+def get_telemetry():
+    return JsonlWriter(TELEMETRY_FILE, "Telemetry Error:")
+
+
+def log_telemetry(event_type, records):
+    """운영용 기록을 텔레메트리 파일에 남김 (log_event와 달리 시트 / WAL / 세션 요약 지표에는 들어가지 않음)"""
+    ss = st.session_state
+    now = time.time()
+    get_telemetry().write([
+        {
+            "timestamp": now,
+            "session_id": ss.get("session_id", "unknown"),
+            "phase": ss.get("stage", "unknown"),
+            "event_type": event_type,
+            "value": json.dumps(r, ensure_ascii=False),
+        }
+        for r in records
+    ])
+
+
+# ======================================================
+# 0) 운영 지표 (METRICS_PORT를 주면 http://<host>:<port>/metrics 로 노출)
+# ======================================================
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_ADDR = os.environ.get("METRICS_ADDR", "0.0.0.0")
+
+
+class AgentMetrics:
+    """프로세스 전체에서 공유하는 지표 모음"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.sessions = SessionTracker(ttl=600)
+        r = self.registry
+        self.llm_latency = r.histogram(
+            "shopping_llm_call_seconds", "OpenAI 호출 지연 (호출 위치별)", ["call_site"]
+        )
+        self.turn_latency = r.histogram(
+            "shopping_turn_seconds", "사용자 발화 한 턴 처리 시간 (메모리 추출 + 응답 생성)", ["stage"]
+        )
+        self.sheets_latency = r.histogram(
+            "shopping_sheets_append_seconds", "Google Sheets append_rows 지연", ["sheet"]
+        )
+        self.log_flush_latency = r.histogram(
+            "shopping_log_flush_seconds", "로그 배치 하나를 전송 완료하기까지 걸린 시간 (재시도 포함)", ["sheet"]
+        )
+        self.events_logged = r.counter(
+            "shopping_events_logged_total", "log_event로 기록한 이벤트 수", ["event_type"]
+        )
+        self.log_failures = r.counter(
+            "shopping_log_failures_total", "로그 기록/전송 실패 수", ["reason"]
+        )
+        self.llm_tokens = r.counter(
+            "shopping_llm_tokens_total", "LLM 토큰 수 (kind: prompt / cached / completion)", ["call_site", "kind"]
+        )
+        self.llm_cost = r.counter(
+            "shopping_llm_cost_usd_total", "LLM 호출 비용 추정치 (token_usage.PRICES 기준)", ["call_site"]
+        )
+        self.cache_lookups = r.counter(
+            "shopping_cache_lookups_total", "캐시 조회 수", ["cache", "result"]
+        )
+        self.memory_extractions = r.counter(
+            "shopping_memory_extractions_total",
+            "메모리 추출 경로별 횟수 (path: rules = 규칙 fast path 적중 / llm, reason: LLM으로 넘긴 이유)",
+            ["path", "reason"],
+        )
+        self.stage_transitions = r.counter(
+            "shopping_stage_transitions_total", "대화 단계 전환 수", ["from_stage", "to_stage"]
+        )
+        r.gauge("shopping_active_sessions", "최근 10분 안에 요청이 있었던 세션 수", fn=self.sessions.active)
+        self.log_shipper = None
+        r.gauge("shopping_log_queue_depth", "전송 대기 중인 로그 row 수", fn=self._log_queue_depth)
+
+    def watch_log_shipper(self, shipper):
+        """get_log_shipper에서 만든 전송기를 큐 깊이 gauge에 연결"""
+        self.log_shipper = shipper
+
+    def _log_queue_depth(self):
+        return self.log_shipper.queue_depth() if self.log_shipper is not None else 0
+
+
+@st.cache_resource
+def get_metrics():
+    metrics = AgentMetrics()
+    if LLM_CASSETTE_MODE == "replay":
+        # 카세트에 없어서 기본 응답으로 대신한 호출 수 (scrape 스레드에서 getter를 부르지 않도록 여기서 꺼내둠)
+        cassette = get_llm_cassette()
+        metrics.registry.gauge(
+            "shopping_cassette_misses", "재생 카세트에 없어 기본 응답으로 대신한 LLM 호출 수",
+            fn=lambda: cassette.misses,
+        )
+    if METRICS_PORT:
+        try:
+            # 같은 프로세스에서는 포트당 서버 하나만 (rerun / 캐시 초기화에도 중복 생성 안 됨)
+            # 캐시 초기화 후에는 이미 떠 있는 서버가 이 새 registry를 노출하도록 교체됨
+            start_http_server(metrics.registry, METRICS_PORT, METRICS_ADDR)
+        except OSError as e:
+            print("Metrics Error:", e)
+    return metrics
+
+
+def track_stage_transition():
+    """직전에 기록한 단계와 지금 단계가 다르면 전환 카운트"""
+    ss = st.session_state
+    prev = ss.get("metrics_stage")
+    if prev is not None and prev != ss.stage:
+        get_metrics().stage_transitions.inc(from_stage=prev, to_stage=ss.stage)
+    ss.metrics_stage = ss.stage
+
+
+# ======================================================
+# 0) 부하 테스트 / 오프라인 실행용 스텁 (LLM_STUB=1, SHEETS_STUB=1)
+# ======================================================
+LLM_STUB = os.environ.get("LLM_STUB", "0") != "0"
+LLM_STUB_LATENCY = float(os.environ.get("LLM_STUB_LATENCY", "0.3"))
+LLM_STUB_JITTER = float(os.environ.get("LLM_STUB_JITTER", "0"))
+LLM_STUB_TOKEN_INTERVAL = float(os.environ.get("LLM_STUB_TOKEN_INTERVAL", "0.01"))
+SHEETS_STUB = os.environ.get("SHEETS_STUB", "0") != "0"
+SHEETS_STUB_LATENCY = float(os.environ.get("SHEETS_STUB_LATENCY", "0.2"))
+
+# LLM 녹화/재생: LLM_CASSETTE_MODE=record → 실제 호출을 LLM_CASSETTE(JSONL)에 기록,
+# replay → 네트워크 없이 카세트 응답을 재생 (지연은 recorded = 녹화값에서 샘플링, fixed = LLM_STUB_LATENCY)
+# 실제 SDK의 HTTP 경로까지 재현하려면 stub_server.py를 띄우고 OPENAI_BASE_URL로 연결
+LLM_CASSETTE = os.environ.get("LLM_CASSETTE", os.path.join(os.path.dirname(__file__), "runtime", "llm_cassette.jsonl"))
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "")
+LLM_REPLAY_LATENCY = os.environ.get("LLM_REPLAY_LATENCY", "recorded")
+LLM_REPLAY_STRICT = os.environ.get("LLM_REPLAY_STRICT", "1") != "0"
+LLM_REPLAY_SEED = int(os.environ["LLM_REPLAY_SEED"]) if os.environ.get("LLM_REPLAY_SEED") else None
+
 
 # ======================================================
 # 0) Google Sheets 인증 (Secret 기반)
@@ -18,6 +191,13 @@ def get_gsheet_client():
     Streamlit Cloud에서 JSON 파일 없이 인증하는 함수
     secrets.toml → [gcp_service_account] 블록 사용
     """
+    if SHEETS_STUB:
+        from stubs import StubGSpreadClient   # 스텁은 필요할 때만 import
+        return StubGSpreadClient(latency=SHEETS_STUB_LATENCY)
+
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     service_json = st.secrets["gcp_service_account"]
 
     creds = Credentials.from_service_account_info(
@@ -31,6 +211,81 @@ def get_gsheet_client():
     client = gspread.authorize(creds)
     return client
 
+
+@st.cache_resource
+def get_sheets():
+    """
+    프로세스 전체에서 공유하는 Sheets 클라이언트.
+    인증/Spreadsheet/Worksheet 핸들을 한 번만 만들고 재사용 → row 1개당 API 호출 1회
+    """
+    return SheetsClient(get_gsheet_client, spreadsheet="shopping_logs")
+
+
+# 로컬 WAL 위치 (레플리카마다 다른 디렉터리를 써야 함)
+EVENT_WAL_DIR = os.environ.get(
+    "EVENT_WAL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime", "wal"),
+)
+# 시작 시 재전송 전에 B_raw 전체를 읽어 이미 들어간 이벤트를 확인할지 (기본은 sent.keys만 기준)
+WAL_REPLAY_CHECK_SHEET = os.environ.get("WAL_REPLAY_CHECK_SHEET", "0") != "0"
+
+
+@st.cache_resource
+def get_event_wal():
+    """이벤트를 Sheets 전송 전에 먼저 남겨두는 로컬 append-only 로그"""
+    return EventWAL(EVENT_WAL_DIR)
+
+
+def _replay_unsent_events(wal, sheets):
+    try:
+        n = replay_unsent(wal, sheets, sheet="B_raw", check_sheet=WAL_REPLAY_CHECK_SHEET)
+        if n:
+            print(f"Replayed {n} unsent event(s) from WAL")
+    except Exception as e:
+        print("Logging Error:", e)
+
+
+# 세션 종료(최종 결정) 때 남은 로그 전송을 기다리는 최대 시간 (초과분은 백그라운드 전송 + WAL이 보장)
+SESSION_END_FLUSH_TIMEOUT = float(os.environ.get("SESSION_END_FLUSH_TIMEOUT", "1.0"))
+
+
+@st.cache_resource
+def get_log_shipper():
+    """
+    프로세스 전체에서 하나만 쓰는 백그라운드 로그 전송기.
+    log_event는 큐에 넣기만 하고, 실제 Sheets 전송은 워커 스레드가 배치로 처리.
+    전송이 끝난 B_raw row는 WAL에 전송 완료로 표시.
+    """
+    wal = get_event_wal()
+    sheets = get_sheets()
+    tracer = get_tracer()
+
+    metrics = get_metrics()
+
+    def append_rows(sheet, rows):
+        with tracer.span("sheets.append_rows", sheet=sheet, rows=len(rows)), \
+                metrics.sheets_latency.time(sheet=sheet):
+            sheets.append_rows(sheet, rows)
+
+    def on_sent(sheet, rows):
+        if sheet == "B_raw":
+            wal.mark_sent([event_key(r[1], r[-1]) for r in rows])
+
+    def on_failed(sheet, rows, error):
+        metrics.log_failures.inc(len(rows), reason="send")
+
+    def on_flushed(sheet, rows, seconds):
+        metrics.log_flush_latency.observe(seconds, sheet=sheet)
+
+    shipper = LogShipper(append_rows, on_sent=on_sent, on_failed=on_failed, on_flushed=on_flushed).start()
+    metrics.watch_log_shipper(shipper)
+
+    # 이전 프로세스(재시작/크래시)가 못 보낸 이벤트는 백그라운드에서 재전송
+    threading.Thread(
+        target=_replay_unsent_events, args=(wal, sheets), name="wal-replay", daemon=True
+    ).start()
+    return shipper
+
 # ======================================================
 # 1) 이벤트 단위 로그 기록 (B_raw) — 최종 안정 버전
 # ======================================================
@@ -46,6 +301,9 @@ def log_event(event_type, **kwargs):
     # --------------------------------------------------
     # 1) 한 이벤트(entry) 구성
     # --------------------------------------------------
+    # 세션 내 일련번호 (session_id + seq 로 재전송 시 중복 방지)
+    st.session_state.log_seq = st.session_state.get("log_seq", 0) + 1
+
     entry = {
         "timestamp": time.time(),
         "session_id": st.session_state.get("session_id", "unknown"),
@@ -64,105 +322,75 @@ def log_event(event_type, **kwargs):
         "old_value": kwargs.get("old_value", ""),
         "index": kwargs.get("index", ""),
         "memory_count": kwargs.get("memory_count", ""),
+        "seq": st.session_state.log_seq,
     }
 
     # --------------------------------------------------
-    # 2) 세션 내 메모리에도 저장 (종료 후 summary용)
+    # 2) 세션 내 메모리에도 저장 + 요약 지표 누적 (종료 후 summary용)
     # --------------------------------------------------
+    summary = get_session_metrics()
     st.session_state.logs.append(entry)
+    summary.update(entry)
 
     # --------------------------------------------------
-    # 3) Google Sheet에 한 줄 전송
+    # 3) 로컬 WAL에 먼저 기록 → Google Sheet 전송은 백그라운드 shipper에 맡김
     # --------------------------------------------------
-    row = list(entry.values())  # 컬럼 순서 그대로 전송
+    metrics = get_metrics()
+    metrics.events_logged.inc(event_type=event_type)
 
-    try:
-        client = get_gsheet_client()
-        sheet = client.open("shopping_logs").worksheet("B_raw")
-        sheet.append_row(row, value_input_option="RAW")
+    with get_tracer().span("log_event", event_type=event_type):
+        try:
+            get_event_wal().append(entry)
+        except Exception as e:
+            metrics.log_failures.inc(reason="wal")
+            print("Logging Error:", e)
 
-    except Exception as e:
-        print("Logging Error:", e)
+        row = list(entry.values())  # 컬럼 순서 그대로 전송
+
+        if not get_log_shipper().submit(row, sheet="B_raw"):
+            metrics.log_failures.inc(reason="queue_full")
+            print("Logging Error: log queue full, event dropped")
 
 
 # ======================================================
 # 2) 세션 요약 기록 함수 (최종)
 # ======================================================
-def write_session_summary():
-
+def get_session_metrics():
+    """
+    세션 요약 지표 누적기. log_event마다 O(1)로 갱신.
+    복원된 세션처럼 아직 없으면 지금까지의 logs로 한 번 다시 계산.
+    """
     ss = st.session_state
-    logs = ss.logs
+    if "session_metrics" not in ss:
+        ss.session_metrics = SessionAggregator.from_events(ss.get("logs", []))
+    return ss.session_metrics
 
-    if not logs:
-        return False  # summary 기록 안 했음
 
-    # ---- TURN COUNTS ----
-    total_turns = sum(
-        1 for e in logs if e["event_type"] in ["user_message", "assistant_message"]
-    )
-    explore_turns = sum(1 for e in logs if e["phase"] == "explore" and e["event_type"] == "user_message")
-    summary_turns = sum(1 for e in logs if e["phase"] == "summary" and e["event_type"] == "user_message")
-    compare_turns = sum(1 for e in logs if e["phase"] == "comparison" and e["event_type"] == "user_message")
-    detail_turns = sum(1 for e in logs if e["phase"] == "product_detail" and e["event_type"] == "user_message")
-
-    # ---- MEMORY EDIT COUNTS (전체) ----
-    mem_add = sum(1 for e in logs if e["event_type"] == "memory_add")
-    mem_delete = sum(1 for e in logs if e["event_type"] == "memory_delete")
-    mem_update = sum(1 for e in logs if e["event_type"] == "memory_update")
-    mem_edit_total = mem_add + mem_delete + mem_update
-
-    # ---- USER-ONLY EDIT COUNTS (버튼 누른 것) ----
-    user_add_count = sum(1 for e in logs if e["event_type"] == "memory_add" and e.get("source") == "user")
-    user_delete_count = sum(1 for e in logs if e["event_type"] == "memory_delete" and e.get("source") == "user")
-
-    # ---- HUMAN TOTAL ----
-    human_edit_total = user_add_count + user_delete_count
-
-    # ---- TIME ----
-    timestamps = [e["timestamp"] for e in logs]
-    total_duration = max(timestamps) - min(timestamps) if timestamps else 0
-
-    # ---- FINAL CHOICE ----
-    final_choice_evt = next((e for e in logs if e["event_type"] == "final_decision"), None)
-    final_choice = final_choice_evt["value"] if final_choice_evt else ""
-
-    # ---- DECISION TIME ----
-    reco_evt = next((e for e in logs if e["event_type"] == "show_candidates"), None)
-    decision_time = final_choice_evt["timestamp"] - reco_evt["timestamp"] if reco_evt and final_choice_evt else ""
-
-    # ---- 최종 저장될 row ----
-    summary_row = [
+def build_summary_row():
+    """현재 세션의 session_summary row (언제든 바로 계산 가능)"""
+    ss = st.session_state
+    return get_session_metrics().summary_row(
         ss.session_id,
         ss.nickname,
         ss.phone_number,
         ss.primary_style,
-        ss.condition,  
-        total_turns,
-        explore_turns,
-        summary_turns,
-        compare_turns,
-        detail_turns,
-        mem_add,
-        mem_delete,
-        mem_update,
-        mem_edit_total,
-        user_add_count,
-        user_delete_count,
-        human_edit_total,  # 🔥 휴먼 총편집
-        total_duration,
-        final_choice,
-        decision_time,
-    ]
+        ss.condition,
+    )
 
-    try:
-        gs = get_gsheet_client()
-        sheet = gs.open("shopping_logs").worksheet("session_summary")
-        sheet.append_row(summary_row, value_input_option="RAW")
-        return True
 
-    except Exception as e:
-        print("Summary Error:", e)
+def write_session_summary():
+
+    ss = st.session_state
+
+    if not ss.logs:
+        return False  # summary 기록 안 했음
+
+    # Sheets 전송은 백그라운드 shipper에 맡김 (구매 버튼 응답을 막지 않음)
+    if not get_log_shipper().submit(build_summary_row(), sheet="session_summary"):
+        get_metrics().log_failures.inc(reason="summary_dropped")
+        print("Summary Error: log queue full, summary dropped")
         return False
+    return True
 
 # =========================================================
 # 0. 기본 설정
@@ -173,23 +401,262 @@ st.set_page_config(
     layout="wide"
 )
 
-client = OpenAI()
+@st.cache_resource
+def get_llm_cassette():
+    """카세트는 프로세스당 하나 (rerun마다 다시 읽으면 같은 요청의 재생 순서가 처음으로 돌아감)"""
+    from cassette import Cassette
+    return Cassette(LLM_CASSETTE)
+
+
+def make_openai_client():
+    if LLM_CASSETTE_MODE == "record":
+        from openai import OpenAI
+        from cassette import RecordingOpenAI
+        return RecordingOpenAI(OpenAI(), get_llm_cassette())
+    if LLM_CASSETTE_MODE == "replay":
+        from stubs import Latency, StubOpenAI, default_responder
+        cassette = get_llm_cassette()
+        if LLM_REPLAY_LATENCY == "recorded" and cassette.latencies():
+            latency = Latency(sampler=cassette.latency_sampler(LLM_REPLAY_SEED))
+        else:
+            latency = Latency(LLM_STUB_LATENCY, LLM_STUB_JITTER, seed=LLM_REPLAY_SEED)
+        return StubOpenAI(
+            responder=cassette.responder(strict=LLM_REPLAY_STRICT, fallback=default_responder),
+            latency=latency,
+            token_interval=LLM_STUB_TOKEN_INTERVAL,
+        )
+    if LLM_STUB:
+        from stubs import Latency, StubOpenAI   # 스텁은 필요할 때만 import
+        return StubOpenAI(
+            latency=Latency(LLM_STUB_LATENCY, LLM_STUB_JITTER),
+            token_interval=LLM_STUB_TOKEN_INTERVAL,
+        )
+    from openai import OpenAI
+    return OpenAI()
+
+
+@st.cache_resource
+def get_openai_client():
+    """OpenAI 클라이언트는 첫 LLM 호출 때 한 번만 만들고 프로세스 전체에서 재사용"""
+    return make_openai_client()
+
+
+# LLM 응답 캐시: 기본은 프로세스 메모리 LRU, LLM_CACHE_SQLITE 경로를 주면 SQLite 계층도 사용
+LLM_CACHE_SQLITE = os.environ.get("LLM_CACHE_SQLITE", "")
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 24 * 3600))
+
+
+@st.cache_resource
+def get_llm_cache():
+    return LLMCache(max_entries=1024, ttl=LLM_CACHE_TTL, sqlite_path=LLM_CACHE_SQLITE or None)
+
+
+class LLMHandles:
+    """
+    LLM 호출 경로에서 쓰는 프로세스 공용 객체 묶음.
+    st.cache_resource getter는 스크립트 스레드에서만 부를 것 (워커 스레드에서 부르면 호출마다
+    "missing ScriptRunContext" 경고) → 스크립트 스레드에서 llm_handles()로 꺼내 워커 함수에 넘김.
+    """
+
+    __slots__ = ("client", "cache", "metrics", "tracer", "extraction_stats")
+
+    def __init__(self, client, cache, metrics, tracer, extraction_stats):
+        self.client = client
+        self.cache = cache
+        self.metrics = metrics
+        self.tracer = tracer
+        self.extraction_stats = extraction_stats
+
+
+def llm_handles():
+    return LLMHandles(
+        get_openai_client(), get_llm_cache(), get_metrics(), get_tracer(), get_extraction_stats()
+    )
+
+
+def is_cacheable_reply(content, finish_reason="stop"):
+    """끝까지 생성된(finish_reason=stop) 비어 있지 않은 응답만 캐시 (잘리거나 끊긴 응답을 TTL 동안 재사용하지 않도록)"""
+    return finish_reason == "stop" and bool(content and content.strip())
+
+
+def is_json_reply(content):
+    try:
+        json.loads(content)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def chat_completion(messages, temperature, model="gpt-4o-mini", cache=False, call_site="", handles=None,
+                    validate=None) -> str:
+    """
+    모든 (비스트리밍) chat.completions 호출이 거치는 공통 함수.
+    cache=True인 호출만 응답 캐시를 사용 (샘플링 위주의 일반 대화 응답은 캐시하지 않음)
+    call_site: 트레이스/지표에서 호출 위치 구분용 (extract_memory / gpt_reply / product_detail)
+    handles: 워커 스레드에서 호출할 때 스크립트 스레드에서 만든 llm_handles()
+    validate: 캐시에 넣기 전 추가 검사 (예: is_json_reply) — 통과하지 못한 응답은 반환만 하고 캐시하지 않음
+    """
+    h = handles or llm_handles()
+    metrics = h.metrics
+    with h.tracer.span("llm", call_site=call_site, model=model, stream=False) as span:
+        if cache:
+            llm_cache = h.cache
+            key = llm_cache.make_key(model, messages, temperature)
+            hit = llm_cache.get(key)
+            metrics.cache_lookups.inc(cache="llm", result="miss" if hit is None else "hit")
+            if hit is not None:
+                span.set(cache_hit=True)
+                return hit
+
+        with metrics.llm_latency.time(call_site=call_site or "other"):
+            res = h.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+        record_llm_usage(span, getattr(res, "usage", None), call_site, model, metrics)
+        content = res.choices[0].message.content
+        finish_reason = getattr(res.choices[0], "finish_reason", "stop")
+
+    if cache and is_cacheable_reply(content, finish_reason) and (validate is None or validate(content)):
+        llm_cache.set(key, content)
+    return content
+
+
+def record_llm_usage(span, usage, call_site="", model="gpt-4o-mini", metrics=None):
+    """
+    OpenAI 응답의 usage(입력 / 캐시된 입력 / 출력 토큰 수)를 span, 지표, 이번 턴 UsageRecorder에 기록
+    (턴이 끝나면 handle_input이 텔레메트리 파일에 llm_usage로 남김)
+    metrics: 워커 스레드에서 호출할 때는 스크립트 스레드에서 꺼낸 AgentMetrics를 넘김
+    """
+    record = record_usage(call_site or "other", model, usage)
+    if record is None:
+        return
+    span.set(
+        prompt_tokens=record["prompt_tokens"],
+        cached_tokens=record["cached_tokens"],
+        completion_tokens=record["completion_tokens"],
+    )
+    metrics = metrics or get_metrics()
+    for kind in ("prompt", "cached", "completion"):
+        metrics.llm_tokens.inc(record[f"{kind}_tokens"], call_site=record["call_site"], kind=kind)
+    metrics.llm_cost.inc(record["cost_usd"], call_site=record["call_site"])
+
+
+# 응답을 토큰 단위로 채팅창에 흘려보낼지 여부 (STREAM_REPLIES=0 이면 기존처럼 한 번에 표시)
+STREAM_REPLIES = os.environ.get("STREAM_REPLIES", "1") != "0"
+
+# CHAT_WINDOW=N이면 긴 세션에서 최근 N개 메시지만 그리고 "이전 대화 더 보기"로 펼침
+# 기본 0 = 항상 전체 대화 (참가자 화면은 그대로, 증분 렌더링만 적용)
+CHAT_WINDOW = int(os.environ.get("CHAT_WINDOW", "0"))
+
+
+@st.cache_resource
+def get_llm_executor():
+    """메모리 추출과 응답 생성을 동시에 돌리기 위한 프로세스 공용 스레드 풀"""
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
 
 # =========================================================
 # 1. 세션 상태 초기값 설정
 # =========================================================
+# 세션 영속 저장소: off(기본) / sqlite / file(공유 KV 대용 디렉터리)
+# 여러 레플리카를 프록시 뒤에 둘 때는 모든 레플리카가 같은 경로를 보도록 설정
+# URL의 ?sid= 만 알면 세션을 불러올 수 있으므로 (링크 공유 = 세션 공유) 필요할 때만 켜서 사용
+SESSION_STORE = os.environ.get("SESSION_STORE", "off")
+SESSION_STORE_PATH = os.environ.get(
+    "SESSION_STORE_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "runtime",
+        "sessions.sqlite3" if SESSION_STORE == "sqlite" else "sessions",
+    ),
+)
+
+# 저장/복원하는 session_state 키 (위젯 키, 렌더러 캐시 등은 제외)
+# 이름/전화번호는 저장하지 않음 (로그의 user_name도 지우고 저장 → REDACTED_LOG_FIELDS)
+PERSISTED_SESSION_KEYS = (
+    "page", "budget",
+    "messages", "memory", "just_updated_memory", "memory_changed",
+    "stage", "summary_text", "detail_mode",
+    "current_recommendation", "recommended_products", "selected_product", "final_choice",
+    "product_detail_turn", "primary_style", "priority_followup_done",
+    "turn_count", "logs", "log_seq", "turn_timings",
+    "session_id", "condition", "summary_written",
+    "question_history", "current_question", "priority", "token_usage",
+)
+REDACTED_LOG_FIELDS = ("user_name",)
+
+
+@st.cache_resource
+def get_session_store():
+    try:
+        return open_session_store(SESSION_STORE, SESSION_STORE_PATH)
+    except Exception as e:
+        print("Session Store Error:", e)
+        return None
+
+
+def restore_session():
+    """
+    URL의 ?sid= 로 저장된 세션을 복원 (재시작/다른 레플리카로 재접속한 경우).
+    저장된 게 없으면 URL의 sid는 쓰지 않고 ss_init()에서 새 uuid4를 발급
+    (클라이언트가 고른 sid를 받아들이면 이전 세션의 (session_id, seq) 로그 키와 겹칠 수 있음).
+    """
+    ss = st.session_state
+    store = get_session_store()
+    if store is None or "session_id" in ss:
+        return
+
+    sid = st.query_params.get("sid")
+    if not sid:
+        return
+    try:
+        check_session_id(sid)
+        state = store.load(sid)
+    except Exception as e:
+        print("Session Store Error:", e)
+        return
+
+    if not state:
+        return
+    for k, v in state.items():
+        if k in PERSISTED_SESSION_KEYS:
+            ss[k] = v
+    ss.session_id = sid
+
+
+def save_session():
+    """현재 세션 상태를 저장소에 기록 (메시지/로그는 새로 붙은 것만)"""
+    store = get_session_store()
+    if store is None:
+        return
+    ss = st.session_state
+    state = {k: ss[k] for k in PERSISTED_SESSION_KEYS if k in ss}
+    if "logs" in state:
+        state["logs"] = [
+            {k: v for k, v in e.items() if k not in REDACTED_LOG_FIELDS} for e in state["logs"]
+        ]
+    try:
+        store.save(ss.session_id, state)
+    except Exception as e:
+        print("Session Store Error:", e)
+
+
 def ss_init():
     ss = st.session_state
+    restore_session()
 
     # 기본 UI 상태
     ss.setdefault("page", "context_setting")
     ss.setdefault("nickname", "")
+    ss.setdefault("phone_number", "")
     ss.setdefault("budget", None)
 
     # 대화 메시지 / 메모리
     ss.setdefault("messages", [])
     ss.setdefault("memory", [])
     ss.setdefault("just_updated_memory", False)
+    ss.setdefault("chat_window", CHAT_WINDOW)
 
 
     # 단계
@@ -205,6 +672,8 @@ def ss_init():
     # 로그용
     ss.setdefault("turn_count", 0)
     ss.setdefault("logs", [])
+    ss.setdefault("log_seq", 0)
+    ss.setdefault("turn_timings", [])
     ss.setdefault("session_id", str(uuid.uuid4()))
     ss.setdefault("condition", "B")  # 나중에 B로 변경 가능
     ss.setdefault("summary_written", False)
@@ -218,6 +687,10 @@ def ss_init():
         "그만", "대충", "음…", "모르겠", "선호 없음", "괜찮"
     ])
 
+    # 새로고침/재접속해도 같은 세션으로 돌아오도록 URL에 sid 유지
+    if get_session_store() is not None and st.query_params.get("sid") != ss.session_id:
+        st.query_params["sid"] = ss.session_id
+
 
 ss_init()
 
@@ -225,10 +698,7 @@ ss_init()
 # 글로벌 상수 정의
 # =========================================================
 
-YES_KEYWORDS = [
-    "응", "응응", "ㅇㅇ", "네", "넹", "맞아", "맞아요",
-    "그래", "좋아", "좋아요", "중요하지", "그치", "맞지"
-]
+# YES_KEYWORDS 등 키워드 사전은 keywords.py (KEYWORDS로 한 번에 분류)
 
 NO_KEYWORDS = [
     "아니", "아니요", "별로",
@@ -493,31 +963,6 @@ def get_eul_reul(noun: str) -> str:
     return "를" if jong == 0 else "을"
 
 
-def naturalize_memory(text: str) -> str:
-    """메모리 문장을 통일된 형태로 정리"""
-    t = text.strip()
-    t = t.replace("노이즈 캔슬링", "노이즈캔슬링")
-    is_priority = "(가장 중요)" in t
-    t = t.replace("(가장 중요)", "").strip()
-
-    t = re.sub(r'로 생각하고 있어요\.?$', '', t)
-    t = re.sub(r'이에요\.?$', '', t)
-    t = re.sub(r'에요\.?$', '', t)
-    t = re.sub(r'다\.?$', '', t)
-
-    t = t.replace('비싼것까진 필요없', '비싼 것 필요 없음')
-    t = t.replace('필요없', '필요 없음')
-
-    t = re.sub(r'(을|를)\s*선호$', ' 선호', t)
-    t = re.sub(r'(을|를)\s*고려하고$', ' 고려', t)
-    t = re.sub(r'(이|가)\s*필요$', ' 필요', t)
-    t = re.sub(r'(에서)\s*들을$', '', t)
-
-    t = t.strip()
-    if is_priority:
-        t = "(가장 중요) " + t
-    return t
-
 def is_negative_response(text: str) -> bool:
     """
     사용자가 특정 질문에 대해 '없어 / 몰라 / 잘 모르겠어 / 별로 / 그만 / 관심없어' 등
@@ -526,37 +971,22 @@ def is_negative_response(text: str) -> bool:
     if not text:
         return False
 
-    negative_keywords = [
-        "없어", "없다고", "몰라", "모르겠", "잘 모르", 
-        "글쎄", "별로", "아닌데", "굳이", "괜찮",
-        "그만", "필요없", "상관없", "안중요", "관심없"
-    ]
-
-    return any(k in text for k in negative_keywords)
+    return KEYWORDS.has(text, "negative")
 
 
-def extract_memory_with_gpt(user_input: str, memory_text: str):
-    """
-    GPT에게 사용자 발화에서 저장할 만한 '헤드셋 쇼핑 메모리'를 뽑게 하는 함수.
-    JSON 형태로만 응답하게 해서 안정적으로 파싱.
-    """
-    prompt = f"""
+# 프롬프트는 고정 지시문(앞) + 호출마다 바뀌는 부분(뒤) 순서로 구성
+# → 앞부분이 모든 호출에서 같아서 OpenAI 프롬프트 캐시(같은 접두부 재사용)가 적용될 수 있음
+EXTRACT_MEMORY_PREFIX = """
 당신은 '헤드셋 쇼핑 메모리 요약 AI'입니다.
 
-사용자 발화:
-\"\"\"{user_input}\"\"\"
-
-현재까지 저장된 메모리:
-{memory_text if memory_text else "(없음)"}
-
-위 발화에서 '추가하면 좋은 쇼핑 메모리'가 있다면 아래 JSON 형식으로만 답하세요.
+맨 아래 [사용자 발화]에서 '추가하면 좋은 쇼핑 메모리'가 있다면 아래 JSON 형식으로만 답하세요.
 
-{{
+{
   "memories": [
       "문장1",
       "문장2"
   ]
-}}
+}
 
 반드시 지킬 것:
 - 메모리는 모두 '블루투스 헤드셋 쇼핑 기준'이어야 합니다.
@@ -576,34 +1006,128 @@ def extract_memory_with_gpt(user_input: str, memory_text: str):
 - 예산 N만원 → "예산은 약 N만 원 이내로 생각하고 있어요."
 
 만약 저장할 만한 메모리가 전혀 없다면
-{{
+{
   "memories": []
-}}
+}
 만 출력하세요.
 """
 
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+
+def extract_memory_with_gpt(user_input: str, memory_text: str, handles=None):
+    """
+    GPT에게 사용자 발화에서 저장할 만한 '헤드셋 쇼핑 메모리'를 뽑게 하는 함수.
+    JSON 형태로만 응답하게 해서 안정적으로 파싱.
+    """
+    prompt = EXTRACT_MEMORY_PREFIX + f"""
+[현재까지 저장된 메모리]
+{memory_text if memory_text else "(없음)"}
+
+[사용자 발화]
+\"\"\"{user_input}\"\"\"
+"""
+
+    content = chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.0,
+        cache=True,
+        call_site="extract_memory",
+        handles=handles,
+        validate=is_json_reply,     # 파싱 안 되는 응답은 캐시하지 않음
     )
 
     try:
-        data = json.loads(res.choices[0].message.content)
+        data = json.loads(content)
         return data.get("memories", [])
     except Exception:
         return []
 
+# ---------------------------------------------------------
+# 규칙 기반 메모리 추출 (LLM 호출 전 fast path, 규칙은 memory_rules.py)
+# ---------------------------------------------------------
+# MEMORY_EXTRACTION_MODE: "hybrid"(규칙 → 부족하면 LLM) / "rules"(규칙만) / "llm"(항상 LLM)
+MEMORY_EXTRACTION_MODE = os.environ.get("MEMORY_EXTRACTION_MODE", "hybrid")
+
+
+class ExtractionStats:
+    """
+    규칙 fast path 적중률 카운터 (프로세스 전체 공유).
+    counter를 주면 같은 값을 path(rules / llm) × reason 라벨로 지표에도 올림
+    """
+
+    def __init__(self, counter=None):
+        self._lock = threading.Lock()
+        self.counts = {"rules": 0, "llm_no_rule": 0, "llm_low_confidence": 0, "llm_forced": 0}
+        self._counter = counter
+
+    def hit(self, key):
+        with self._lock:
+            self.counts[key] += 1
+        if self._counter is not None:
+            path, _, reason = key.partition("_")
+            self._counter.inc(path=path, reason=reason or "confident")
+
+    def hit_rate(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            return self.counts["rules"] / total if total else 0.0
+
+
+@st.cache_resource
+def get_extraction_stats():
+    return ExtractionStats(get_metrics().memory_extractions)
+
+
+def extract_memory(user_input: str, memory_text: str, handles=None):
+    """
+    메모리 추출 진입점. 규칙으로 확실하게 뽑히면 LLM 호출 없이 바로 반환하고,
+    아무것도 안 뽑히거나 애매하면 extract_memory_with_gpt로 넘김.
+    (워커 스레드에서 호출되므로 세션 상태를 건드리지 않음 — 공용 객체는 handles로 받음)
+    """
+    stats = handles.extraction_stats if handles else get_extraction_stats()
+
+    if MEMORY_EXTRACTION_MODE == "llm":
+        stats.hit("llm_forced")
+        return extract_memory_with_gpt(user_input, memory_text, handles)
+
+    memories, confident = extract_memory_with_rules(user_input)
+    if MEMORY_EXTRACTION_MODE == "rules" or (memories and confident):
+        stats.hit("rules")
+        return memories
+
+    stats.hit("llm_low_confidence" if memories else "llm_no_rule")
+    return extract_memory_with_gpt(user_input, memory_text, handles)
+
+
 # =========================================================
 # 5. 메모리 추가/수정/삭제
 # =========================================================
-def _is_color_memory(text: str) -> bool:
-    """색상 관련 메모리인지 판별"""
-    t = text.replace("(가장 중요)", "")
-    if "색상" in t and "선호" in t:
-        return True
-    color_keywords = ["화이트", "블랙", "네이비", "퍼플", "실버", "그레이", "핑크", "보라", "골드"]
-    return any(k in t for k in color_keywords)
+def get_preferences() -> Preferences:
+    """
+    ss.memory와 나란히 유지하는 구조화된 선호 정보.
+    add/update/delete_memory가 같이 갱신하고, 다른 경로(세션 복원, 직접 편집 등)로 메모리가 바뀌었으면 다시 만듦
+    """
+    ss = st.session_state
+    prefs = ss.get("preferences")
+    if prefs is None or not prefs.matches(ss.memory):
+        prefs = ss.preferences = Preferences.from_memory(ss.memory)
+    return prefs
+
+
+def get_memory_text() -> str:
+    """
+    프롬프트용 메모리 블록 (naturalize 후 줄바꿈 연결)을 세션에 캐시.
+    _after_memory_change에서 비우고, 그 밖의 경로로 메모리가 바뀐 경우도 문장 비교로 다시 만듦
+    """
+    ss = st.session_state
+    cached = ss.get("memory_text_cache")
+    memory = ss.memory
+    if cached is not None:
+        snapshot, text = cached
+        if len(snapshot) == len(memory) and all(a is b or a == b for a, b in zip(snapshot, memory)):
+            return text
+    text = join_memory_text(memory)
+    ss.memory_text_cache = (tuple(memory), text)
+    return text
 
 
 def _after_memory_change():
@@ -616,6 +1140,7 @@ def _after_memory_change():
     """
     st.session_state.just_updated_memory = True
     st.session_state.memory_changed = True
+    st.session_state.memory_text_cache = None
 
     # summary 단계에서 메모리가 바뀌면 요약도 같이 다시 만들어주기
     if st.session_state.stage == "summary":
@@ -636,18 +1161,18 @@ def add_memory(mem_text: str, announce: bool = True):
     # 1) 정규화
     mem_text = naturalize_memory(mem_text)
     mem_text_stripped = mem_text.replace("(가장 중요)", "").strip()
+    new_fact = parse_memory(mem_text_stripped)
+    prefs = get_preferences()
 
     # 2) 예산 중복 제거
-    if "예산은 약" in mem_text_stripped:
-        st.session_state.memory = [
-            m for m in st.session_state.memory if "예산은 약" not in m
-        ]
+    if new_fact.is_budget_sentence:
+        st.session_state.memory = [f.text for f in prefs if not f.is_budget_sentence]
+        prefs.reset(st.session_state.memory)
 
     # 3) 색상 중복 제거
-    if _is_color_memory(mem_text_stripped):
-        st.session_state.memory = [
-            m for m in st.session_state.memory if not _is_color_memory(m)
-        ]
+    if new_fact.is_color_sentence:
+        st.session_state.memory = [f.text for f in prefs if not f.is_color_sentence]
+        prefs.reset(st.session_state.memory)
 
     # 4) 기존 메모리와 내용이 겹칠 때
     for i, m in enumerate(st.session_state.memory):
@@ -664,6 +1189,7 @@ def add_memory(mem_text: str, announce: bool = True):
                 ]
 
                 st.session_state.memory[i] = mem_text
+                prefs.reset(st.session_state.memory)
 
                 if announce:
                     st.session_state.notification_message = "🌟 최우선 기준으로 설정되었어요."
@@ -682,6 +1208,7 @@ def add_memory(mem_text: str, announce: bool = True):
 
     # ---------- 5) 새로운 메모리 추가 ----------
     st.session_state.memory.append(mem_text)
+    prefs.append(mem_text)
 
     if announce:
         st.session_state.notification_message = "🧩 메모리에 새로운 내용을 추가했어요."
@@ -701,9 +1228,11 @@ def delete_memory(index: int):
         return
     
     old_value = st.session_state.memory[index]
+    prefs = get_preferences()
 
     # 메모리 삭제
     st.session_state.memory.pop(index)
+    prefs.pop(index)
 
     # 🔥 로그 기록
     log_event(
@@ -724,6 +1253,7 @@ def update_memory(idx: int, new_text: str):
 
     # 기존 값 저장 (old_value)
     old_value = st.session_state.memory[idx]
+    prefs = get_preferences()
 
     # '(가장 중요)' 태그가 포함되면 다른 메모리에서는 모두 제거
     if "(가장 중요)" in new_text:
@@ -731,9 +1261,11 @@ def update_memory(idx: int, new_text: str):
             m.replace("(가장 중요)", "").strip()
             for m in st.session_state.memory
         ]
+        prefs.reset(st.session_state.memory)
 
     # 실제 메모리 변경
     st.session_state.memory[idx] = new_text
+    prefs.set(idx, new_text)
 
     # 🔥 로그 - 수정 기록 (항상 발생해야 함)
     log_event(
@@ -750,41 +1282,11 @@ def update_memory(idx: int, new_text: str):
 # =========================================================
 # 6. 요약/추천 관련 유틸
 # =========================================================
-def extract_budget(mems):
-    for m in mems:
-        m1 = re.search(r"(\d+)\s*만\s*원", m)
-        if m1:
-            return int(m1.group(1)) * 10000
-        txt = m.replace(",", "")
-        m2 = re.search(r"(\d{2,7})\s*원", txt)
-        if m2:
-            return int(m2.group(1))
-    return None
-
-
 def detect_priority(mem_list):
     if not mem_list:
         return None
-    for m in mem_list:
-        if "(가장 중요)" not in m:
-            continue
-        m_low = m.lower()
-        if any(k in m_low for k in ["디자인", "스타일", "깔끔", "미니멀", "레트로", "트렌디", "design", "style"]):
-            return "디자인/스타일"
-        if any(k in m_low for k in ["음질", "sound", "audio"]):
-            return "음질"
-        if any(k in m_low for k in ["착용감", "편안", "comfortable", "가벼운"]):
-            return "착용감"
-        if any(k in m_low for k in ["노이즈", "캔슬링"]):
-            return "노이즈캔슬링"
-        if any(k in m_low for k in ["배터리", "battery", "오래 쓰"]):
-            return "배터리"
-        if any(k in m_low for k in ["가격", "예산", "가성비", "price", "저렴", "싼", "싸게"]):
-            return "가격/예산"
-        if any(k in m_low for k in ["브랜드", "인지도", "유명"]):
-            return "브랜드"
-        return m.replace("(가장 중요)", "").strip()
-    return None
+    prefs = mem_list if isinstance(mem_list, Preferences) else Preferences.from_memory(mem_list)
+    return prefs.priority
 
 import random
 
@@ -792,7 +1294,7 @@ import random
 
 def generate_personalized_reason(product, mems, name):
     reasons = []
-    mem_str = " ".join(mems)
+    prefs = mems if isinstance(mems, Preferences) else Preferences.from_memory(mems)
     tags = product.get("tags", [])
 
     # ============================================
@@ -800,13 +1302,13 @@ def generate_personalized_reason(product, mems, name):
     # ============================================
     # 우선순위: 메모리 → 제품 태그 순으로 하나 또는 두 개만 선택
 
-    if "음질" in mem_str and "음질" in tags:
+    if prefs.mentioned("음질") and "음질" in tags:
         reasons.append("음질 중심 사용자에게 잘 맞아요.")
 
-    if "착용감" in mem_str and any(t in tags for t in ["편안함", "경량", "가벼움", "착용감"]):
+    if prefs.mentioned("착용감") and any(t in tags for t in ["편안함", "경량", "가벼움", "착용감"]):
         reasons.append("외부에서 쓰거나 장시간 착용 용도로 적합해요.")
 
-    if "노이즈캔슬링" in mem_str and "노이즈캔슬링" in tags:
+    if prefs.mentioned("노이즈캔슬링") and "노이즈캔슬링" in tags:
         reasons.append("노이즈캔슬링 성능이 뛰어나요.")
 
     # 제품 태그 기반 보조 문장
@@ -819,7 +1321,7 @@ def generate_personalized_reason(product, mems, name):
     if "통화품질" in tags:
         reasons.append("통화 품질도 준수해서 업무용으로 좋아요.")
 
-    if "음질" in tags and "음질" not in mem_str:
+    if "음질" in tags and not prefs.mentioned("음질"):
         reasons.append("음질 평가도 좋아요.")
 
     # ============================================
@@ -872,20 +1374,69 @@ def send_product_detail_message(product):
     ai_say(detail_text)
 
 # =========================================================
-# 7. 상품 카탈로그 (기존 그대로)
+# 7. 상품 카탈로그 (외부 파일 → 프로세스 공용 스냅샷)
 # =========================================================
-CATALOG = [
-    {"name": "Anker Soundcore Q45", "brand": "Anker", "price": 179000, "rating": 4.4, "reviews": 1600, "rank": 8, "tags": ["가성비", "배터리", "노이즈캔슬링", "편안함"], "review_one": "가격 대비 성능이 훌륭하고 배터리가 길어요.", "color": ["블랙", "화이트", "네이비"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Anker%20Soundcore%20Q45.jpg"},
-    {"name": "JBL Tune 770NC", "brand": "JBL", "price": 99000, "rating": 4.4, "reviews": 2300, "rank": 9, "tags": ["가벼움", "음질", "노이즈캔슬링", "편안함"], "review_one": "가볍고 음질이 좋다는 평이 많아요.", "color": ["블랙", "화이트", "퍼플", "네이비"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/JBL%20Tune%20770NC.png"},
-    {"name": "Sony WH-CH720N", "brand": "Sony", "price": 129000, "rating": 4.5, "reviews": 2100, "rank": 6, "tags": ["노이즈캔슬링", "가벼움", "무난한 음질"], "review_one": "경량이라 출퇴근용으로 좋다는 후기가 많아요.", "color": ["블랙", "화이트", "블루"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Sony%20WH-CH720N.jpg"},
-    {"name": "Bose QC45", "brand": "Bose", "price": 420000, "rating": 4.7, "reviews": 2800, "rank": 2, "tags": ["가벼움", "착용감", "노이즈캔슬링", "편안함"], "review_one": "장시간 써도 귀가 편하다는 리뷰가 많아요.", "color": ["블랙"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Bose%20QC45.jpg"},
-    {"name": "Sony WH-1000XM5", "brand": "Sony", "price": 210000, "rating": 4.8, "reviews": 3200, "rank": 1, "tags": ["노이즈캔슬링", "음질", "착용감", "통화품질"], "review_one": "소음 많은 환경에서 확실히 조용해진다는 평가.", "color": ["핑크"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Sony%20WH-1000XM5.jpg"},
-    {"name": "Apple AirPods Max", "brand": "Apple", "price": 679000, "rating": 4.6, "reviews": 1500, "rank": 3, "tags": ["브랜드", "노이즈캔슬링", "트렌디", "디자인", "고급"], "review_one": "깔끔한 디자인과 가벼운 무게로 만족도가 높아요.", "color": ["실버", "스페이스그레이"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Apple%20Airpods%20Max.jpeg"},
-    {"name": "Sennheiser PXC 550-II", "brand": "Sennheiser", "price": 289000, "rating": 4.3, "reviews": 1200, "rank": 7, "tags": ["착용감", "여행", "배터리", "노이즈캔슬링"], "review_one": "여행 시 장시간 착용에도 압박감이 덜해요.", "color": ["블랙"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Sennheiser%20PXC%2055.jpeg"},
-    {"name": "AKG Y600NC", "brand": "AKG", "price": 149000, "rating": 4.2, "reviews": 1800, "rank": 10, "tags": ["균형 음질", "가성비", "노이즈캔슬링"], "review_one": "가격대비 깔끔하고 균형 잡힌 사운드가 좋아요.", "color": ["블랙", "골드", "네이비"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/AKG%20Y6.jpg"},
-    {"name": "Microsoft Surface Headphones 2", "brand": "Microsoft", "price": 319000, "rating": 4.5, "reviews": 900, "rank": 11, "tags": ["업무", "통화품질", "디자인", "노이즈캔슬링"], "review_one": "업무용으로 완벽하며 통화 품질이 매우 깨끗합니다.", "color": ["화이트", "블랙"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Microsoft%20Surface%20Headphones%202.jpeg"},
-    {"name": "Bose Noise Cancelling Headphones 700", "brand": "Bose", "price": 490000, "rating": 4.7, "reviews": 2500, "rank": 4, "tags": ["노이즈캔슬링", "배터리", "음질", "프리미엄"], "review_one": "노이즈캔슬링 성능과 음질을 모두 갖춘 최고급 프리미엄 제품.", "color": ["블랙", "화이트"], "img": "https://raw.githubusercontent.com/doingsilvr/Shoppingagent/main/shoppingagent/img/Bose%20Headphones%20700.jpg"},
-]
+# CATALOG_PATH: CSV / JSONL / Parquet 경로 (기본: data/catalog.jsonl, Parquet은 pyarrow를 따로 설치해야 함)
+CATALOG_PATH = os.environ.get(
+    "CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.jsonl"),
+)
+
+
+@st.cache_resource
+def get_catalog_store():
+    """카탈로그 파일을 한 번만 읽고, 파일이 바뀌면 자동으로 다시 읽는 저장소"""
+    from catalog_store import CatalogStore   # pandas는 추천 단계에서 처음 필요
+    return CatalogStore(CATALOG_PATH)
+
+
+def get_catalog():
+    """현재 카탈로그 스냅샷 (items / by_name / index)"""
+    return get_catalog_store().get()
+
+
+def refresh_product(product):
+    """세션에 저장된 제품 dict를 최신 카탈로그 값으로 교체 (카탈로그에서 빠졌으면 그대로)"""
+    if not product:
+        return product
+    return get_catalog().get(product["name"], product)
+
+
+# 상품 이미지: 로컬 image/ 원본 → 카드 크기 썸네일 (assets.py)
+# ASSET_MODE=inline → WebP data URI, http → ASSET_PORT 사이드 서버(긴 캐시 헤더), remote → 카탈로그 img URL 그대로
+# 기본값: 브라우저에서 접근 가능한 썸네일 주소(ASSET_BASE_URL)를 설정했으면 http, 아니면 inline.
+# Streamlit Cloud처럼 앱 포트 하나만 열리는 배포에서는 사이드 서버(localhost:ASSET_PORT)에 참가자 브라우저가 닿지 않으므로
+# 주소를 따로 주지 않으면 inline을 씀 (rerun마다 카드 3장 × WebP 3~7KB가 HTML에 다시 실리는 대신 항상 표시됨)
+ASSET_MODE = os.environ.get("ASSET_MODE", "http" if os.environ.get("ASSET_BASE_URL") else "inline")
+ASSET_IMAGE_DIR = os.environ.get(
+    "ASSET_IMAGE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image")
+)
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", os.path.join(os.path.dirname(__file__), "runtime", "thumbs"))
+ASSET_PORT = int(os.environ.get("ASSET_PORT", "8601"))
+ASSET_ADDR = os.environ.get("ASSET_ADDR", "0.0.0.0")
+ASSET_BASE_URL = os.environ.get("ASSET_BASE_URL", f"http://localhost:{ASSET_PORT}/assets")
+
+
+@st.cache_resource
+def get_asset_store():
+    """썸네일은 프로세스 시작 후 처음 한 번만 생성 (이미 캐시 폴더에 있으면 건너뜀)"""
+    store = AssetStore(ASSET_IMAGE_DIR, ASSET_CACHE_DIR)
+    store.build_all()
+    if ASSET_MODE == "http":
+        try:
+            start_asset_server(store, ASSET_PORT, ASSET_ADDR)
+        except OSError as e:
+            print("Asset Error:", e)
+    return store
+
+
+def product_image_html(product, css_class="product-img"):
+    if ASSET_MODE == "remote":
+        return f'<img src="{product["img"]}" class="{css_class}">'
+    return get_asset_store().img_html(
+        product, css_class, base_url=ASSET_BASE_URL if ASSET_MODE == "http" else None
+    )
+
 
 def _brief_feature_from_item(c):
     tags_str = " ".join(c.get("tags", []))
@@ -901,62 +1452,125 @@ def _brief_feature_from_item(c):
 # =========================================================
 # 8. GPT 응답 로직
 # =========================================================
+# product_detail 프롬프트와 FAQ 답변 저장소는 faq_store.py (오프라인 생성 작업과 같은 프롬프트 사용)
+# FAQ_ANSWERS=0 이면 저장된 답변을 쓰지 않고 항상 LLM 호출
+FAQ_ANSWERS = os.environ.get("FAQ_ANSWERS", "1") != "0"
+FAQ_STORE_PATH = os.environ.get(
+    "FAQ_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime", "faq_answers.jsonl")
+)
+FAQ_MIN_CONFIDENCE = float(os.environ.get("FAQ_MIN_CONFIDENCE", "0.9"))
+
+
+@st.cache_resource
+def get_faq_store():
+    return FAQStore(FAQ_STORE_PATH)
+
+
+def _exceeded_budget(product):
+    """상세 단계 첫 답변이고 제품 가격이 예산을 넘으면 예산, 아니면 None"""
+    budget = get_preferences().budget
+    if budget and st.session_state.product_detail_turn == 0 and product["price"] > budget:
+        return budget
+    return None
+
+
+# 리뷰 검색 (reviews.py): REVIEWS_PATH 파일이 있으면 질문과 관련된 리뷰 top-k 발췌를 상세 답변 프롬프트에 추가
+# 기본 파일 data/reviews.jsonl은 카탈로그로 만든 seed 코퍼스 (python reviews.py data/reviews.jsonl --seed data/catalog.jsonl)
+# 인덱스는 REVIEW_INDEX_DIR에 저장해두고 mmap으로 열며, 원본 파일이 바뀌면 처음 쓸 때 다시 만듦
+REVIEWS_PATH = os.environ.get(
+    "REVIEWS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "reviews.jsonl")
+)
+REVIEW_INDEX_DIR = os.environ.get(
+    "REVIEW_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime", "review_index")
+)
+REVIEW_TOP_K = int(os.environ.get("REVIEW_TOP_K", "4"))
+REVIEW_SNIPPET_CHARS = int(os.environ.get("REVIEW_SNIPPET_CHARS", "160"))
+
+
+@st.cache_resource
+def get_review_index():
+    """리뷰 파일이 없으면 None (프롬프트는 review_one 한 줄만 사용)"""
+    from reviews import ReviewIndex
+    try:
+        return ReviewIndex.open(REVIEWS_PATH, REVIEW_INDEX_DIR)
+    except Exception as e:
+        print("Review Index Error:", e)
+        return None
+
+
+def relevant_reviews(product, user_input):
+    """질문과 관련된 리뷰 발췌 (최대 REVIEW_TOP_K개 × REVIEW_SNIPPET_CHARS자 → 리뷰 수와 상관없이 프롬프트 크기 일정)"""
+    index = get_review_index()
+    if index is None:
+        return []
+    with get_tracer().span("review_search") as span:
+        hits = index.search(product["name"], user_input, k=REVIEW_TOP_K)
+        span.set(hits=len(hits))
+    # review_one은 프롬프트에 이미 들어가므로 발췌에서는 뺌
+    return [r.snippet(REVIEW_SNIPPET_CHARS) for r in hits if r.text != product.get("review_one")]
+
+
 def get_product_detail_prompt(product, user_input):
-    memory_text = "\n".join([naturalize_memory(m) for m in st.session_state.memory])
-    nickname = st.session_state.nickname
-    budget = extract_budget(st.session_state.memory)
-
-    budget_line = ""
-    budget_rule = ""
-
-    if budget and st.session_state.product_detail_turn == 0:
-        if product["price"] > budget:
-            budget_line = f"- 사용자가 설정한 예산: 약 {budget:,}원"
-            budget_rule = (
-                f"4. (첫 답변에서만 적용)\n"
-                f"   가격이 예산을 초과한 경우, 답변 첫 문장에 다음 문구 포함:\n"
-                f"   - “예산(약 {budget:,}원)을 약간 초과하지만…”\n"
-            )
+    product = refresh_product(product)
+    return product_detail_prompt(
+        product, user_input, budget=_exceeded_budget(product), reviews=relevant_reviews(product, user_input)
+    )
 
-    return f"""
-당신은 지금 '상품 상세 정보 단계(product_detail)'에 있습니다.
-이 단계에서는 사용자가 선택한 **블루투스 헤드셋 한 제품만** 명확하고 사실 기반으로 설명합니다.
-
-[사용자 질문]
-"{user_input}"
-
-[선택된 제품 정보]
-- 제품명: {product['name']} ({product['brand']})
-- 가격: {product['price']:,}원
-- 색상 옵션: {', '.join(product['color'])}
-- 평점: {product['rating']:.1f}
-- 주요 특징: {', '.join(product['tags'])}
-- 리뷰 요약: {product['review_one']}
-{budget_line}
-
-[응답 규칙]
-1. 질문에 대한 핵심 정보만 간단히 답변합니다.
-2. 다른 제품과의 비교나 추천 리스트 언급은 하지 않습니다.
-3. "현재 선택된 이 헤드셋은~"처럼, 항상 헤드셋 기준으로 설명합니다.
-4. 탐색 질문(용도/기준 재질문)은 하지 않습니다.
-{budget_rule}5. 답변 마지막 문장은 다음 중 하나로 끝냅니다:
-   - "다른 부분도 더 궁금하신가요?  없으시다면, 다른 후보를 눌러 물어보시거나 구매하러가기를 눌러주세요!"
-   - "추가로 알고 싶은 점 있으신가요? 없으시다면, 다른 후보를 눌러 물어보시거나 결정을 내리셨다면 언제든지 구매하러가기 버튼을 누르실 수 있습니다!"
-
-위 규칙을 지키며 자연스럽고 간결한 한국어로 답변하세요.
-"""
 
-def gpt_reply(user_input: str) -> str:
-    """GPT가 단계(stage)별로 다르게 응답하도록 제어하는 핵심 함수"""
+def lookup_faq_answer(product, user_input):
+    """질문 의도가 확실하고 미리 생성한 답변이 있으면 그 답변 (예산 초과 문구 규칙 적용), 아니면 None → LLM"""
+    if not FAQ_ANSWERS:
+        return None
+    product = refresh_product(product)
+    with get_tracer().span("faq_lookup") as span:
+        hit = get_faq_store().answer(product, user_input, FAQ_MIN_CONFIDENCE)
+        span.set(intent=hit[0] if hit else None)
+    get_metrics().cache_lookups.inc(cache="faq", result="hit" if hit else "miss")
+    if hit is None:
+        return None
+    budget = _exceeded_budget(product)
+    return with_budget_notice(hit[1], budget) if budget else hit[1]
 
+def _reply_context(prefs, stage, primary_style):
+    """
+    응답 프롬프트/사후 필터를 바꾸는 메모리 기반 판단값들 (prefs: get_preferences()).
+    메모리 추출 결과로 이 값이 바뀌면 미리 만들어둔 응답을 다시 생성해야 함.
+    """
+    design_priority = primary_style == "design" or prefs.design_priority
+    usage_known = stage == "explore" and prefs.usage and len(prefs) >= 2
+    return {
+        "has_budget": prefs.has_budget,
+        "design_priority": design_priority,
+        "usage_known": usage_known,
+    }
+
+
+# SYSTEM_PROMPT 다음에 오는 user 메시지의 고정 접두부 (모든 explore/summary/comparison 호출에서 동일)
+REPLY_PREFIX = (
+    "[중요 규칙] 이 대화는 항상 '블루투스 헤드셋' 기준입니다. "
+    "스마트폰·노트북 등 다른 기기 추천이나 질문은 하지 마세요.\n"
+)
+
+
+def build_reply_request(user_input: str) -> dict:
+    """
+    GPT가 단계(stage)별로 다르게 응답하도록 요청(프롬프트 등)을 구성.
+    세션 상태는 읽기만 하고 바꾸지 않음 → 메모리 추출과 동시에 미리 만들어 둘 수 있음.
+    """
     ss = st.session_state
-    memory_text = "\n".join([naturalize_memory(m) for m in ss.memory])
-    nickname = ss.nickname
+    memory_text = get_memory_text()
     stage = ss.stage
 
     # context_setting_page에서 세팅한 최우선 기준
     primary_style = ss.get("primary_style", "")   # "price" / "design" / "performance"
-    has_budget = any("예산" in m for m in ss.memory)
+    context = _reply_context(get_preferences(), stage, primary_style)
+
+    req = {
+        "stage": stage,
+        "primary_style": primary_style,
+        "context": context,
+        "call_site": "product_detail" if stage == "product_detail" else "gpt_reply",
+    }
 
     # =========================================================
     # 1) product_detail 단계: 전용 프롬프트 강제 사용
@@ -964,53 +1578,31 @@ def gpt_reply(user_input: str) -> str:
     if stage == "product_detail":
         product = ss.selected_product
         if not product:
-            ss.stage = "comparison"
-            return "선택된 제품 정보가 없어서 추천 목록으로 다시 돌아갈게요!"
+            req["fixed_reply"] = "선택된 제품 정보가 없어서 추천 목록으로 다시 돌아갈게요!"
+            req["fallback_stage"] = "comparison"
+            return req
 
-        prompt = get_product_detail_prompt(product, user_input)
+        faq_answer = lookup_faq_answer(product, user_input)
+        if faq_answer is not None:
+            req["fixed_reply"] = faq_answer
+            return req
 
-        res = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.35,
-        )
-        ss.product_detail_turn += 1
-        return res.choices[0].message.content
+        req["messages"] = [{"role": "user", "content": get_product_detail_prompt(product, user_input)}]
+        req["temperature"] = 0.35
+        req["cache"] = True   # 같은 제품에 같은 질문이 반복되므로 캐시 사용
+        return req
 
     # =========================================================
     # 2) 탐색(explore) / 요약(summary) / 비교(comparison) 단계
     # =========================================================
+    # 🔒 항상 헤드셋 대화 규칙은 REPLY_PREFIX(고정)에 있고, 여기서는 이번 턴에만 붙는 규칙만 모음
     stage_hint = ""
 
-    # 🔒 항상 헤드셋 대화 규칙
-    stage_hint += (
-        "[중요 규칙] 이 대화는 항상 '블루투스 헤드셋' 기준입니다. "
-        "스마트폰·노트북 등 다른 기기 추천이나 질문은 하지 마세요.\n\n"
-    )
-
-    # ---------------------------------------------------------
-    # A. 디자인/스타일 관련 정보
-    # ---------------------------------------------------------
-    design_keywords = ["디자인", "스타일", "예쁜", "깔끔", "세련", "미니멀", "레트로", "감성", "스타일리시"]
-
-    is_design_in_memory = any(
-        any(k in m for k in design_keywords)
-        for m in ss.memory
-    )
-
-    design_priority = (
-        primary_style == "design" or
-        any("(가장 중요)" in m and any(k in m for k in design_keywords) for m in ss.memory)
-    )
-
-    # 색상 정보 있는지
-    has_color_detail = any("색상" in m for m in ss.memory)
-
     # ---------------------------------------------------------
     # B. explore 단계에서 ‘디자인이 최우선’이면
     #    → 이번 턴엔 반드시 ‘디자인 or 색상’ 질문만 1개
     # ---------------------------------------------------------
-    if stage == "explore" and design_priority:
+    if stage == "explore" and context["design_priority"]:
         stage_hint += """
 [디자인/스타일 최우선 규칙 – 이번 턴 필수]
 - 이번 턴에는 반드시 ‘디자인’ 또는 ‘색상’ 관련 질문 **단 1개**만 하세요.
@@ -1021,7 +1613,7 @@ def gpt_reply(user_input: str) -> str:
     # ---------------------------------------------------------
     # C. 가격/가성비 최우선이면 → 예산 먼저
     # ---------------------------------------------------------
-    if stage == "explore" and primary_style == "price" and not has_budget:
+    if stage == "explore" and primary_style == "price" and not context["has_budget"]:
         stage_hint += """
 [가격/가성비 최우선 규칙 – 이번 턴 필수]
 - 이번 턴에는 반드시 예산/가격대에 대해 한 가지만 물어보세요.
@@ -1031,19 +1623,16 @@ def gpt_reply(user_input: str) -> str:
     # ---------------------------------------------------------
     # D. explore 단계 — 용도는 이미 메모리에 있으면 절대 다시 묻지 않기
     # ---------------------------------------------------------
-    usage_keywords = ["용도", "출퇴근", "운동", "게임", "여행", "공부", "음악 감상"]
-    is_usage_in_memory = any(any(k in m for k in usage_keywords) for m in ss.memory)
-
-    if stage == "explore" and is_usage_in_memory and len(ss.memory) >= 2:
+    if context["usage_known"]:
         stage_hint += (
             "[용도 파악됨] 이미 사용 용도는 기억하고 있습니다. "
             "다시 묻지 말고 다음 기준(디자인/예산/음질/착용감 등)으로 넘어가세요.\n"
         )
 
     # ---------------------------------------------------------
-    # E. GPT 본문 프롬프트 구성
+    # E. GPT 본문 프롬프트 구성 (고정 접두부 → 이번 턴 규칙 → 메모리 → 발화)
     # ---------------------------------------------------------
-    prompt_content = f"""
+    prompt_content = REPLY_PREFIX + f"""
 {stage_hint}
 
 [현재 저장된 쇼핑 메모리]
@@ -1056,44 +1645,178 @@ def gpt_reply(user_input: str) -> str:
 다음 말을 자연스럽고 짧게 이어가세요.
 """
 
-    # 실제 GPT 호출
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt_content},
-        ],
-        temperature=0.45,
+    req["messages"] = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt_content},
+    ]
+    req["temperature"] = 0.45
+    return req
+
+
+def call_reply(req: dict, handles=None) -> str:
+    """실제 GPT 호출 (세션 상태를 건드리지 않으므로 워커 스레드에서 실행 가능 — handles를 함께 넘길 것)"""
+    if "fixed_reply" in req:
+        return req["fixed_reply"]
+
+    return chat_completion(
+        req["messages"], req["temperature"], cache=req.get("cache", False), call_site=req["call_site"],
+        handles=handles,
     )
 
-    reply = res.choices[0].message.content
 
-    # =========================================================
-    # 🔥 F. 사후 필터링: '음질 먼저 묻기' 강제 차단
-    # =========================================================
-    if stage == "explore":
-        # 1) 가성비 우선인데 예산 아직 없고, 답변이 음질 위주 → 예산 질문으로 강제 교체
-        if primary_style == "price" and not has_budget:
-            if any(k in reply for k in ["음질", "소리", "사운드"]) and not any(
-                k in reply for k in ["예산", "가격", "얼마", "가격대"]
-            ):
-                reply = (
-                    "가성비를 가장 중요하게 보신다고 하셔서, 먼저 예산 범위를 여쭤보고 싶어요.\n"
-                    "대략 어느 정도 가격대를 생각하고 계신가요? (예: 10만 원대, 20만 원 이하 등)"
-                )
+def open_reply_stream(req: dict):
+    """
+    스트리밍 응답 요청을 먼저 보내두고 스트림 객체 반환 (토큰은 consume_reply_stream에서 읽음).
+    고정 응답이면 None.
+    """
+    if "fixed_reply" in req:
+        return None
 
-        # 2) 디자인/스타일 최우선인데 음질 질문이 먼저 나오면 → 디자인/색상 질문으로 교체
-        if design_priority:
-            if any(k in reply for k in ["음질", "소리", "사운드"]) and not any(
-                k in reply for k in design_keywords + ["색상"]
-            ):
-                reply = (
-                    "디자인과 스타일을 가장 중요하게 보신다고 하셔서, 먼저 외형 쪽을 조금 더 여쭤보고 싶어요.\n"
-                    "선호하시는 색상이나 분위기(깔끔한 느낌, 포인트 컬러, 레트로 느낌 등)가 있으신가요?"
-                )
+    # 스트림 LLM span은 consume_reply_stream / close_reply_stream에서 닫힘
+    span = req["llm_span"] = get_tracer().start_span(
+        "llm", call_site=req["call_site"], model="gpt-4o-mini", stream=True
+    )
+
+    if req.get("cache"):
+        llm_cache = get_llm_cache()
+        req["cache_key"] = llm_cache.make_key("gpt-4o-mini", req["messages"], req["temperature"])
+        hit = llm_cache.get(req["cache_key"])
+        get_metrics().cache_lookups.inc(cache="llm", result="miss" if hit is None else "hit")
+        if hit is not None:
+            req["fixed_reply"] = hit
+            span.set(cache_hit=True)
+            span.end()
+            return None
+
+    req["llm_started"] = time.perf_counter()
+    try:
+        return get_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=req["messages"],
+            temperature=req["temperature"],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    except Exception as e:
+        span.set(error=type(e).__name__)
+        span.end()
+        raise
+
+
+def close_reply_stream(stream, req=None):
+    """미리 열어둔 응답 스트림을 버릴 때 사용"""
+    if stream is not None:
+        stream.close()
+        if req and "llm_span" in req:
+            req["llm_span"].set(discarded=True)
+            req["llm_span"].end()
+
+
+def consume_reply_stream(req: dict, stream, render=None, min_interval=0.05):
+    """
+    스트림에서 토큰을 읽으면서 render(부분 응답)로 채팅창을 갱신.
+    사후 필터로 교체될 수 있는 부분 응답은 화면에 내보내지 않고 버퍼에만 쌓아둠.
+    반환: (전체 응답, 첫 토큰을 화면에 그린 시각(perf_counter) 또는 None)
+    """
+    if stream is None:
+        return req.get("fixed_reply", ""), None
+
+    parts = []
+    first_token_at = None
+    last_render = 0.0
+    finish_reason = None
+    span = req.get("llm_span")
+    try:
+        for chunk in stream:
+            if span is not None and getattr(chunk, "usage", None):
+                record_llm_usage(span, chunk.usage, req["call_site"], "gpt-4o-mini")
+            if not chunk.choices:
+                continue
+            finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+
+            if render is None:
+                continue
+            now = time.perf_counter()
+            if now - last_render < min_interval:
+                continue
+            partial = "".join(parts)
+            if apply_reply_filters(req, partial) != partial:
+                continue
+            if first_token_at is None:
+                first_token_at = now
+            render(partial)
+            last_render = now
+    finally:
+        stream.close()
+        if span is not None:
+            span.end()
+        if "llm_started" in req:
+            # 스트리밍 호출은 요청 전송부터 마지막 토큰까지
+            get_metrics().llm_latency.observe(
+                time.perf_counter() - req["llm_started"], call_site=req["call_site"]
+            )
+
+    reply = "".join(parts)
+    # 중간에 끊긴 스트림(finish_reason 없음)이나 빈 응답은 캐시하지 않음
+    if req.get("cache_key") and is_cacheable_reply(reply, finish_reason):
+        get_llm_cache().set(req["cache_key"], reply)
+    return reply, first_token_at
+
+
+def apply_reply_filters(req: dict, reply: str) -> str:
+    """
+    🔥 사후 필터링: '음질 먼저 묻기' 강제 차단 (세션 상태를 바꾸지 않음)
+    스트리밍 중 부분 응답에도 그대로 적용해서, 교체될 응답이 화면에 먼저 나가지 않게 함.
+    """
+    if req["stage"] != "explore":
+        return reply
+
+    context = req["context"]
+    cats = KEYWORDS.categories(reply)
+
+    # 1) 가성비 우선인데 예산 아직 없고, 답변이 음질 위주 → 예산 질문으로 강제 교체
+    if req["primary_style"] == "price" and not context["has_budget"]:
+        if "sound_mention" in cats and "price_mention" not in cats:
+            reply = (
+                "가성비를 가장 중요하게 보신다고 하셔서, 먼저 예산 범위를 여쭤보고 싶어요.\n"
+                "대략 어느 정도 가격대를 생각하고 계신가요? (예: 10만 원대, 20만 원 이하 등)"
+            )
+
+    # 2) 디자인/스타일 최우선인데 음질 질문이 먼저 나오면 → 디자인/색상 질문으로 교체
+    if context["design_priority"]:
+        if "sound_mention" in cats and not KEYWORDS.has_any(reply, "design", "color_word"):
+            reply = (
+                "디자인과 스타일을 가장 중요하게 보신다고 하셔서, 먼저 외형 쪽을 조금 더 여쭤보고 싶어요.\n"
+                "선호하시는 색상이나 분위기(깔끔한 느낌, 포인트 컬러, 레트로 느낌 등)가 있으신가요?"
+            )
 
     return reply
 
+
+def finish_reply(req: dict, reply: str) -> str:
+    """응답 확정 후 처리: 단계 보정 + 사후 필터링"""
+    ss = st.session_state
+
+    if "fallback_stage" in req:
+        ss.stage = req["fallback_stage"]
+        return reply
+
+    if req["stage"] == "product_detail":
+        ss.product_detail_turn += 1
+        return reply
+
+    return apply_reply_filters(req, reply)
+
+
+def gpt_reply(user_input: str) -> str:
+    """GPT가 단계(stage)별로 다르게 응답하도록 제어하는 핵심 함수"""
+    req = build_reply_request(user_input)
+    return finish_reply(req, call_reply(req))
+
 # =========================================================
 # 9. 로그 유틸
 # =========================================================
@@ -1234,8 +1957,9 @@ def inject_card_css():
 # ============================================================
 import html
 
-def recommend_products_ui(name, mems):
-    products = st.session_state.recommended_products
+def recommend_products_ui(name, prefs):
+    # 카탈로그가 갱신됐을 수 있으니 가격/이미지 등은 최신 스냅샷 기준으로 표시
+    products = [refresh_product(p) for p in st.session_state.recommended_products]
 
     if not products:
         st.warning("추천을 위해 기준이 조금 더 필요해요!")
@@ -1292,7 +2016,7 @@ def recommend_products_ui(name, mems):
             if badge:
                 html_parts.append(badge)
 
-            html_parts.append(f'<img src="{p["img"]}" class="product-img">')
+            html_parts.append(product_image_html(p))
             html_parts.append(
                 f'<div style="font-weight:700; font-size:15px;">{p["name"]}</div>'
             )
@@ -1305,7 +2029,7 @@ def recommend_products_ui(name, mems):
 
             html_parts.append(
                 '<div style="margin-top:10px; font-size:13px; color:#4b5563;">'
-                + html.escape(generate_personalized_reason(p, mems, name))
+                + html.escape(generate_personalized_reason(p, prefs, name))
                 + '</div>'
             )
 
@@ -1352,11 +2076,14 @@ def recommend_products_ui(name, mems):
 
             # 🔥 최종 결정 로그
             log_event("final_decision", value=p["name"])
-        
+
             # summary가 아직 안 작성되었을 때만 실행
             if not st.session_state.summary_written:
                 success = write_session_summary()
                 st.session_state.summary_written = success
+
+            # 세션 종료 → 큐에 남은 로그/summary를 바로 보내고 잠깐만 기다림 (크래시 대비는 WAL)
+            get_log_shipper().flush(timeout=SESSION_END_FLUSH_TIMEOUT)
                                  
             ai_say(
                 f"좋습니다! **'{p['name']}'**(으)로 결정하셨군요! "
@@ -1419,54 +2146,10 @@ def build_summary_from_memory(name, mems):
 # =========================================================
 # 15. 추천 모델 (메모리 기반 점수)
 # =========================================================
-def score_item_with_memory(item, mems):
-    score = 0
-    
-    mtext = " ".join(mems)
-    budget = extract_budget(mems)
-
-    # (1) 최우선 기준 강점 보정
-    if "(가장 중요)" in mtext:
-        if "디자인/스타일" in mtext and "디자인" in item["tags"]:
-            score += 50
-        if "음질" in mtext and "음질" in item["tags"]:
-            score += 50
-        if "착용감" in mtext and "착용감" in item["tags"]:
-            score += 50
-
-    # (2) 일반 기준 반영
-    for m in mems:
-        if "노이즈" in m and "노이즈캔슬링" in item["tags"]:
-            score += 20
-        if "가성비" in m and "가성비" in item["tags"]:
-            score += 20
-        if "색상" in m:
-            for col in item["color"]:
-                if col in m:
-                    score += 10
-
-    # (3) 랭크 보정
-    score -= item["rank"]
-
-    # ---------------------------
-    # (4) 🟡 예산 보정 — 가장 중요!
-    # ---------------------------
-    if budget:
-        if item["price"] > budget:
-            diff = item["price"] - budget
-            if diff > 100000:          # 10만원 초과
-                score -= 200
-            else:
-                score -= 80
-        else:
-            score += 30  # 예산 이내면 가산점
-
-    return score
-
 def make_recommendation():
-    scored = [(score_item_with_memory(item, st.session_state.memory), item) for item in CATALOG]
-    scored.sort(key=lambda x: -x[0])
-    return [item for _, item in scored[:3]]
+    # 메모리는 턴마다 한 번만 파싱하고, 점수는 카탈로그 전체를 한 번에 계산
+    # Preferences는 MemoryFeatures와 같은 속성을 미리 계산해 두고 있음
+    return get_catalog().index.top_k(get_preferences(), k=3)
 
 # =========================================================
 # 🔥 질문 ID → 실제 메모리 문장 변환 테이블 (전역)
@@ -1483,7 +2166,7 @@ MAPPING = {
 # =========================================================
 # 16. 사용자 입력 처리
 # =========================================================
-def handle_input():
+def handle_input(chat_slot=None):
     u = st.session_state.user_input_text.strip()
     if not u:
         return
@@ -1510,7 +2193,7 @@ def handle_input():
             return
 
         # 긍정형 답변
-        if any(u.startswith(k) or u == k for k in YES_KEYWORDS):
+        if KEYWORDS.has(u, "yes"):
             if cur_q in MAPPING:
                 add_memory(MAPPING[cur_q])
             ss.question_history.append(cur_q)
@@ -1525,113 +2208,222 @@ def handle_input():
     # ------------------------------
     # 3) 카테고리 드리프트 방지
     # ------------------------------
-    drift_words = ["스마트폰", "휴대폰", "핸드폰", "아이폰", "갤럭시"]
-    if any(w in u for w in drift_words):
+    if KEYWORDS.has(u, "drift"):
         ai_say("앗! 지금은 헤드셋 추천 단계예요 😊 헤드셋 기준으로 도와드릴게요!")
         return
 
-    # ------------------------------
-    # 4) 메모리 추출
-    # ------------------------------
-    memory_before = ss.memory.copy()
-    memory_text = "\n".join([naturalize_memory(m) for m in ss.memory])
-    extracted = extract_memory_with_gpt(u, memory_text)
+    # 4) ~ 7) 메모리 추출 / 응답 생성 (단계별 소요 시간, LLM 토큰 사용량 기록)
+    timing = {}
+    usage = UsageRecorder()
+    turn_started = time.perf_counter()
+    with get_tracer().span("respond", stage=ss.stage), usage:
+        try:
+            _respond_to_turn(u, timing, turn_started, chat_slot)
+        finally:
+            timing["turn_total"] = time.perf_counter() - turn_started
+            _record_turn_timing(timing)
+            _record_token_usage(usage.drain())
 
-    if extracted:
-        for mem in extracted:
-            if mem not in ss.memory:
-                add_memory(mem)
-                ss.notification_message = f"🧩 '{mem}' 내용을 기억해둘게요."
+
+def _timed_call(fn, *args, tracer=None):
+    """
+    fn(*args) 결과와 소요 시간(초)을 함께 반환 (트레이싱이 켜져 있으면 fn 이름으로 span 기록)
+    워커 스레드에서 실행할 때는 tracer를 넘김
+    """
+    with (tracer or get_tracer()).span(fn.__name__):
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - started
+
+
+def _record_turn_timing(timing):
+    """턴 단위 소요 시간을 세션에 남기고 지표 / 텔레메트리 파일에 기록 (참가자 이벤트 로그에는 넣지 않음)"""
+    timing = {k: (round(v, 4) if isinstance(v, float) else v) for k, v in timing.items()}
+    if "extract_memory" in timing and "gpt_reply" in timing:
+        # 예전처럼 순차 호출했다면 걸렸을 시간
+        timing["serial_estimate"] = round(timing["extract_memory"] + timing["gpt_reply"], 4)
+    st.session_state.setdefault("turn_timings", []).append(timing)
+    get_metrics().turn_latency.observe(timing["turn_total"], stage=st.session_state.stage)
+    log_telemetry("turn_timing", [timing])
+
+
+def _record_token_usage(records):
+    """이번 턴 LLM 호출별 토큰 사용량을 세션 합계에 더하고 텔레메트리 파일에 호출마다 한 줄씩 기록"""
+    summarize(records, into=st.session_state.setdefault("token_usage", {}))
+    log_telemetry("llm_usage", records)
+
+
+def _respond_to_turn(u, timing, turn_started, chat_slot=None):
+    ss = st.session_state
 
     # ------------------------------
-    # 5) SUMMARY 진입 조건
+    # 4) 메모리 추출 + 응답 생성을 동시에 시작
     # ------------------------------
-    user_request_reco = any(k in u for k in ["추천", "골라줘", "추천해줘", "추천 받을게"])
-    mem_count = len(ss.memory)
-    has_budget = any("예산" in m for m in ss.memory)
-    enough_memory = mem_count >= 5
-
-    # ① 리뷰 요청 (사용자가 직접 추천 요청)
-    if user_request_reco:
-        if has_budget:
-            ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
-            ss.stage = "summary"
-            ai_say("좋아요! 지금까지의 기준을 정리해드릴게요 😊")
-            return
+    memory_before = ss.memory.copy()
+    memory_text = get_memory_text()
+    user_request_reco = KEYWORDS.has(u, "reco_request")
+
+    # 추출 전 기준으로 요약/예산 질문으로 끝날 턴이면 응답을 미리 만들지 않음
+    # (추출 후 예산/색상 중복 정리로 메모리가 줄어 일반 응답이 필요해지면 아래 recompute에서 생성)
+    skip_reply = user_request_reco or (ss.stage == "explore" and len(ss.memory) >= 5)
+
+    pool = get_llm_executor()
+    handles = llm_handles()     # 워커에서는 cache_resource getter를 부르지 않도록 여기서 꺼내 넘김
+    tracer = handles.tracer
+    extract_future = pool.submit(
+        bind_usage(tracer.wrap(_timed_call)), extract_memory, u, memory_text, handles, tracer=tracer
+    )
+
+    reply_req = reply_future = reply_stream = None
+    if not skip_reply:
+        # 추출 전 메모리 기준으로 응답을 미리 생성 (speculative)
+        reply_req = build_reply_request(u)
+        if STREAM_REPLIES:
+            # 요청만 먼저 보내두고, 토큰은 메모리 추출이 끝난 뒤 읽기 시작
+            reply_stream, timing["gpt_reply"] = _timed_call(open_reply_stream, reply_req)
         else:
-            ss.current_question = "budget"
-            ai_say("추천을 위해 예산을 알려주세요!")
-            ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
-            return
+            reply_future = pool.submit(
+                bind_usage(tracer.wrap(_timed_call)), call_reply, reply_req, handles, tracer=tracer
+            )
 
-    # ② 메모리 충분(자동 요약)
-    if ss.stage == "explore" and enough_memory:
-        if has_budget:
-            ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
-            ss.stage = "summary"
-            return
+    # 여기부터 예외가 나도 미리 열어둔 스트림 / 미리 보낸 요청은 정리
+    try:
+        extracted, timing["extract_memory"] = extract_future.result()
+
+        if extracted:
+            for mem in extracted:
+                if mem not in ss.memory:
+                    add_memory(mem)
+                    ss.notification_message = f"🧩 '{mem}' 내용을 기억해둘게요."
+
+        # ------------------------------
+        # 5) SUMMARY 진입 조건
+        # ------------------------------
+        mem_count = len(ss.memory)
+        has_budget = get_preferences().has_budget
+        enough_memory = mem_count >= 5
+
+        # ① 리뷰 요청 (사용자가 직접 추천 요청)
+        if user_request_reco:
+            if has_budget:
+                ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
+                ss.stage = "summary"
+                ai_say("좋아요! 지금까지의 기준을 정리해드릴게요 😊")
+                return
+            else:
+                ss.current_question = "budget"
+                ai_say("추천을 위해 예산을 알려주세요!")
+                ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
+                return
+
+        # ② 메모리 충분(자동 요약)
+        if ss.stage == "explore" and enough_memory:
+            close_reply_stream(reply_stream, reply_req)  # 미리 열어둔 응답은 사용하지 않음
+            reply_stream = None
+            if has_budget:
+                ss.summary_text = build_summary_from_memory(ss.nickname, ss.memory)
+                ss.stage = "summary"
+                return
+            else:
+                ss.current_question = "budget"
+                ai_say("기준이 충분히 모였어요! 예산은 어떻게 보고 계세요?")
+                return
+
+        # ------------------------------
+        # 5) GPT 일반 응답 생성
+        # ------------------------------
+        # 추출된 메모리 때문에 응답 조건(예산 유무, 디자인 우선 등)이 바뀌었으면 다시 생성
+        # 미리 만든 응답이 없으면(메모리 5개 이상이라 건너뛰었는데 중복 정리로 줄어든 경우) 여기서 생성
+        recompute = reply_req is None or (ss.memory != memory_before and (
+            _reply_context(get_preferences(), ss.stage, ss.get("primary_style", "")) != reply_req["context"]
+        ))
+
+        if STREAM_REPLIES:
+            stage_key = "gpt_reply"
+            if recompute:
+                close_reply_stream(reply_stream, reply_req)
+                reply_stream = None
+                reply_req = build_reply_request(u)
+                stage_key = "gpt_reply_recompute"
+                reply_stream, timing[stage_key] = _timed_call(open_reply_stream, reply_req)
+
+            def render(partial):
+                render_chat(chat_slot, pending=partial)
+
+            stream, reply_stream = reply_stream, None    # consume_reply_stream이 닫음
+            (reply, first_token_at), consume_time = _timed_call(
+                consume_reply_stream, reply_req, stream, render if chat_slot is not None else None
+            )
+            timing[stage_key] += consume_time
+            if first_token_at is not None:
+                # 사용자가 체감하는 지연: 전송 버튼 → 첫 토큰 표시
+                timing["time_to_first_token"] = first_token_at - turn_started
         else:
-            ss.current_question = "budget"
-            ai_say("기준이 충분히 모였어요! 예산은 어떻게 보고 계세요?")
-            return
+            if reply_future is not None:
+                reply, timing["gpt_reply"] = reply_future.result()
+            if recompute:
+                reply_req = build_reply_request(u)
+                reply, timing["gpt_reply_recompute"] = _timed_call(call_reply, reply_req)
 
-    # ------------------------------
-    # 5) GPT 일반 응답 생성
-    # ------------------------------
-    reply = gpt_reply(u)
-    ai_say(reply)
+        reply = finish_reply(reply_req, reply)
+        ai_say(reply)  # 로그는 전체 응답이 확정된 뒤 한 번만
 
-    # =======================================================
-    # 🔥 6) GPT 질문 ID 감지 + 중복 질문 차단
-    # =======================================================
-    qid = None
+        # =======================================================
+        # 🔥 6) GPT 질문 ID 감지 + 중복 질문 차단
+        # =======================================================
+        qid = None
+        cats = KEYWORDS.categories(reply)
 
-    # 1) 질문 유형 감지
-    if "디자인" in reply or "스타일" in reply:
-        qid = "design"
+        # 1) 질문 유형 감지
+        if "question:design" in cats:
+            qid = "design"
 
-    elif "색상" in reply and "선호" in reply:
-        qid = "color"
+        elif "color_word" in cats and "prefer_word" in cats:
+            qid = "color"
 
-    elif any(x in reply for x in ["음질", "소리", "사운드", "고음", "중음", "저음"]):
-        qid = "sound"
+        elif "question:sound" in cats:
+            qid = "sound"
 
-    elif "착용감" in reply:
-        qid = "comfort"
+        elif "question:comfort" in cats:
+            qid = "comfort"
 
-    elif "배터리" in reply:
-        qid = "battery"
+        elif "question:battery" in cats:
+            qid = "battery"
 
-    elif "예산" in reply or "가격대" in reply:
-        qid = "budget"
+        elif "question:budget" in cats:
+            qid = "budget"
+
+        # 2) 🔥 음질 질문 중복 차단 (변주 포함)
+        if qid == "sound":
+            if "sound" in ss.question_history:
+                ss.current_question = None
+                return
 
-    # 2) 🔥 음질 질문 중복 차단 (변주 포함)
-    if qid == "sound":
-        if "sound" in ss.question_history:
+        # 3) 🔥 이미 했던 질문이면 무효화
+        if qid and qid in ss.question_history:
             ss.current_question = None
             return
 
-    # 3) 🔥 이미 했던 질문이면 무효화
-    if qid and qid in ss.question_history:
-        ss.current_question = None
-        return
-
-    # 4) 새 질문 저장
-    ss.current_question = qid
-
-    # =======================================================
-    # 🔥 7) summary 단계에서의 처리
-    # =======================================================
-    if ss.stage == "summary":
-        if any(k in u for k in ["좋아요", "네", "맞아요", "추천"]):
-            ss.stage = "comparison"
-            ss.recommended_products = make_recommendation()
-            ai_say("좋아요! 지금까지의 기준을 기반으로 추천을 드릴게요.")
-        else:
-            ai_say(
-                "요약 및 추천은 왼쪽 메모리 리스트를 기반으로 작성됩니다!"
-            )
-        return
+        # 4) 새 질문 저장
+        ss.current_question = qid
+
+        # =======================================================
+        # 🔥 7) summary 단계에서의 처리
+        # =======================================================
+        if ss.stage == "summary":
+            if KEYWORDS.has(u, "summary_yes"):
+                ss.stage = "comparison"
+                ss.recommended_products = make_recommendation()
+                ai_say("좋아요! 지금까지의 기준을 기반으로 추천을 드릴게요.")
+            else:
+                ai_say(
+                    "요약 및 추천은 왼쪽 메모리 리스트를 기반으로 작성됩니다!"
+                )
+            return
+    finally:
+        close_reply_stream(reply_stream, reply_req)
+        if reply_future is not None:
+            reply_future.cancel()
 
 # =========================================================
 # 17. context_setting 페이지 (Q1/Q2 새 구조 적용)
@@ -1722,8 +2514,77 @@ def context_setting_page():
             st.session_state.page = "chat"
             st.rerun()
             
+def get_transcript_renderer():
+    ss = st.session_state
+    if "transcript_renderer" not in ss:
+        ss.transcript_renderer = TranscriptRenderer()
+    return ss.transcript_renderer
+
+
+def render_chat(slot, pending=None):
+    """
+    채팅창 전체를 slot(st.empty)에 그림.
+    pending: 스트리밍 중인 AI 응답(부분 텍스트) — 마지막 말풍선으로 덧붙임
+    메시지별 HTML은 TranscriptRenderer가 캐시하므로 rerun마다 새 메시지만 렌더링.
+    """
+    extra = []
+
+    # summary면 요약도 말풍선으로 추가
+    if st.session_state.stage == "summary":
+        extra.append(("assistant", st.session_state.summary_text, ""))
+
+    if pending:
+        extra.append(("assistant", pending, "▌"))
+
+    window = st.session_state.get("chat_window") or None
+    with get_tracer().span("render_chat", messages=len(st.session_state.messages), streaming=bool(pending)):
+        chat_html = get_transcript_renderer().render(st.session_state.messages, extra=extra, window=window)
+        slot.markdown(chat_html, unsafe_allow_html=True)
+
+
+def render_older_messages_button():
+    """가려진 이전 메시지가 있으면 더 보기 버튼 (CHAT_WINDOW개씩 펼침)"""
+    ss = st.session_state
+    window = ss.get("chat_window")
+    hidden = len(ss.messages) - window if window else 0
+    if hidden > 0:
+        if st.button(f"⬆️ 이전 대화 {min(hidden, CHAT_WINDOW)}개 더 보기", key="show_older_messages"):
+            ss.chat_window = window + CHAT_WINDOW
+
+
+def render_dev_panel():
+    """DEV_PANEL=1일 때 사이드바에 마지막 턴의 span별 소요 시간 표시"""
+    spans = st.session_state.get("last_turn_spans")
+    with st.sidebar.expander("🛠️ 마지막 턴 트레이스", expanded=True):
+        if not spans:
+            st.caption("아직 기록된 턴이 없어요.")
+            return
+        rows = []
+        for sp in spans:
+            detail = ", ".join(
+                f"{k}={sp[k]}"
+                for k in ("call_site", "model", "prompt_tokens", "cached_tokens", "completion_tokens", "cache_hit",
+                          "event_type", "error")
+                if sp.get(k) not in (None, "")
+            )
+            rows.append({
+                "span": "　" * sp["depth"] + sp["name"],
+                "ms": sp["duration_ms"],
+                "detail": detail,
+            })
+        st.table(rows)
+
+    usage = st.session_state.get("token_usage")
+    if usage:
+        with st.sidebar.expander("🪙 세션 토큰 사용량", expanded=False):
+            st.table([{"call_site": site, **stats} for site, stats in usage.items()])
+
+
 def main_chat_interface():
 
+    if DEV_PANEL:
+        render_dev_panel()
+
     # 🔒 안전 가드 — 세션이 완전 초기화되기 전에 호출될 때 에러 방지
     if "notification_message" not in st.session_state:
         st.session_state.notification_message = ""
@@ -1762,26 +2623,10 @@ def main_chat_interface():
         # ---------------------------
         # 📌 채팅창 렌더링
         # ---------------------------
-        chat_container = st.container()
-        with chat_container:
-            chat_html = "<div class='chat-display-area'>"
-
-            for msg in st.session_state.messages:
-                safe = html.escape(msg["content"]).replace("\n", "<br>")
-                role = msg["role"]
-
-                if role == "assistant":
-                    chat_html += f"<div class='chat-bubble chat-bubble-ai'>{safe}</div>"
-                else:
-                    chat_html += f"<div class='chat-bubble chat-bubble-user'>{safe}</div>"
-
-            # summary면 요약도 말풍선으로 추가
-            if st.session_state.stage == "summary":
-                summary_html = html.escape(st.session_state.summary_text).replace("\n", "<br>")
-                chat_html += f"<div class='chat-bubble chat-bubble-ai'>{summary_html}</div>"
-
-            chat_html += "</div>"
-            st.markdown(chat_html, unsafe_allow_html=True)
+        # 응답 스트리밍 때 같은 자리를 다시 그릴 수 있도록 placeholder 사용
+        render_older_messages_button()
+        chat_slot = st.empty()
+        render_chat(chat_slot)
 
         # ------------------------------
         # 🔥 추천 받기 버튼 — summary에서만!
@@ -1798,7 +2643,7 @@ def main_chat_interface():
                 log_event("show_candidates", value=candidate_names)
 
                 name = st.session_state.nickname
-                mems = st.session_state.memory
+                prefs = get_preferences()
 
                 # 안내 메시지들
                 ai_say(
@@ -1807,7 +2652,7 @@ def main_chat_interface():
                 )
 
                 for idx, p in enumerate(prods, start=1):
-                    reason = generate_personalized_reason(p, mems, name).split("\n")[0]
+                    reason = generate_personalized_reason(p, prefs, name).split("\n")[0]
                     msg = (
                         f"{idx}번 후보 **{p['name']}** (약 {p['price']:,}원대)\n"
                         f"- 주요 특징: {', '.join(p.get('tags', []))}\n"
@@ -1840,7 +2685,12 @@ def main_chat_interface():
                 )
             with c2:
                 if st.form_submit_button("전송"):
-                    handle_input()
+                    with get_tracer().span("handle_input") as turn_span:
+                        handle_input(chat_slot)
+                    if DEV_PANEL:
+                        st.session_state.last_turn_spans = subtree(turn_span)
+                    track_stage_transition()
+                    save_session()
                     st.rerun()
 
         # ------------------------------------------------
@@ -1848,7 +2698,7 @@ def main_chat_interface():
         # ------------------------------------------------
         if st.session_state.stage == "comparison":
             st.markdown("---")
-            recommend_products_ui(st.session_state.nickname, st.session_state.memory)
+            recommend_products_ui(st.session_state.nickname, get_preferences())
         
         # ------------------------------------------------
         # 제품 상세 단계
@@ -1863,7 +2713,7 @@ def main_chat_interface():
                     st.rerun()
                     
             # 🔥 카드 UI는 product_detail에서도 계속 보여줘야 함
-            recommend_products_ui(st.session_state.nickname, st.session_state.memory)
+            recommend_products_ui(st.session_state.nickname, get_preferences())
         # ------------------------------------------------
         # 구매 결정 단계
         # ------------------------------------------------
@@ -1878,19 +2728,14 @@ def main_chat_interface():
 # =========================================================
 # 19. 라우팅
 # =========================================================
-if st.session_state.page == "context_setting":
-    context_setting_page()
-else:
-    main_chat_interface()
-
-
-
-
-
-
-
-
-
-
+get_metrics().sessions.touch(st.session_state.session_id)
 
+with get_tracer().trace("rerun", session_id=st.session_state.session_id, page=st.session_state.page):
+    if st.session_state.page == "context_setting":
+        context_setting_page()
+    else:
+        main_chat_interface()
 
+# 버튼 등으로 바뀐 상태도 rerun이 끝날 때마다 저장 (바뀐 게 없으면 기록 없음)
+track_stage_transition()
+save_session()
@@ -0,0 +1,329 @@
+"""
+상품 이미지 썸네일 파이프라인.
+
+    python assets.py --image-dir ../image --cache-dir runtime/thumbs
+
+로컬 image/ 폴더 원본(.jpg / .jpeg / .png / .webp)을 카드 크기로 줄여서 WebP + JPEG(대체 형식) 두 벌로 저장.
+파일 이름은 원본 내용 해시 기반이라 같은 이미지(예: "AKG Y6 (1).jpg")는 한 번만 만들고, 이미 있으면 다시 만들지 않음.
+앱에서는 WebP data URI로 카드 HTML에 넣거나(inline), 긴 캐시 헤더를 붙여 주는 사이드 HTTP 서버로
+WebP + JPEG를 <picture>로 제공(http).
+"""
+import argparse
+import base64
+import hashlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+# ======================================================
+# 설정
+# ======================================================
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+THUMB_SIZE = (480, 300)          # 카드 이미지 영역(높이 150px)의 2배 밀도
+PIPELINE_VERSION = 1             # 리사이즈/인코딩 방식이 바뀌면 올려서 캐시 파일 이름을 바꿈
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="480" height="300" viewBox="0 0 480 300">'
+    '<rect width="480" height="300" fill="#f3f4f6"/>'
+    '<text x="240" y="160" font-size="64" text-anchor="middle" fill="#9ca3af">🎧</text></svg>'
+)
+PLACEHOLDER_URI = "data:image/svg+xml;base64," + base64.b64encode(PLACEHOLDER_SVG.encode("utf-8")).decode("ascii")
+
+_DUPLICATE_SUFFIX = re.compile(r"\s*\(\d+\)$")
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def _normalize(name):
+    return _NON_WORD.sub(" ", name.lower()).strip()
+
+
+class Thumbnail:
+    __slots__ = ("key", "source", "webp", "fallback", "width", "height")
+
+    def __init__(self, key, source, webp, fallback, width, height):
+        self.key = key
+        self.source = source
+        self.webp = webp
+        self.fallback = fallback
+        self.width = width
+        self.height = height
+
+
+# ======================================================
+# 썸네일 저장소
+# ======================================================
+class AssetStore:
+    """
+    image_dir 원본 → cache_dir 썸네일.
+    - 상품은 img URL의 파일 이름 → 상품 이름과 같은 파일 → 이름이 가장 많이 겹치는 파일 순으로 매칭
+    - 썸네일 파일 이름: <원본 sha256 앞 16자>-<w>x<h>-v<버전>.webp / .jpg
+    - 원본이 없거나 변환에 실패하면 resolve()가 None → 호출 쪽은 PLACEHOLDER_URI 사용
+    """
+
+    def __init__(self, image_dir, cache_dir, size=THUMB_SIZE, quality=80):
+        self.image_dir = image_dir
+        self.cache_dir = cache_dir
+        self.size = tuple(size)
+        self.quality = quality
+
+        self._lock = threading.Lock()
+        self._by_hash = {}       # 원본 내용 해시 → Thumbnail
+        self._by_file = {}       # 원본 경로 → Thumbnail
+        self._resolved = {}      # (상품 이름, img) → Thumbnail | None
+        self._data_uris = {}     # 썸네일 경로 → data URI
+        self.files = self._scan()
+
+    def _scan(self):
+        if not os.path.isdir(self.image_dir):
+            return {}
+        files = {}
+        # "(1)" 같은 중복 접미사가 없는 파일을 먼저 등록
+        def order(name):
+            return bool(_DUPLICATE_SUFFIX.search(os.path.splitext(name)[0])), name
+
+        for name in sorted(os.listdir(self.image_dir), key=order):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                files[name] = os.path.join(self.image_dir, name)
+        return files
+
+    # --------------------------------------------------
+    # 상품 → 원본 파일
+    # --------------------------------------------------
+    def find_source(self, product):
+        if not self.files:
+            return None
+        lower = {n.lower(): p for n, p in self.files.items()}
+
+        img = product.get("img") or ""
+        if img:
+            basename = unquote(os.path.basename(urlparse(img).path)).lower()
+            if basename in lower:
+                return lower[basename]
+
+        stems = {}
+        for n, p in self.files.items():
+            stem = _normalize(_DUPLICATE_SUFFIX.sub("", os.path.splitext(n)[0]))
+            stems.setdefault(stem, p)
+
+        target = _normalize(product.get("name", ""))
+        if target in stems:
+            return stems[target]
+
+        # 이름 토큰이 가장 많이 겹치는 파일 (브랜드 토큰 하나만 겹치는 건 제외)
+        words = set(target.split())
+        best, best_score = None, 1
+        for stem, p in stems.items():
+            score = len(words & set(stem.split()))
+            if score > best_score:
+                best, best_score = p, score
+        return best
+
+    # --------------------------------------------------
+    # 썸네일 생성
+    # --------------------------------------------------
+    def _thumbnail_for_file(self, path):
+        with self._lock:
+            thumb = self._by_file.get(path)
+        if thumb is not None:
+            return thumb
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        w, h = self.size
+        key = f"{digest}-{w}x{h}-v{PIPELINE_VERSION}"
+
+        with self._lock:
+            thumb = self._by_hash.get(digest)
+            if thumb is None:
+                webp = os.path.join(self.cache_dir, key + ".webp")
+                fallback = os.path.join(self.cache_dir, key + ".jpg")
+                if os.path.exists(webp) and os.path.exists(fallback):
+                    width, height = self._read_size(webp)
+                else:
+                    width, height = self._render(path, webp, fallback)
+                thumb = self._by_hash[digest] = Thumbnail(key, path, webp, fallback, width, height)
+            self._by_file[path] = thumb
+        return thumb
+
+    @staticmethod
+    def _read_size(path):
+        from PIL import Image   # Pillow는 썸네일을 만들 때만 import
+        with Image.open(path) as im:
+            return im.size
+
+    def _render(self, source, webp, fallback):
+        from PIL import Image, ImageOps
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with Image.open(source) as im:
+            im = ImageOps.exif_transpose(im)
+            im = im.convert("RGBA") if im.mode in ("P", "LA", "RGBA") else im.convert("RGB")
+            im.thumbnail(self.size, Image.LANCZOS)
+
+            tmp = webp + ".tmp"
+            im.save(tmp, "WEBP", quality=self.quality, method=6)
+            os.replace(tmp, webp)
+
+            # JPEG는 투명도가 없으므로 카드 배경(흰색) 위에 합성
+            if im.mode == "RGBA":
+                bg = Image.new("RGB", im.size, (255, 255, 255))
+                bg.paste(im, mask=im.getchannel("A"))
+                im = bg
+            tmp = fallback + ".tmp"
+            im.save(tmp, "JPEG", quality=self.quality, optimize=True, progressive=True)
+            os.replace(tmp, fallback)
+            return im.size
+
+    def build_all(self):
+        """image_dir의 모든 원본 썸네일 생성 (이미 있으면 건너뜀). (원본 수, 고유 이미지 수, 소요 시간)"""
+        started = time.perf_counter()
+        for path in self.files.values():
+            try:
+                self._thumbnail_for_file(path)
+            except (OSError, ValueError) as e:
+                print("Asset Error:", path, e)
+        return len(self.files), len(self._by_hash), time.perf_counter() - started
+
+    def resolve(self, product):
+        key = (product.get("name", ""), product.get("img", ""))
+        with self._lock:
+            if key in self._resolved:
+                return self._resolved[key]
+        thumb = None
+        source = self.find_source(product)
+        if source is not None:
+            try:
+                thumb = self._thumbnail_for_file(source)
+            except (OSError, ValueError) as e:
+                print("Asset Error:", source, e)
+        with self._lock:
+            self._resolved[key] = thumb
+        return thumb
+
+    # --------------------------------------------------
+    # HTML
+    # --------------------------------------------------
+    def data_uri(self, path):
+        with self._lock:
+            uri = self._data_uris.get(path)
+        if uri is None:
+            mime = "image/webp" if path.endswith(".webp") else "image/jpeg"
+            with open(path, "rb") as f:
+                uri = f"data:{mime};base64," + base64.b64encode(f.read()).decode("ascii")
+            with self._lock:
+                self._data_uris[path] = uri
+        return uri
+
+    def img_html(self, product, css_class="product-img", base_url=None):
+        """
+        카드용 <img> HTML.
+        - base_url이 있으면 <picture>로 WebP + JPEG URL (사이드 서버 / CDN)
+        - 없으면 WebP data URI 하나만 (rerun마다 HTML에 같이 실리므로 작은 쪽만)
+        - 이미지가 없거나 읽지 못하면 PLACEHOLDER_URI
+        """
+        alt = (product.get("name") or "").replace('"', "&quot;")
+        thumb = self.resolve(product)
+        src = PLACEHOLDER_URI
+        if thumb is not None and base_url:
+            base = base_url.rstrip("/")
+            img = (f'<img src="{base}/{os.path.basename(thumb.fallback)}" class="{css_class}" alt="{alt}" '
+                   f'width="{thumb.width}" height="{thumb.height}" loading="lazy">')
+            return f'<picture><source srcset="{base}/{os.path.basename(thumb.webp)}" type="image/webp">{img}</picture>'
+        if thumb is not None:
+            try:
+                src = self.data_uri(thumb.webp)
+            except OSError as e:
+                print("Asset Error:", thumb.webp, e)
+        return f'<img src="{src}" class="{css_class}" alt="{alt}">'
+
+
+# ======================================================
+# 사이드 HTTP 서버 (/assets/<썸네일 파일>, 긴 캐시 헤더)
+# ======================================================
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def start_asset_server(store, port, addr="0.0.0.0"):
+    """
+    store.cache_dir의 썸네일을 http://addr:port/assets/<파일> 로 제공하는 데몬 스레드 서버.
+    파일 이름이 내용 해시라서 Cache-Control: immutable. 같은 포트로 여러 번 불려도 하나만 띄움
+    """
+    with _servers_lock:
+        if port in _servers:
+            return _servers[port]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                name = self.path.split("?")[0]
+                if not name.startswith("/assets/"):
+                    self.send_error(404)
+                    return
+                name = os.path.basename(name[len("/assets/"):])
+                if not name.endswith((".webp", ".jpg")):
+                    self.send_error(404)
+                    return
+                etag = '"' + os.path.splitext(name)[0] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                try:
+                    with open(os.path.join(store.cache_dir, name), "rb") as f:
+                        body = f.read()
+                except OSError:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/webp" if name.endswith(".webp") else "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", f"public, max-age={CACHE_MAX_AGE}, immutable")
+                self.send_header("ETag", etag)
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"assets-http-{port}", daemon=True).start()
+        _servers[port] = server
+        return server
+
+
+def main(argv=None):
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--image-dir", default=os.path.join(os.path.dirname(here), "image"))
+    parser.add_argument("--cache-dir", default=os.path.join(here, "runtime", "thumbs"))
+    parser.add_argument("--catalog", default=os.path.join(here, "data", "catalog.jsonl"),
+                        help="상품별 매칭 결과를 보여줄 카탈로그")
+    args = parser.parse_args(argv)
+
+    store = AssetStore(args.image_dir, args.cache_dir)
+    sources, unique, elapsed = store.build_all()
+    print(f"{sources} source image(s), {unique} unique → {args.cache_dir} ({elapsed:.2f}s)")
+
+    if args.catalog and os.path.exists(args.catalog):
+        from catalog_store import read_catalog_frame
+        for product in read_catalog_frame(args.catalog).to_dict("records"):
+            thumb = store.resolve(product)
+            if thumb is None:
+                print(f"  {product['name']}: (placeholder)")
+                continue
+            kb = (os.path.getsize(thumb.webp) / 1024, os.path.getsize(thumb.fallback) / 1024)
+            print(f"  {product['name']}: {os.path.basename(thumb.source)} → {thumb.key} "
+                  f"{thumb.width}x{thumb.height} webp {kb[0]:.1f}KB / jpg {kb[1]:.1f}KB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""
+채팅창 렌더링 벤치마크: 기존 전체 재생성(render_chat 루프) vs TranscriptRenderer 증분 캐시.
+
+    python benchmarks/bench_chat_render.py --sizes 10 100 1000
+
+rerun 한 번(메시지 1개 추가 후 다시 그리기)의 렌더링 시간과 websocket으로 나가는 HTML 크기를 비교.
+전체 보기(window 없음) 결과가 기존 HTML과 완전히 같은지도 함께 확인한다.
+"""
+import argparse
+import html
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_render import TranscriptRenderer  # noqa: E402
+
+SAMPLES = [
+    ("assistant", "이전에 출퇴근용이라고 하셨는데, 착용감과 노이즈캔슬링 중 어떤 쪽이 더 중요하신가요?"),
+    ("user", "노이즈캔슬링이 더 중요해요. 지하철이 시끄러워서요 <진짜로>"),
+    ("assistant", "좋아요! 메모리에 추가해둘게요.\n그럼 예산은 어느 정도로 생각하고 계신가요?"),
+    ("user", "20만원 안쪽이면 좋겠어요"),
+]
+
+
+def make_messages(n):
+    msgs = []
+    for i in range(n):
+        role, text = SAMPLES[i % len(SAMPLES)]
+        msgs.append({"role": role, "content": f"{text} (#{i})"})
+    return msgs
+
+
+def legacy_render(messages):
+    """변경 전 render_chat과 같은 방식"""
+    chat_html = "<div class='chat-display-area'>"
+    for msg in messages:
+        safe = html.escape(msg["content"]).replace("\n", "<br>")
+        if msg["role"] == "assistant":
+            chat_html += f"<div class='chat-bubble chat-bubble-ai'>{safe}</div>"
+        else:
+            chat_html += f"<div class='chat-bubble chat-bubble-user'>{safe}</div>"
+    chat_html += "</div>"
+    return chat_html
+
+
+def per_rerun(fn, messages, repeat):
+    """마지막 메시지만 새로 추가된 상태에서 한 번 그리는 시간 (best of repeat)"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--window", type=int, default=100, help="최근 메시지 창 크기 (CHAT_WINDOW)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'msgs':>6} {'legacy(ms)':>11} {'incr(ms)':>9} {'window(ms)':>11} "
+          f"{'speedup':>8} {'full(KB)':>9} {'window(KB)':>11}")
+    for n in args.sizes:
+        messages = make_messages(n)
+
+        # 결과 일치 확인
+        renderer = TranscriptRenderer()
+        expected = legacy_render(messages)
+        assert renderer.render(messages) == expected, f"html mismatch ({n})"
+
+        # 증분: 직전 rerun까지 캐시된 상태에서 새 메시지 1개가 붙은 경우
+        def incremental(msgs, window=None):
+            r = TranscriptRenderer()
+            r.render(msgs[:-1])
+            t0 = time.perf_counter()
+            r.render(msgs, window=window)
+            return time.perf_counter() - t0
+
+        t_legacy = per_rerun(legacy_render, messages, args.repeat)
+        t_incr = min(incremental(messages) for _ in range(args.repeat))
+        t_window = min(incremental(messages, args.window) for _ in range(args.repeat))
+
+        full_kb = len(expected.encode("utf-8")) / 1024
+        window_kb = len(renderer.render(messages, window=args.window).encode("utf-8")) / 1024
+        print(
+            f"{n:>6} {t_legacy * 1000:>11.3f} {t_incr * 1000:>9.3f} {t_window * 1000:>11.3f} "
+            f"{t_legacy / t_incr:>7.1f}x {full_kb:>9.1f} {window_kb:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+키워드 분류 벤치마크: 기존 any(k in text for k in [...]) 반복 스캔 vs KeywordMatcher (Aho-Corasick).
+
+    python benchmarks/bench_keywords.py --texts 20000 --extra-keywords 0 1000 10000
+
+문장마다 모든 카테고리의 판정 결과가 기존 방식과 완전히 같은지도 함께 확인한다.
+--extra-keywords는 사전 크기를 키웠을 때(카테고리/언어 추가)의 스캔 비용 변화를 보기 위한 가짜 키워드 수.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import LEXICONS, PREFIX_LEXICONS, KeywordMatcher  # noqa: E402
+
+FRAGMENTS = [
+    "출퇴근할 때", "지하철에서", "쓸 거예요", "예산은 20만원", "노이즈캔슬링", "중요해요", "화이트 색상이",
+    "좋아요", "네", "응응", "잘 모르겠어요", "상관없어요", "추천해줘", "골라줘", "아이폰이랑", "디자인",
+    "음질이", "소리가", "착용감", "배터리", "가격대", "선호해요", "(가장 중요)", "Design", "SOUND", "싸게",
+    "가벼운", "레트로 감성", "게임", "여행", "음악 감상", "브랜드 인지도", "그냥", "ㅇㅇ", "맞아요 ",
+]
+
+
+def make_texts(n, seed=0):
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(1, 8))) for _ in range(n)]
+
+
+def reference_categories(text):
+    """기존 코드와 같은 방식의 스캔 (카테고리마다 키워드 전체를 다시 훑음)"""
+    found = {c for c, ks in LEXICONS.items() if any(k in text for k in ks)}
+    found |= {c for c, ks in PREFIX_LEXICONS.items() if any(text.startswith(k) or text == k for k in ks)}
+    return frozenset(found)
+
+
+def make_extra_lexicon(n, seed=1):
+    rnd = random.Random(seed)
+    syllables = [chr(c) for c in range(0xAC00, 0xAC00 + 400)]
+    extra = {}
+    for i in range(n):
+        word = "".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4)))
+        extra.setdefault(f"extra_{i % 50}", []).append(word)
+    return extra
+
+
+def bench(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - started)
+    return best / len(texts) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--extra-keywords", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    texts = make_texts(args.texts)
+    print(f"{'keywords':>9} {'any-scan µs':>12} {'AC cold µs':>11} {'AC cached µs':>13}  identical")
+    for extra in args.extra_keywords:
+        lexicons = dict(LEXICONS)
+        for cat, ks in make_extra_lexicon(extra).items():
+            lexicons[cat] = lexicons.get(cat, ()) + tuple(ks)
+        n_keywords = sum(len(ks) for ks in lexicons.values()) + sum(len(ks) for ks in PREFIX_LEXICONS.values())
+
+        def scan(text, lexicons=lexicons):
+            found = {c for c, ks in lexicons.items() if any(k in text for k in ks)}
+            found |= {c for c, ks in PREFIX_LEXICONS.items() if any(text.startswith(k) for k in ks)}
+            return frozenset(found)
+
+        matcher = KeywordMatcher(lexicons, PREFIX_LEXICONS, cache_size=None)
+        identical = all(scan(t) == matcher._scan(t) for t in texts)
+        if extra == 0:
+            identical = identical and all(reference_categories(t) == matcher.categories(t) for t in texts)
+
+        t_scan = bench(scan, texts, args.repeat)
+        t_cold = bench(matcher._scan, texts, args.repeat)
+        matcher.categories.cache_clear()
+        bench(matcher.categories, texts, 1)
+        t_cached = bench(matcher.categories, texts, args.repeat)
+        print(f"{n_keywords:>9} {t_scan:>12.2f} {t_cold:>11.2f} {t_cached:>13.2f}  {identical}")
+        if not identical:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+메모리 텍스트 생성 벤치마크: 기존 naturalize_memory(매번 re.sub 8번) vs 컴파일+캐시 vs 세션 캐시된 memory_text.
+
+    python benchmarks/bench_memory_text.py --sizes 5 20 100 --turns 200
+
+한 턴에 프롬프트용 메모리 블록을 --builds-per-turn번 만든다고 보고(handle_input + gpt_reply 등),
+메모리는 --change-every 턴마다 한 문장씩 바뀐다고 가정. 결과 문자열이 기존 구현과 같은지도 확인.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_text import join_memory_text, naturalize_memory  # noqa: E402
+
+SENTENCES = [
+    "(가장 중요) 디자인/스타일을 최우선으로 고려하고 있어요.",
+    "색상은 화이트 계열을 선호해요.",
+    "예산은 약 30만 원 이내로 생각하고 있어요.",
+    "가성비, 가격을 중요하게 생각하는 편이에요.",
+    "노이즈 캔슬링 기능을 고려하고 있어요.",
+    "출퇴근 시 사용할 용도예요.",
+    "착용감이 편한 제품을 선호하고 있어요.",
+    "비싼것까진 필요없다.",
+    "선호하는 브랜드는 Sony 쪽이에요.",
+    "주로 음악 감상 용도로 사용할 예정이에요.",
+    "통화 품질이 필요",
+    "카페에서 들을",
+]
+
+
+def naturalize_memory_reference(text):
+    """기존 app.py 구현 그대로 (패턴 문자열을 매번 re.sub에 넘김)"""
+    t = text.strip()
+    t = t.replace("노이즈 캔슬링", "노이즈캔슬링")
+    is_priority = "(가장 중요)" in t
+    t = t.replace("(가장 중요)", "").strip()
+
+    t = re.sub(r'로 생각하고 있어요\.?$', '', t)
+    t = re.sub(r'이에요\.?$', '', t)
+    t = re.sub(r'에요\.?$', '', t)
+    t = re.sub(r'다\.?$', '', t)
+
+    t = t.replace('비싼것까진 필요없', '비싼 것 필요 없음')
+    t = t.replace('필요없', '필요 없음')
+
+    t = re.sub(r'(을|를)\s*선호$', ' 선호', t)
+    t = re.sub(r'(을|를)\s*고려하고$', ' 고려', t)
+    t = re.sub(r'(이|가)\s*필요$', ' 필요', t)
+    t = re.sub(r'(에서)\s*들을$', '', t)
+
+    t = t.strip()
+    if is_priority:
+        t = "(가장 중요) " + t
+    return t
+
+
+def make_memory(n, rnd):
+    # 같은 문장 반복을 피하려고 번호를 붙임 (캐시가 문장 재사용으로 유리해지지 않게)
+    return [f"{rnd.choice(SENTENCES)[:-1]} {i}{rnd.choice(['.', '요.', ''])}" for i in range(n)]
+
+
+def run_turns(memory, turns, builds, change_every, mode, rnd):
+    memory = list(memory)
+    cache = None
+    started = time.perf_counter()
+    for turn in range(turns):
+        if change_every and turn and turn % change_every == 0:
+            memory[rnd.randrange(len(memory))] = f"{rnd.choice(SENTENCES)} t{turn}"
+            cache = None    # _after_memory_change
+        for _ in range(builds):
+            if mode == "reference":
+                "\n".join([naturalize_memory_reference(m) for m in memory])
+            elif mode == "memoized":
+                join_memory_text(memory)
+            else:
+                if cache is None:
+                    cache = join_memory_text(memory)
+    return (time.perf_counter() - started) / turns * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--builds-per-turn", type=int, default=2)
+    parser.add_argument("--change-every", type=int, default=3, help="몇 턴마다 메모리 한 문장이 바뀌는지")
+    args = parser.parse_args(argv)
+
+    print(f"{'items':>6} {'reference µs/turn':>18} {'memoized':>10} {'session cache':>14}  identical")
+    for n in args.sizes:
+        memory = make_memory(n, random.Random(n))
+        identical = join_memory_text(memory) == "\n".join(naturalize_memory_reference(m) for m in memory)
+        identical = identical and all(naturalize_memory(s) == naturalize_memory_reference(s) for s in SENTENCES)
+
+        results = {}
+        for mode in ("reference", "memoized", "session"):
+            naturalize_memory.cache_clear()
+            results[mode] = run_turns(
+                memory, args.turns, args.builds_per_turn, args.change_every, mode, random.Random(0)
+            )
+        print(f"{n:>6} {results['reference']:>18.1f} {results['memoized']:>10.1f} "
+              f"{results['session']:>14.1f}  {identical}")
+        if not identical:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
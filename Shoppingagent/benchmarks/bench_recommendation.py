@@ -0,0 +1,99 @@
+"""
+추천 점수 계산 벤치마크: 기존 아이템 루프(score_item_with_memory) vs CatalogIndex 벡터화.
+
+    python benchmarks/bench_recommendation.py --sizes 10 1000 100000
+
+매 크기마다 두 방식의 점수/상위 3개가 완전히 같은지도 함께 확인한다.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import CatalogIndex, MemoryFeatures, score_item_with_memory  # noqa: E402
+
+TAGS = ["가성비", "배터리", "노이즈캔슬링", "편안함", "가벼움", "음질", "착용감", "통화품질",
+        "브랜드", "트렌디", "디자인", "고급", "여행", "균형 음질", "업무", "프리미엄", "무난한 음질"]
+COLORS = ["블랙", "화이트", "네이비", "퍼플", "블루", "핑크", "실버", "스페이스그레이", "골드"]
+
+MEMORY_SETS = {
+    "empty": [],
+    "design_first": [
+        "(가장 중요) 디자인/스타일을 최우선으로 고려하고 있어요.",
+        "색상은 화이트 계열을 선호해요.",
+        "예산은 약 30만 원 이내로 생각하고 있어요.",
+    ],
+    "value_noise": [
+        "가성비, 가격을 중요하게 생각하는 편이에요.",
+        "노이즈캔슬링 기능을 고려하고 있어요.",
+        "출퇴근 시 사용할 용도예요.",
+        "색상은 블랙 계열을 선호해요.",
+        "예산은 약 20만 원 이내로 생각하고 있어요.",
+    ],
+}
+
+
+def make_catalog(n, seed=0):
+    rnd = random.Random(seed)
+    return [
+        {
+            "name": f"item-{i}",
+            "price": rnd.randrange(50, 700) * 1000,
+            "rank": rnd.randrange(1, 200),
+            "tags": rnd.sample(TAGS, rnd.randrange(2, 6)),
+            "color": rnd.sample(COLORS, rnd.randrange(1, 4)),
+        }
+        for i in range(n)
+    ]
+
+
+def loop_top3(catalog, mems):
+    scored = [(score_item_with_memory(item, mems), item) for item in catalog]
+    scored.sort(key=lambda x: -x[0])
+    return [item for _, item in scored[:3]]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'items':>8} {'memory':>13} {'loop(ms)':>10} {'index(ms)':>10} {'build(ms)':>10} {'speedup':>8}")
+    for n in args.sizes:
+        catalog = make_catalog(n)
+        t0 = time.perf_counter()
+        index = CatalogIndex(catalog)
+        build = time.perf_counter() - t0
+
+        for label, mems in MEMORY_SETS.items():
+            features = MemoryFeatures(mems)
+
+            # 결과 일치 확인
+            expected = [score_item_with_memory(item, mems) for item in catalog]
+            assert index.scores(features).tolist() == expected, f"score mismatch ({n}, {label})"
+            assert index.top_k(features, 3) == loop_top3(catalog, mems), f"top-3 mismatch ({n}, {label})"
+
+            repeat = args.repeat if n <= 10000 else max(1, args.repeat // 2)
+            t_loop = best_of(lambda: loop_top3(catalog, mems), repeat)
+            t_index = best_of(lambda: index.top_k(MemoryFeatures(mems), 3), repeat)
+            print(
+                f"{n:>8} {label:>13} {t_loop * 1000:>10.3f} {t_index * 1000:>10.3f} "
+                f"{build * 1000:>10.1f} {t_loop / t_index:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+리뷰 검색 벤치마크: 글자 n-gram BM25 인덱스 색인 / mmap 로드 / 질의 지연 + 순수 파이썬 BM25와 결과 비교.
+
+    python benchmarks/bench_reviews.py --reviews 1000 10000 100000 --queries 500
+
+리뷰 본문은 문구 조각을 무작위로 이어 붙인 합성 텍스트 (속도/정확성 측정용, 실제 리뷰 아님).
+제품은 data/catalog.jsonl의 제품명을 사용하고, 리뷰는 제품별로 고르게 나눔.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reviews import B, K1, ReviewIndex, ngrams  # noqa: E402
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "catalog.jsonl")
+
+FRAGMENTS = [
+    "배터리가 오래 가요", "배터리 충전이 빨라요", "하루 종일 써도 배터리 걱정 없어요", "배터리가 생각보다 빨리 닳아요",
+    "노이즈캔슬링이 강해요", "지하철 소음이 잘 안 들려요", "노캔 성능은 무난해요", "화이트 노이즈가 조금 있어요",
+    "착용감이 편해요", "오래 쓰면 귀가 아파요", "무게가 가벼워요", "머리 압박이 좀 있어요",
+    "음질이 깔끔해요", "저음이 풍부해요", "고음이 살짝 날카로워요", "소리가 답답한 느낌이에요",
+    "통화 품질이 좋아요", "마이크가 아쉬워요", "디자인이 예뻐요", "마감이 조금 아쉬워요",
+    "가격 대비 만족해요", "케이스가 튼튼해요", "블루투스 연결이 안정적이에요", "앱 연동이 불편해요",
+]
+QUERIES = [
+    "부정적 리뷰는 뭐가 있어?", "배터리 성능은 어떨까?", "노이즈캔슬링 어때?", "착용감은 어때?",
+    "음질은 어때?", "통화 품질 괜찮아?", "오래 쓰면 귀 아파?", "지하철에서 소음 잘 막아줘?",
+]
+
+
+def product_names():
+    with open(CATALOG, encoding="utf-8") as f:
+        return [json.loads(line)["name"] for line in f if line.strip()]
+
+
+def make_reviews(n, rnd):
+    names = product_names()
+    return [
+        (names[i % len(names)], " ".join(rnd.sample(FRAGMENTS, rnd.randint(2, 5))) + ".", rnd.randint(1, 5))
+        for i in range(n)
+    ]
+
+
+def search_reference(reviews, product, query, k):
+    """순수 파이썬 BM25 (같은 n-gram / 같은 파라미터) — 점수 목록만 비교"""
+    docs = [Counter(ngrams(text)) for _, text, _ in reviews]
+    lengths = [sum(c.values()) for c in docs]
+    avgdl = sum(lengths) / len(docs)
+    df = Counter(g for c in docs for g in c)
+    n = len(docs)
+    scores = []
+    for (p, _, _), c, dl in zip(reviews, docs, lengths):
+        if p != product:
+            continue
+        s = 0.0
+        for g in set(ngrams(query)):
+            tf = c.get(g)
+            if tf:
+                idf = math.log(1.0 + (n - df[g] + 0.5) / (df[g] + 0.5))
+                s += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+        if s > 0:
+            scores.append(s)
+    return sorted(scores, reverse=True)[:k]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reviews", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--check", type=int, default=2000, help="이 개수 이하 코퍼스에서만 참조 구현과 비교")
+    args = parser.parse_args(argv)
+
+    names = product_names()
+    print(f"{'reviews':>8} {'build s':>8} {'load ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'max snippet chars':>18}  identical")
+    for n in args.reviews:
+        rnd = random.Random(n)
+        reviews = make_reviews(n, rnd)
+
+        started = time.perf_counter()
+        built = ReviewIndex.build(reviews)
+        build_s = time.perf_counter() - started
+        with tempfile.TemporaryDirectory() as tmp:
+            built.save(tmp)
+            started = time.perf_counter()
+            index = ReviewIndex.load(tmp)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            latencies, prompt_chars = [], 0
+            for _ in range(args.queries):
+                product, query = rnd.choice(names), rnd.choice(QUERIES)
+                t0 = time.perf_counter()
+                hits = index.search(product, query, k=args.k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                prompt_chars = max(prompt_chars, sum(len(r.snippet()) for r in hits))
+
+            identical = "skipped"
+            if n <= args.check:
+                identical = True
+                for p in names[:3]:
+                    for q in QUERIES:
+                        expected = search_reference(reviews, p, q, args.k)
+                        got = [r.score for r in index.search(p, q, k=args.k)]
+                        identical = identical and len(expected) == len(got) and all(
+                            abs(a - b) < 1e-3 for a, b in zip(expected, got)
+                        )
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{n:>8} {build_s:>8.2f} {load_ms:>8.1f} {statistics.median(latencies):>7.3f} {p99:>7.3f} "
+                  f"{prompt_chars:>18}  {identical}")
+            del index
+            if identical is False:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""
+콜드 스타트 벤치마크: 새 프로세스에서 app.py를 처음 실행해 context_setting 화면이 그려질 때까지의 시간.
+
+    python benchmarks/bench_startup.py --repeat 5 --target-ms 800
+    python benchmarks/bench_startup.py --importtime --top 15
+
+반복마다 새 파이썬 프로세스를 띄워 AppTest로 첫 run을 하고 다음을 측정:
+- streamlit: streamlit 자체 import (앱과 무관한 고정 비용, 참고용)
+- first_paint: AppTest.run() 한 번 = app.py 실행(모듈 import 포함) → context_setting_page 렌더 완료
+- process: 프로세스 시작부터 첫 화면까지 벽시계 시간
+첫 화면에서 import되면 안 되는 무거운 모듈(LAZY_MODULES)이 올라와 있으면 함께 표시.
+--target-ms를 주면 first_paint 중앙값이 넘었을 때 종료 코드 1 (회귀 게이트).
+--importtime은 -X importtime 출력 중 app.py 실행 구간만 잘라 최상위 패키지별로 합산해서 보여줌.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# context_setting 화면에는 필요 없는 패키지 (첫 사용 시점에 import 되어야 함)
+LAZY_MODULES = ("openai", "gspread", "google.oauth2", "pandas", "PIL", "httpx")
+
+MARKER = "--- app.py first run ---"
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+before = set(sys.modules)
+print(MARKER, file=sys.stderr, flush=True)
+at = AppTest.from_file(APP_PATH, default_timeout=60)
+t0 = time.perf_counter()
+at.run()
+t1 = time.perf_counter()
+assert not at.exception, at.exception
+assert at.session_state["page"] == "context_setting"
+loaded = sorted(m for m in LAZY_MODULES if m in sys.modules and m not in before)
+print(json.dumps({
+    "streamlit": (imported - started) * 1000,
+    "first_paint": (t1 - t0) * 1000,
+    "eager": loaded,
+}))
+"""
+
+
+def child_env(tmp):
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    # 실행 결과가 저장소 runtime/을 건드리지 않도록
+    env.update({
+        "SESSION_STORE": "off",
+        "EVENT_WAL_DIR": os.path.join(tmp, "wal"),
+        "TRACING": "0",
+        "METRICS_PORT": "0",
+        "SHEETS_STUB": env.get("SHEETS_STUB", "1"),
+    })
+    return env
+
+
+def run_once(importtime=False):
+    code = (
+        f"APP_PATH = {APP_PATH!r}\nMARKER = {MARKER!r}\nLAZY_MODULES = {LAZY_MODULES!r}\n" + CHILD
+    )
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        proc = subprocess.run(
+            cmd, env=child_env(tmp), cwd=os.path.dirname(APP_PATH),
+            capture_output=True, text=True, timeout=300,
+        )
+        wall = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process"] = wall
+    return result, proc.stderr
+
+
+def parse_importtime(stderr):
+    """MARKER 뒤(app.py 실행 중)의 -X importtime 줄만 최상위 패키지별 self 시간으로 합산"""
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    per_package = {}
+    top_level = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time: <self> | <cumulative> | <들여쓰기 = 중첩 깊이><모듈>"
+        self_part, cumulative_us, name = line.split("|", 2)
+        self_us = int(self_part.split(":")[1])
+        module = name[1:]
+        package = module.strip().split(".")[0]
+        per_package[package] = per_package.get(package, 0) + self_us
+        if not module.startswith(" "):
+            top_level.append((int(cumulative_us), module))
+    return per_package, top_level
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=0, help="first_paint 중앙값 상한 (0이면 검사 안 함)")
+    parser.add_argument("--importtime", action="store_true", help="app.py 실행 중 import 비용 분해")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    if args.importtime:
+        result, stderr = run_once(importtime=True)
+        per_package, top_level = parse_importtime(stderr)
+        print(f"first_paint {result['first_paint']:.0f} ms (-X importtime 오버헤드 포함)")
+        print(f"\n{'package':<28} {'self ms':>9}")
+        for name, us in sorted(per_package.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"{name:<28} {us / 1000:>9.1f}")
+        print(f"\n{'top-level import':<28} {'cumulative ms':>14}")
+        for us, name in sorted(top_level, reverse=True)[:args.top]:
+            print(f"{name:<28} {us / 1000:>14.1f}")
+        return 0
+
+    runs = [run_once()[0] for _ in range(args.repeat)]
+    print(f"{'':<12} {'median ms':>10} {'min':>8} {'max':>8}")
+    for key in ("streamlit", "first_paint", "process"):
+        values = [r[key] for r in runs]
+        print(f"{key:<12} {statistics.median(values):>10.0f} {min(values):>8.0f} {max(values):>8.0f}")
+    eager = sorted({m for r in runs for m in r["eager"]})
+    print("eager heavy imports:", ", ".join(eager) if eager else "none")
+
+    first_paint = statistics.median(r["first_paint"] for r in runs)
+    if args.target_ms and first_paint > args.target_ms:
+        print(f"FAIL first_paint {first_paint:.0f} ms > target {args.target_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,274 @@
+"""
+부하 테스트: 가상 참가자 N명이 동시에 context_setting → 대화 → 추천 → 상세 질문 → 구매 결정까지 진행.
+
+    python benchmarks/loadtest.py --concurrency 1 4 8 16 --llm-latency 0.3 --sheets-latency 0.2
+
+Streamlit AppTest로 app.py를 헤드리스 실행하고, OpenAI / gspread는 지연을 설정할 수 있는 스텁
+(LLM_STUB=1, SHEETS_STUB=1)으로 바꿔서 돌린다. --cassette를 주면 녹화된 LLM 응답/지연을 재생
+(LLM_CASSETTE_MODE=replay, 카세트에 없는 요청은 고정 응답). 동시 접속 수 단계별로
+턴 지연 퍼센타일, 처리량, 세션당 메모리를 출력. --max-p90을 주면 넘었을 때 종료 코드 1 (회귀 게이트).
+
+AppTest는 실행할 때마다 전역 Runtime을 바꿔 끼우기 때문에 한 프로세스에서 동시에 돌릴 수 없음.
+그래서 참가자 한 명 = 프로세스 하나로 띄우고, 모두 첫 화면을 띄운 뒤 barrier에서 동시에 출발시킨다.
+(호스트 CPU/IO 경합은 반영되지만, 한 Streamlit 프로세스 안의 GIL 경합은 반영되지 않음)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# 참가자 대본 (대화창에 입력하는 문장들 — 마지막 detail 문장은 상품 상세 단계에서 사용)
+SCRIPTS = [
+    {
+        "style": "가성비 우선형", "color": "블랙",
+        "chat": ["출퇴근할 때 지하철에서 쓸 거예요", "예산 20만원", "노이즈캔슬링 중요해요", "추천해줘"],
+        "detail": "배터리는 얼마나 가요?",
+    },
+    {
+        "style": "디자인/스타일 우선형", "color": "화이트",
+        "chat": ["주로 음악 감상할 때 쓸 거예요", "화이트 색상이 좋아요", "예산은 30만원 정도", "추천해줘"],
+        "detail": "착용감은 어때요?",
+    },
+    {
+        "style": "성능·스펙 우선형", "color": "네이비",
+        "chat": ["운동할 때 쓰려고요", "가벼운 게 좋아요", "예산 15만원 이내", "노이즈캔슬링 있으면 좋겠어요", "추천해줘"],
+        "detail": "통화 품질은 괜찮나요?",
+    },
+]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def rss_bytes():
+    """현재 프로세스 RSS (리눅스 /proc 기준, 없으면 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class SimulatedUser:
+    """AppTest 하나 = 참가자 한 명. 단계별 조작 시간을 기록"""
+
+    def __init__(self, user_id, script, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.user_id = user_id
+        self.script = script
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.turn_latencies = []     # 채팅 입력 → 응답까지
+        self.action_latencies = []   # 버튼 클릭 (추천 / 상세 / 구매)
+        self.error = None
+        self.final_stage = None
+
+    def _run(self, bucket):
+        started = time.perf_counter()
+        self.at.run()
+        bucket.append(time.perf_counter() - started)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _click(self, predicate, bucket):
+        for b in self.at.button:
+            if predicate(b.label):
+                b.click()
+                self._run(bucket)
+                return True
+        return False
+
+    def _say(self, text):
+        self.at.text_input(key="user_input_text").input(text)
+        if not self._click(lambda label: label == "전송", self.turn_latencies):
+            raise RuntimeError("chat form not found")
+
+    def start(self):
+        """첫 화면 로드 (import / 캐시 초기화 비용은 측정에서 제외)"""
+        self.at.run()
+
+    def run(self):
+        try:
+            at = self.at
+            at.text_input[0].input(f"참가자{self.user_id}")
+            at.text_input[1].input(f"{self.user_id % 10000:04d}")
+            at.selectbox[0].select(self.script["style"])
+            at.selectbox[1].select(self.script["color"])
+            self._click(lambda label: label.startswith("쇼핑 시작하기"), self.action_latencies)
+
+            for text in self.script["chat"]:
+                self._say(text)
+                if at.session_state["stage"] == "summary":
+                    break
+            if at.session_state["stage"] != "summary":
+                # 대본이 끝났는데 요약 단계가 아니면 예산을 채워서 마무리
+                self._say("예산 20만원")
+                self._say("추천해줘")
+
+            self._click(lambda label: "추천 받기" in label, self.action_latencies)
+            self._click(lambda label: label.startswith("자세히"), self.action_latencies)
+            self._say(self.script["detail"])
+            self._click(lambda label: "구매하러" in label, self.action_latencies)
+            self.final_stage = at.session_state["stage"]
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def state_bytes(self):
+        """세션 상태를 JSON으로 직렬화한 크기 (세션 저장소에 들어가는 양과 비슷)"""
+        state = {}
+        for key in ("messages", "memory", "logs", "turn_timings", "recommended_products", "question_history"):
+            try:
+                state[key] = self.at.session_state[key]
+            except KeyError:
+                continue
+        return len(json.dumps(state, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _user_process(user_id, timeout, barrier, results):
+    """참가자 한 명을 실행하는 자식 프로세스"""
+    # WAL 세그먼트는 프로세스 하나가 독점한다고 가정하므로 참가자마다 따로
+    os.environ["EVENT_WAL_DIR"] = os.path.join(os.environ["EVENT_WAL_DIR"], f"user-{user_id}")
+    user = SimulatedUser(user_id, SCRIPTS[user_id % len(SCRIPTS)], timeout)
+    try:
+        user.start()
+    except Exception as e:
+        user.error = f"{type(e).__name__}: {e}"
+    rss_before = rss_bytes()
+    barrier.wait()
+
+    started = time.time()
+    if user.error is None:
+        user.run()
+    finished = time.time()
+
+    results.put({
+        "user_id": user_id,
+        "started": started,
+        "finished": finished,
+        "turns": user.turn_latencies,
+        "actions": user.action_latencies,
+        "error": user.error,
+        "final_stage": user.final_stage,
+        "rss_delta": max(0, rss_bytes() - rss_before),
+        "state_bytes": user.state_bytes() if user.error is None else 0,
+    })
+
+
+def run_level(concurrency, timeout):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(concurrency)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_user_process, args=(i, timeout, barrier, results), name=f"sim-user-{i}")
+        for i in range(concurrency)
+    ]
+    for p in procs:
+        p.start()
+    users = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    elapsed = max(u["finished"] for u in users) - min(u["started"] for u in users)
+    turns = [x for u in users for x in u["turns"]]
+    actions = [x for u in users for x in u["actions"]]
+    completed = [u for u in users if u["error"] is None and u["final_stage"] == "purchase_decision"]
+    return {
+        "concurrency": concurrency,
+        "sessions": len(users),
+        "completed": len(completed),
+        "errors": [u["error"] for u in users if u["error"]],
+        "elapsed_s": elapsed,
+        "turns": len(turns),
+        "turn_p50": percentile(turns, 0.5),
+        "turn_p90": percentile(turns, 0.9),
+        "turn_p99": percentile(turns, 0.99),
+        "action_p50": percentile(actions, 0.5),
+        "action_p90": percentile(actions, 0.9),
+        "turns_per_s": len(turns) / elapsed if elapsed else 0.0,
+        "sessions_per_min": len(completed) / elapsed * 60 if elapsed else 0.0,
+        "rss_per_session_kb": statistics.mean(u["rss_delta"] for u in users) / 1024,
+        "state_per_session_kb": statistics.mean(u["state_bytes"] for u in users) / 1024,
+    }
+
+
+def configure_env(args, workdir):
+    """app.py가 읽는 환경 변수로 스텁/지연/로컬 저장 경로 설정 (AppTest는 같은 프로세스에서 실행)"""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-loadtest")
+    os.environ["LLM_STUB"] = "1"
+    os.environ["LLM_STUB_LATENCY"] = str(args.llm_latency)
+    os.environ["LLM_STUB_JITTER"] = str(args.llm_jitter)
+    os.environ["LLM_STUB_TOKEN_INTERVAL"] = str(args.token_interval)
+    if args.cassette:
+        os.environ["LLM_CASSETTE_MODE"] = "replay"
+        os.environ["LLM_CASSETTE"] = os.path.abspath(args.cassette)
+        os.environ["LLM_REPLAY_STRICT"] = "0"
+        os.environ["LLM_REPLAY_LATENCY"] = args.replay_latency
+    os.environ["SHEETS_STUB"] = "1"
+    os.environ["SHEETS_STUB_LATENCY"] = str(args.sheets_latency)
+    os.environ["EVENT_WAL_DIR"] = os.path.join(workdir, "wal")
+    os.environ["TELEMETRY_FILE"] = os.path.join(workdir, "telemetry.jsonl")
+    os.environ["SESSION_STORE"] = args.session_store
+    os.environ["SESSION_STORE_PATH"] = os.path.join(
+        workdir, "sessions.sqlite3" if args.session_store == "sqlite" else "sessions"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="LLM 응답 첫 토큰까지 지연(초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="LLM 지연에 더할 균등 분포 폭(초)")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="스트리밍 chunk 간격(초)")
+    parser.add_argument("--cassette", help="재생할 LLM 카세트 (app.py를 LLM_CASSETTE_MODE=record로 실행해서 녹화)")
+    parser.add_argument("--replay-latency", default="recorded", choices=["recorded", "fixed"],
+                        help="카세트 재생 지연: 녹화값 샘플링 / --llm-latency 고정")
+    parser.add_argument("--sheets-latency", type=float, default=0.2, help="Sheets append_rows 지연(초)")
+    parser.add_argument("--session-store", default="sqlite", choices=["sqlite", "file", "off"])
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest rerun 하나의 제한 시간(초)")
+    parser.add_argument("--json", help="결과를 JSON으로도 저장")
+    parser.add_argument("--max-p90", type=float, help="턴 지연 p90이 이 값(초)을 넘으면 실패")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="shopping-loadtest-")
+    configure_env(args, workdir)
+
+    print(f"{'users':>5} {'done':>5} {'turn p50':>9} {'p90':>7} {'p99':>7} {'action p90':>11} "
+          f"{'turns/s':>8} {'sess/min':>9} {'rss/sess(KB)':>13} {'state(KB)':>10}")
+    results = []
+    for c in args.concurrency:
+        r = run_level(c, args.timeout)
+        results.append(r)
+        print(
+            f"{r['concurrency']:>5} {r['completed']:>5} {r['turn_p50']:>9.3f} {r['turn_p90']:>7.3f} "
+            f"{r['turn_p99']:>7.3f} {r['action_p90']:>11.3f} {r['turns_per_s']:>8.2f} "
+            f"{r['sessions_per_min']:>9.1f} {r['rss_per_session_kb']:>13.0f} {r['state_per_session_kb']:>10.1f}"
+        )
+        for err in r["errors"][:3]:
+            print(f"      error: {err}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = any(r["errors"] for r in results)
+    if args.max_p90 is not None and any(r["turn_p90"] > args.max_p90 for r in results):
+        print(f"turn p90 exceeded {args.max_p90}s", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+import json
+import os
+import random
+import threading
+import time
+
+from llm_cache import LLMCache
+
+
+# ======================================================
+# chat.completions 녹화 / 재생 (JSONL 카세트)
+# ======================================================
+class CassetteMiss(LookupError):
+    """재생 모드에서 카세트에 없는 요청이 들어왔을 때"""
+
+
+class Cassette:
+    """
+    요청/응답 쌍을 한 줄씩 저장하는 JSONL 파일.
+    - 키는 LLMCache.make_key와 같음 (model, temperature, 공백 정규화된 messages)
+    - 같은 키가 여러 번 녹화돼 있으면 녹화된 순서대로 돌려주고, 끝나면 마지막 것을 반복
+    - latency(요청 ~ 첫 토큰)와 duration(요청 ~ 응답 끝)도 함께 기록 → 재생 지연 샘플링에 사용
+    - strict=False 재생에서 카세트에 없던 요청은 misses로 세고, 처음 MISS_SAMPLES개만 발화 앞부분을 남김
+    """
+
+    MISS_SAMPLES = 20
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}      # key → [entry, ...]
+        self._cursor = {}       # key → 다음에 돌려줄 index
+        self._fh = None
+        self.misses = 0
+        self.miss_samples = []  # (model, 마지막 메시지 앞부분)
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue    # 녹화 중 끊긴 마지막 줄
+                self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(v) for v in self._entries.values())
+
+    # --------------------------------------------------
+    # 녹화
+    # --------------------------------------------------
+    def record(self, model, messages, temperature, content, usage=None, latency=None, duration=None, stream=False,
+               partial=False):
+        entry = {
+            "key": LLMCache.make_key(model, messages, temperature),
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "stream": stream,
+            "partial": partial,
+            "content": content,
+            "usage": usage or {},
+            "latency": latency,
+            "duration": duration,
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            if self._fh is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+        return entry
+
+    # --------------------------------------------------
+    # 재생
+    # --------------------------------------------------
+    def lookup(self, model, messages, temperature):
+        key = LLMCache.make_key(model, messages, temperature)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(key)
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = min(i + 1, len(entries) - 1)
+            return entries[i]
+
+    def rewind(self):
+        with self._lock:
+            self._cursor.clear()
+
+    def responder(self, strict=True, fallback=None):
+        """
+        StubOpenAI(responder=...)에 넘기는 함수.
+        strict=False면 카세트에 없는 요청은 fallback(messages, **kwargs)으로 응답 (없으면 CassetteMiss)
+        """
+
+        def respond(messages, model=None, temperature=None, **kwargs):
+            try:
+                entry = self.lookup(model, messages, temperature)
+            except CassetteMiss:
+                if strict or fallback is None:
+                    raise
+                self._count_miss(model, messages)
+                return fallback(messages, model=model, temperature=temperature, **kwargs)
+            return {"content": entry["content"], "usage": entry.get("usage")}
+
+        return respond
+
+    def _count_miss(self, model, messages):
+        with self._lock:
+            self.misses += 1
+            if len(self.miss_samples) < self.MISS_SAMPLES:
+                last = " ".join((messages[-1].get("content") or "").split()) if messages else ""
+                self.miss_samples.append((model, last[:60]))
+
+    def latencies(self):
+        with self._lock:
+            return [
+                e["latency"]
+                for entries in self._entries.values()
+                for e in entries
+                if isinstance(e.get("latency"), (int, float)) and not e.get("partial")
+            ]
+
+    def latency_sampler(self, seed=None):
+        """녹화된 첫 토큰 지연 중 하나를 무작위로 뽑는 함수 (stubs.Latency(sampler=...)용)"""
+        values = self.latencies()
+        if not values:
+            raise ValueError(f"{self.path}: 녹화된 지연 값이 없음")
+        rnd = random.Random(seed)
+        lock = threading.Lock()
+
+        def sample():
+            with lock:
+                return rnd.choice(values)
+
+        return sample
+
+
+# ======================================================
+# 녹화용 클라이언트 (실제 OpenAI 클라이언트를 감쌈)
+# ======================================================
+class _Namespace:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def _usage_dict(usage):
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+    }
+
+
+class _RecordingStream:
+    """
+    스트리밍 응답을 그대로 흘려보내면서 내용을 모았다가 카세트에 기록.
+    끝까지 읽기 전에 close된 응답(추측 실행 후 버려진 답변 등)도 그때까지 받은 내용으로 기록 → 재생 때도 같은 요청이 나옴
+    """
+
+    def __init__(self, stream, on_done, started):
+        self._stream = stream
+        self._on_done = on_done
+        self._started = started
+        self._parts = []
+        self._usage = None
+        self._first = None
+        self._recorded = False
+
+    def __iter__(self):
+        for chunk in self._stream:
+            if getattr(chunk, "usage", None) is not None:
+                self._usage = chunk.usage
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if self._first is None:
+                        self._first = time.perf_counter() - self._started
+                    self._parts.append(delta)
+            yield chunk
+        self._record(partial=False)
+
+    def _record(self, partial):
+        if self._recorded:
+            return
+        self._recorded = True
+        duration = time.perf_counter() - self._started
+        self._on_done(
+            "".join(self._parts), self._usage, self._first if self._first is not None else duration, duration, partial
+        )
+
+    def close(self):
+        self._record(partial=True)
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class RecordingOpenAI:
+    """
+    OpenAI 클라이언트를 감싸서 chat.completions.create 요청/응답을 카세트에 녹화
+    """
+
+    def __init__(self, inner, cassette):
+        self.inner = inner
+        self.cassette = cassette
+        self.chat = _Namespace(completions=_Namespace(create=self.create))
+
+    def create(self, model, messages, temperature=None, stream=False, **kwargs):
+        started = time.perf_counter()
+        res = self.inner.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, stream=stream, **kwargs
+        )
+
+        def done(content, usage, latency, duration, partial=False):
+            try:
+                self.cassette.record(
+                    model, messages, temperature, content,
+                    usage=_usage_dict(usage), latency=latency, duration=duration, stream=stream, partial=partial,
+                )
+            except OSError as e:
+                print("Cassette Error:", e)
+
+        if stream:
+            return _RecordingStream(res, done, started)
+        elapsed = time.perf_counter() - started
+        done(res.choices[0].message.content, getattr(res, "usage", None), elapsed, elapsed)
+        return res
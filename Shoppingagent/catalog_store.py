@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from recommender import CatalogIndex
+
+
+# ======================================================
+# 외부 카탈로그 로더 (CSV / JSONL / Parquet) + 핫 리로드
+# Parquet은 pyarrow가 있을 때만 (requirements.txt에 없는 선택 의존성)
+# ======================================================
+REQUIRED_COLUMNS = {
+    "name": "str",
+    "brand": "str",
+    "price": "int",
+    "rating": "float",
+    "reviews": "int",
+    "rank": "int",
+    "tags": "list",
+    "review_one": "str",
+    "color": "list",
+    "img": "str",
+}
+
+# CSV에서는 리스트 컬럼을 "노이즈캔슬링|배터리" 처럼 | 로 구분
+CSV_LIST_SEP = "|"
+
+
+class CatalogError(ValueError):
+    """카탈로그 파일 형식/스키마 오류"""
+
+
+def _to_list(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    if hasattr(value, "tolist"):          # parquet list 컬럼 (numpy array)
+        return [str(v) for v in value.tolist()]
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    text = str(value).strip()
+    if text.startswith("["):
+        return [str(v) for v in json.loads(text)]
+    return [v.strip() for v in text.split(CSV_LIST_SEP) if v.strip()]
+
+
+def read_catalog_frame(path):
+    """파일 확장자에 맞게 읽어서 스키마 검증까지 끝낸 DataFrame 반환 (.parquet은 pyarrow 필요)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        df = pd.read_csv(path, dtype={"name": str, "brand": str, "review_one": str, "img": str})
+    elif ext in (".jsonl", ".ndjson"):
+        df = pd.read_json(path, lines=True, dtype=False)
+    elif ext == ".parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise CatalogError(f"Parquet 카탈로그에는 pyarrow가 필요합니다 (pip install pyarrow): {path}")
+        df = pd.read_parquet(path)
+    else:
+        raise CatalogError(f"지원하지 않는 카탈로그 형식: {path}")
+    return validate_catalog_frame(df)
+
+
+def validate_catalog_frame(df):
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise CatalogError(f"카탈로그에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+    if df.empty:
+        raise CatalogError("카탈로그가 비어 있습니다.")
+
+    df = df.copy()
+    for col, kind in REQUIRED_COLUMNS.items():
+        try:
+            if kind == "list":
+                df[col] = df[col].map(_to_list)
+            elif kind == "int":
+                df[col] = pd.to_numeric(df[col], errors="raise").astype("int64")
+            elif kind == "float":
+                df[col] = pd.to_numeric(df[col], errors="raise").astype("float64")
+            else:
+                if df[col].isna().any():
+                    raise ValueError("빈 값이 있습니다")
+                df[col] = df[col].astype(str)
+        except (ValueError, TypeError) as e:
+            raise CatalogError(f"'{col}' 컬럼 형식 오류: {e}") from e
+
+    dup = df["name"][df["name"].duplicated()].tolist()
+    if dup:
+        raise CatalogError(f"중복된 제품명이 있습니다: {', '.join(dup)}")
+    return df.reset_index(drop=True)
+
+
+class CatalogSnapshot:
+    """
+    한 시점의 카탈로그 (읽기 전용). 리로드 시에는 새 스냅샷을 만들어 통째로 교체.
+    - frame: 컬럼형 DataFrame
+    - items: 기존 코드가 쓰던 dict 리스트
+    - index: 추천 점수용 CatalogIndex
+    """
+
+    def __init__(self, frame, path=None, mtime=None):
+        self.frame = frame
+        self.path = path
+        self.mtime = mtime
+        self.items = frame.to_dict("records")
+        self.by_name = {it["name"]: it for it in self.items}
+        self.index = CatalogIndex(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, name, default=None):
+        return self.by_name.get(name, default)
+
+
+class CatalogStore:
+    """
+    카탈로그 파일을 한 번 읽어 스냅샷으로 캐시하고, 파일 mtime이 바뀌면 새로 읽어서 교체.
+    mtime 확인은 check_interval 초에 한 번만 하므로 rerun 비용은 카탈로그 크기와 무관.
+    리로드가 실패하면 기존 스냅샷을 그대로 사용.
+    """
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._failed_mtime = None
+        self._snapshot = self._load()
+
+    def _load(self):
+        mtime = os.path.getmtime(self.path)
+        return CatalogSnapshot(read_catalog_frame(self.path), path=self.path, mtime=mtime)
+
+    def get(self):
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._maybe_reload(now)
+        return self._snapshot
+
+    def _maybe_reload(self, now):
+        # 다른 세션이 이미 확인 중이면 기다리지 않고 현재 스냅샷 사용
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                print("Catalog Error:", e)
+                return
+            if mtime in (self._snapshot.mtime, self._failed_mtime):
+                return
+            try:
+                self._snapshot = self._load()     # 참조 교체 (원자적)
+            except Exception as e:
+                self._failed_mtime = mtime
+                print("Catalog Error:", e)
+        finally:
+            self._lock.release()
@@ -0,0 +1,63 @@
+import html
+
+
+# ======================================================
+# 채팅 말풍선 HTML 렌더링 (증분 캐시)
+# ======================================================
+def bubble_html(role, content, cursor=""):
+    """메시지 하나 → 말풍선 div (기존 render_chat과 같은 마크업)"""
+    safe = html.escape(content).replace("\n", "<br>")
+    cls = "chat-bubble-ai" if role == "assistant" else "chat-bubble-user"
+    return f"<div class='chat-bubble {cls}'>{safe}{cursor}</div>"
+
+
+class TranscriptRenderer:
+    """
+    메시지별 HTML 조각을 (인덱스, role, content 해시) 기준으로 캐시.
+    rerun 때는 새로 추가된 메시지만 escape/렌더링하고, 이어붙인 본문 문자열도 재사용.
+    중간 메시지가 바뀌면 그 위치부터 다시 렌더링.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._fragments = []
+        self._body = ""          # 전체 조각을 이어붙인 문자열
+        self.rendered = 0        # 누적 렌더링한 조각 수 (벤치마크/디버그용)
+
+    def _sync(self, messages):
+        n_cached = len(self._keys)
+        i = 0
+        # 앞에서부터 캐시와 같은 구간은 그대로 사용
+        while i < n_cached and i < len(messages):
+            msg = messages[i]
+            if self._keys[i] != (msg["role"], hash(msg["content"])):
+                break
+            i += 1
+
+        if i < n_cached:
+            del self._keys[i:]
+            del self._fragments[i:]
+            self._body = "".join(self._fragments)
+
+        if i < len(messages):
+            new = []
+            for msg in messages[i:]:
+                self._keys.append((msg["role"], hash(msg["content"])))
+                new.append(bubble_html(msg["role"], msg["content"]))
+            self._fragments.extend(new)
+            self._body += "".join(new)
+            self.rendered += len(new)
+
+    def render(self, messages, extra=(), window=None):
+        """
+        채팅창 전체 HTML.
+        - extra: 뒤에 덧붙일 (role, content, cursor) 말풍선 (요약, 스트리밍 중인 응답 등 — 캐시하지 않음)
+        - window: 최근 window개 메시지만 그림 (None이면 전체)
+        """
+        self._sync(messages)
+        if window is None or window >= len(self._fragments):
+            body = self._body
+        else:
+            body = "".join(self._fragments[len(self._fragments) - window:])
+        tail = "".join(bubble_html(role, content, cursor) for role, content, cursor in extra)
+        return f"<div class='chat-display-area'>{body}{tail}</div>"
@@ -0,0 +1,330 @@
+import argparse
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+
+# ======================================================
+# 이벤트 로그 로컬 WAL (append-only JSONL 세그먼트)
+# ======================================================
+def event_key(session_id, seq):
+    """(session_id, seq) → 멱등 전송에 쓰는 키 문자열"""
+    return f"{session_id}\t{seq}"
+
+
+class EventWAL:
+    """
+    log_event가 만든 entry를 Sheets 전송 전에 먼저 로컬 세그먼트 파일에 기록.
+    - segment-000001.jsonl 형식, max_segment_bytes 넘으면 다음 세그먼트로 회전
+    - 매 줄은 OS 버퍼까지 flush, fsync는 fsync_every 줄 / fsync_interval 초 단위로 묶어서
+    - 전송 완료된 키는 sent.keys에 append → replay/compact에서 사용
+    - 세그먼트는 첫 append 때 새로 열기 때문에, 이 프로세스 시작 전 세그먼트는 모두 '닫힌' 상태
+      (stats / compact / replay처럼 기록하지 않는 실행은 빈 세그먼트를 남기지 않음)
+    """
+
+    SEGMENT_GLOB = "segment-*.jsonl"
+    SENT_FILE = "sent.keys"
+
+    def __init__(self, directory, max_segment_bytes=8 * 1024 * 1024, fsync_every=20, fsync_interval=1.0):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._closed_segments = self.segments()
+        self._fh = None
+        self._segment_path = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sent_fh = open(os.path.join(directory, self.SENT_FILE), "a", encoding="utf-8")
+
+        self._stop = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, name="event-wal-sync", daemon=True)
+        self._syncer.start()
+        atexit.register(self.close)
+
+    # --------------------------------------------------
+    # 세그먼트 관리
+    # --------------------------------------------------
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, self.SEGMENT_GLOB)))
+
+    def closed_segments(self):
+        """이 프로세스 시작 전부터 있던 세그먼트 (replay 대상)"""
+        return list(self._closed_segments)
+
+    def _open_next_segment(self):
+        existing = self.segments()
+        last = int(os.path.basename(existing[-1])[8:14]) if existing else 0
+        path = os.path.join(self.directory, f"segment-{last + 1:06d}.jsonl")
+        if self._fh:
+            self._fsync_locked()
+            self._fh.close()
+            self._closed_segments.append(self._segment_path)
+        self._fh = open(path, "a", encoding="utf-8")
+        self._segment_path = path
+
+    # --------------------------------------------------
+    # 기록
+    # --------------------------------------------------
+    def append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self._open_next_segment()
+            self._fh.write(line)
+            self._fh.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self._fsync_locked()
+            if self._fh.tell() >= self.max_segment_bytes:
+                self._open_next_segment()
+
+    def mark_sent(self, keys):
+        """Sheets 전송이 끝난 (session_id, seq) 키 기록"""
+        if not keys:
+            return
+        with self._lock:
+            self._sent_fh.write("".join(k + "\n" for k in keys))
+            self._sent_fh.flush()
+
+    def sync(self):
+        with self._lock:
+            self._fsync_locked()
+
+    def _fsync_locked(self):
+        if self._unsynced and self._fh is not None:
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                if self._unsynced and time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self._fsync_locked()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        with self._lock:
+            self._fsync_locked()
+            if self._fh is not None:
+                self._fh.close()
+            self._sent_fh.flush()
+            os.fsync(self._sent_fh.fileno())
+            self._sent_fh.close()
+
+    # --------------------------------------------------
+    # 읽기 / 정리
+    # --------------------------------------------------
+    def sent_keys(self):
+        path = os.path.join(self.directory, self.SENT_FILE)
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+
+    def compact(self):
+        """
+        모든 키가 전송 완료된 닫힌 세그먼트를 삭제하고,
+        sent.keys도 남은 세그먼트에 해당하는 키만 남도록 다시 씀.
+        """
+        sent = self.sent_keys()
+        removed = []
+        keep_keys = set()
+
+        for path in self.closed_segments():
+            keys = {event_key(e.get("session_id"), e.get("seq")) for e in read_segment(path)}
+            if keys <= sent:
+                os.remove(path)
+                removed.append(path)
+            else:
+                keep_keys |= keys & sent
+
+        with self._lock:
+            # 현재 세그먼트에서 이미 보낸 키도 유지
+            for e in read_segment(self._segment_path):
+                k = event_key(e.get("session_id"), e.get("seq"))
+                if k in sent:
+                    keep_keys.add(k)
+
+            self._closed_segments = [p for p in self._closed_segments if p not in removed]
+            sent_path = os.path.join(self.directory, self.SENT_FILE)
+            tmp = sent_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("".join(k + "\n" for k in sorted(keep_keys)))
+                f.flush()
+                os.fsync(f.fileno())
+            self._sent_fh.close()
+            os.replace(tmp, sent_path)
+            self._sent_fh = open(sent_path, "a", encoding="utf-8")
+
+        return removed
+
+
+def read_segment(path):
+    """세그먼트 파일의 entry들을 순서대로 반환 (크래시로 잘린 마지막 줄은 무시)"""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def entry_to_row(entry):
+    """entry dict → B_raw row (log_event와 같은 컬럼 순서)"""
+    return list(entry.values())
+
+
+def sheet_keys(worksheet):
+    """이미 시트에 들어간 (session_id, seq) 키 — 2번째 컬럼과 마지막 컬럼 기준"""
+    keys = set()
+    for row in worksheet.get_all_values():
+        if len(row) >= 2:
+            keys.add(event_key(row[1], row[-1]))
+    return keys
+
+
+# ======================================================
+# Replay / Backfill
+# ======================================================
+def replay(segments, append_rows, sheet="B_raw", skip_keys=None, on_sent=None, batch_size=200):
+    """
+    세그먼트의 entry 중 skip_keys에 없는 것만 sheet로 전송.
+    on_sent(keys)는 배치 전송이 끝날 때마다 호출 (WAL.mark_sent 연결용).
+    """
+    skip = set(skip_keys or ())
+    sent_count = 0
+    batch, batch_keys = [], []
+
+    def flush():
+        nonlocal sent_count, batch, batch_keys
+        if not batch:
+            return
+        append_rows(sheet, batch)
+        if on_sent:
+            on_sent(batch_keys)
+        skip.update(batch_keys)
+        sent_count += len(batch)
+        batch, batch_keys = [], []
+
+    for path in segments:
+        for entry in read_segment(path):
+            key = event_key(entry.get("session_id"), entry.get("seq"))
+            if key in skip or key in batch_keys:
+                continue
+            batch.append(entry_to_row(entry))
+            batch_keys.append(key)
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    return sent_count
+
+
+def replay_unsent(wal, sheets, sheet="B_raw", check_sheet=False):
+    """
+    이전 프로세스가 남긴 닫힌 세그먼트 중 sent.keys에 없는 이벤트만 재전송 후 compact.
+    check_sheet=True면 보낼 게 있을 때 시트 전체를 읽어서 이미 들어간 키도 건너뜀
+    (전송과 sent.keys 기록 사이에 죽은 경우의 중복까지 막지만, 시트가 커질수록 느림).
+    """
+    sent = wal.sent_keys()
+    segments = wal.closed_segments()
+    unsent = {
+        key
+        for path in segments
+        for key in (event_key(e.get("session_id"), e.get("seq")) for e in read_segment(path))
+        if key not in sent
+    }
+    n = 0
+    if unsent:
+        existing = set()
+        if check_sheet:
+            existing = sheet_keys(sheets.worksheet(sheet))
+            # 시트에는 이미 들어갔는데 sent.keys 기록 전에 죽은 경우 → 전송 완료로만 표시
+            wal.mark_sent(sorted(unsent & existing))
+        n = replay(segments, sheets.append_rows, sheet=sheet, skip_keys=sent | existing, on_sent=wal.mark_sent)
+    wal.compact()
+    return n
+
+
+def _cli_sheets(args):
+    from google.oauth2.service_account import Credentials
+    import gspread
+    from sheets_client import SheetsClient
+
+    def factory():
+        creds = Credentials.from_service_account_file(
+            args.credentials,
+            scopes=[
+                "https://www.googleapis.com/auth/spreadsheets",
+                "https://www.googleapis.com/auth/drive",
+            ],
+        )
+        return gspread.authorize(creds)
+
+    return SheetsClient(factory, spreadsheet=args.spreadsheet)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="이벤트 로그 WAL 관리 도구")
+    parser.add_argument("command", choices=["stats", "replay", "backfill", "compact"])
+    parser.add_argument("--dir", required=True, help="WAL 디렉터리")
+    parser.add_argument("--credentials", help="서비스 계정 JSON 파일 (replay/backfill)")
+    parser.add_argument("--spreadsheet", default="shopping_logs")
+    parser.add_argument("--sheet", default="B_raw")
+    parser.add_argument("--check-sheet", action="store_true",
+                        help="replay 전에 시트 전체를 읽어 이미 들어간 이벤트도 건너뜀")
+    args = parser.parse_args(argv)
+
+    segments = sorted(glob.glob(os.path.join(args.dir, EventWAL.SEGMENT_GLOB)))
+    sent_path = os.path.join(args.dir, EventWAL.SENT_FILE)
+
+    if args.command == "stats":
+        sent = set()
+        if os.path.exists(sent_path):
+            with open(sent_path, encoding="utf-8") as f:
+                sent = {line.rstrip("\n") for line in f if line.strip()}
+        keys = [event_key(e.get("session_id"), e.get("seq")) for p in segments for e in read_segment(p)]
+        unsent = sum(1 for k in keys if k not in sent)
+        print(f"segments={len(segments)} events={len(keys)} unsent={unsent}")
+        return 0
+
+    if args.command == "compact":
+        wal = EventWAL(args.dir)
+        removed = wal.compact()
+        wal.close()
+        print(f"removed {len(removed)} segment(s)")
+        return 0
+
+    if not args.credentials:
+        parser.error("--credentials is required for replay/backfill")
+    sheets = _cli_sheets(args)
+
+    if args.command == "replay":
+        # 실행 중인 앱과 같은 디렉터리에는 쓰지 말 것 (앱은 시작 시 자동 replay)
+        wal = EventWAL(args.dir)
+        n = replay_unsent(wal, sheets, sheet=args.sheet, check_sheet=args.check_sheet)
+        wal.close()
+    else:
+        # backfill: 새 시트에 세그먼트 전체를 다시 채움 (시트에 이미 있는 키만 건너뜀)
+        existing = sheet_keys(sheets.worksheet(args.sheet))
+        n = replay(segments, sheets.append_rows, sheet=args.sheet, skip_keys=existing)
+
+    print(f"sent {n} event(s) to {args.spreadsheet}/{args.sheet}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
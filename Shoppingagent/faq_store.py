@@ -0,0 +1,322 @@
+"""
+product_detail 단계 FAQ 답변 저장소.
+
+제품 × 질문 의도(FAQ_INTENTS)별 답변을 오프라인에서 미리 만들어 JSONL로 저장하고,
+앱은 사용자 질문의 의도가 확실할 때만 저장된 답변을 바로 보여준다 (나머지는 기존처럼 LLM 호출).
+
+    python faq_store.py --out runtime/faq_answers.jsonl      # OpenAI로 생성 (OPENAI_API_KEY 필요)
+    python faq_store.py --out /tmp/faq.jsonl --stub           # 스텁 응답으로 파이프라인만 확인
+    python faq_store.py --reviews data/reviews.jsonl          # 의도별 관련 리뷰 발췌도 함께 넣어서 생성
+    python faq_store.py --match "배터리 성능은 어떨까?"        # 의도 판별 결과만 출력
+
+저장 형식: 첫 줄 헤더 {"faq_version", "prompt_hash", "model", "created"} + 답변 한 줄씩
+{"product", "intent", "question", "product_hash", "answer"}.
+- faq_version / prompt_hash가 지금 코드와 다르면 저장소 전체를 쓰지 않음 (의도·프롬프트 변경 시 자동 무효화)
+- product_hash가 지금 카탈로그 값과 다르면(가격, 리뷰 요약 등 변경) 그 제품 답변은 쓰지 않음
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from keywords import KEYWORDS
+
+FAQ_VERSION = 1
+
+# 의도 → 생성할 때 쓰는 대표 질문 (상세 화면 안내 문구의 예시 질문 포함)
+FAQ_INTENTS = {
+    "negative_review": "부정적 리뷰는 뭐가 있어?",
+    "battery": "배터리 성능은 어떨까?",
+    "noise_cancelling": "노이즈캔슬링 성능은 어때?",
+    "comfort": "착용감은 어때?",
+    "sound": "음질은 어때?",
+}
+
+# 이보다 긴 질문은 조건이 붙어 있을 가능성이 커서 확신도를 낮춤
+MAX_QUESTION_CHARS = 30
+
+
+# ======================================================
+# product_detail 프롬프트 (앱의 실시간 호출과 오프라인 생성이 같은 프롬프트를 사용)
+# ======================================================
+PRODUCT_DETAIL_PREFIX = """
+당신은 지금 '상품 상세 정보 단계(product_detail)'에 있습니다.
+이 단계에서는 사용자가 선택한 **블루투스 헤드셋 한 제품만** 명확하고 사실 기반으로 설명합니다.
+맨 아래 [선택된 제품 정보]와 [사용자 질문]을 보고 답변합니다.
+
+[응답 규칙]
+1. 질문에 대한 핵심 정보만 간단히 답변합니다.
+2. 다른 제품과의 비교나 추천 리스트 언급은 하지 않습니다.
+3. "현재 선택된 이 헤드셋은~"처럼, 항상 헤드셋 기준으로 설명합니다.
+4. 탐색 질문(용도/기준 재질문)은 하지 않습니다.
+5. [이번 답변 추가 규칙]이 있으면 함께 지킵니다.
+6. 답변 마지막 문장은 다음 중 하나로 끝냅니다:
+   - "다른 부분도 더 궁금하신가요?  없으시다면, 다른 후보를 눌러 물어보시거나 구매하러가기를 눌러주세요!"
+   - "추가로 알고 싶은 점 있으신가요? 없으시다면, 다른 후보를 눌러 물어보시거나 결정을 내리셨다면 언제든지 구매하러가기 버튼을 누르실 수 있습니다!"
+
+위 규칙을 지키며 자연스럽고 간결한 한국어로 답변하세요.
+"""
+
+# 미리 생성하는 답변은 사람이 검토하지 않고 그대로 나가므로 제품 정보 밖의 내용을 막음
+GROUNDING_RULE = "- [선택된 제품 정보]에 없는 수치나 리뷰 내용은 지어내지 말고, 정보가 부족하면 부족하다고 말합니다.\n"
+
+PRODUCT_FACT_KEYS = ("name", "brand", "price", "color", "rating", "tags", "review_one")
+
+
+def budget_rule(budget):
+    """예산 초과 제품의 첫 답변에 붙는 규칙 (LLM 호출용)"""
+    return (
+        "- 가격이 예산을 초과했으므로, 답변 첫 문장에 다음 문구 포함:\n"
+        f"  “예산(약 {budget:,}원)을 약간 초과하지만…”\n"
+    )
+
+
+def with_budget_notice(answer, budget):
+    """저장된 답변에 같은 규칙 적용 (첫 문장 앞에 예산 초과 문구)"""
+    return f"예산(약 {budget:,}원)을 약간 초과하지만, {answer.lstrip()}"
+
+
+def product_detail_prompt(product, question, budget=None, extra_rules="", reviews=()):
+    """
+    PRODUCT_DETAIL_PREFIX(고정) + 제품 정보 / 추가 규칙 / 질문(호출마다 다름)
+    reviews: 질문과 관련된 리뷰 발췌 문자열 (reviews.ReviewIndex.search 결과의 snippet, 개수·길이는 호출 쪽에서 제한)
+    """
+    rules = (budget_rule(budget) if budget else "") + extra_rules
+    budget_line = f"- 사용자가 설정한 예산: 약 {budget:,}원\n" if budget else ""
+    if reviews:
+        budget_line += "- 질문과 관련된 실제 리뷰 발췌:\n" + "".join(f"  · {r}\n" for r in reviews)
+    rules_block = f"\n[이번 답변 추가 규칙]\n{rules}" if rules else ""
+    return PRODUCT_DETAIL_PREFIX + f"""
+[선택된 제품 정보]
+- 제품명: {product['name']} ({product['brand']})
+- 가격: {product['price']:,}원
+- 색상 옵션: {', '.join(product['color'])}
+- 평점: {product['rating']:.1f}
+- 주요 특징: {', '.join(product['tags'])}
+- 리뷰 요약: {product['review_one']}
+{budget_line}{rules_block}
+[사용자 질문]
+"{question}"
+"""
+
+
+PROMPT_HASH = hashlib.sha256(
+    (PRODUCT_DETAIL_PREFIX + GROUNDING_RULE + json.dumps(FAQ_INTENTS, ensure_ascii=False)).encode("utf-8")
+).hexdigest()[:12]
+
+
+def product_hash(product):
+    """답변 생성에 쓰인 제품 정보의 지문 (카탈로그가 바뀌면 달라짐)"""
+    facts = {k: product.get(k) for k in PRODUCT_FACT_KEYS}
+    raw = json.dumps(facts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+# ======================================================
+# 질문 의도 판별
+# ======================================================
+def match_intent(question):
+    """
+    (의도, 확신도). 키워드가 정확히 한 의도에만 걸리고 비교/상황 전제 단어가 없을 때만 확신.
+    - 1.0: 짧은 단일 의도 질문
+    - 0.5: 단일 의도지만 긴 질문 (조건이 붙었을 수 있음)
+    - 0.0: 의도 없음 / 여러 의도 / 차단 단어 포함
+    """
+    text = (question or "").strip().lower()
+    cats = KEYWORDS.categories(text)
+    intents = [intent for intent in FAQ_INTENTS if f"faq:{intent}" in cats]
+    if len(intents) != 1:
+        return None, 0.0
+    if "faq_block" in cats:
+        return intents[0], 0.0
+    return intents[0], 1.0 if len(text) <= MAX_QUESTION_CHARS else 0.5
+
+
+# ======================================================
+# 저장소
+# ======================================================
+class FAQStore:
+    """
+    JSONL 파일을 읽어 (제품명, 의도) → 답변으로 보관. 파일 mtime이 바뀌면 check_interval 초 안에 다시 읽음.
+    파일이 없거나 버전이 맞지 않으면 빈 저장소 (모든 질문이 LLM으로 감)
+    """
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._mtime = None
+        self.header = {}
+        self.entries = {}
+        self._reload()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._mtime, self.header, self.entries = None, {}, {}
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            header, entries = self.read(self.path)
+        except (OSError, ValueError) as e:
+            print("FAQ Error:", e)
+            return
+        if header.get("faq_version") != FAQ_VERSION or header.get("prompt_hash") != PROMPT_HASH:
+            print("FAQ Error:", f"{self.path}는 다른 버전으로 생성됨 → 사용 안 함 (다시 생성 필요)")
+            header, entries = header, {}
+        self.header, self.entries = header, entries   # 참조 교체 (원자적)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = now
+            self._reload()
+        finally:
+            self._lock.release()
+
+    def get(self, product, intent):
+        """저장된 답변 (없거나 제품 정보가 바뀌었으면 None)"""
+        self._maybe_reload()
+        entry = self.entries.get((product["name"], intent))
+        if entry is None or entry["product_hash"] != product_hash(product):
+            return None
+        return entry["answer"]
+
+    def answer(self, product, question, min_confidence=0.9):
+        """질문 의도가 확실하고 답변이 있으면 (intent, answer), 아니면 None"""
+        intent, confidence = match_intent(question)
+        if intent is None or confidence < min_confidence:
+            return None
+        answer = self.get(product, intent)
+        return (intent, answer) if answer else None
+
+    # --------------------------------------------------
+    # 파일 읽기 / 쓰기
+    # --------------------------------------------------
+    @staticmethod
+    def read(path):
+        header, entries = {}, {}
+        with open(path, encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if i == 0 and "faq_version" in obj:
+                    header = obj
+                    continue
+                entries[(obj["product"], obj["intent"])] = obj
+        return header, entries
+
+    @staticmethod
+    def write(path, entries, model):
+        """임시 파일에 쓴 뒤 교체 (앱이 읽는 도중에도 반쯤 쓴 파일을 보지 않음)"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"faq_version": FAQ_VERSION, "prompt_hash": PROMPT_HASH, "model": model, "created": time.time()}
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for e in entries:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+
+
+# ======================================================
+# 오프라인 생성
+# ======================================================
+def generate_answer(client, model, product, intent, temperature=0.2, reviews=()):
+    question = FAQ_INTENTS[intent]
+    prompt = product_detail_prompt(product, question, extra_rules=GROUNDING_RULE, reviews=reviews)
+    res = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+    )
+    return {
+        "product": product["name"],
+        "intent": intent,
+        "question": question,
+        "product_hash": product_hash(product),
+        "answer": res.choices[0].message.content.strip(),
+    }
+
+
+def build_answers(products, client, model="gpt-4o-mini", intents=None, workers=4, review_index=None, review_k=4):
+    """
+    제품 × 의도 조합을 병렬로 생성. 실패한 조합은 건너뜀 (앱에서는 LLM으로 처리됨)
+    review_index를 주면 의도별 대표 질문으로 검색한 리뷰 발췌를 프롬프트에 함께 넣음
+    """
+    jobs = [(p, intent) for p in products for intent in (intents or FAQ_INTENTS)]
+
+    def run(job):
+        product, intent = job
+        reviews = ()
+        if review_index is not None:
+            reviews = [r.snippet() for r in review_index.search(product["name"], FAQ_INTENTS[intent], k=review_k)]
+        try:
+            return generate_answer(client, model, product, intent, reviews=reviews)
+        except Exception as e:
+            print("FAQ Error:", job[0]["name"], job[1], e)
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [e for e in pool.map(run, jobs) if e is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--catalog", default=os.path.join(here, "data", "catalog.jsonl"))
+    parser.add_argument("--out", default=os.path.join(here, "runtime", "faq_answers.jsonl"))
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--intents", nargs="+", choices=list(FAQ_INTENTS), help="일부 의도만 생성")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--stub", action="store_true", help="OpenAI 대신 stubs.StubOpenAI (고정 응답)")
+    parser.add_argument("--reviews", help="리뷰 JSONL (reviews.py 형식) — 주면 관련 리뷰 발췌를 넣어서 생성")
+    parser.add_argument("--review-index", default=os.path.join(here, "runtime", "review_index"))
+    parser.add_argument("--match", help="질문 하나의 의도 판별 결과만 출력")
+    args = parser.parse_args(argv)
+
+    if args.match is not None:
+        intent, confidence = match_intent(args.match)
+        print(json.dumps({"intent": intent, "confidence": confidence}, ensure_ascii=False))
+        return 0
+
+    from catalog_store import CatalogStore   # pandas는 생성할 때만 필요
+    products = CatalogStore(args.catalog).get().items
+
+    if args.stub:
+        from stubs import StubOpenAI
+        client = StubOpenAI()
+    else:
+        from openai import OpenAI
+        client = OpenAI()
+
+    review_index = None
+    if args.reviews:
+        from reviews import ReviewIndex
+        review_index = ReviewIndex.open(args.reviews, args.review_index)
+
+    started = time.perf_counter()
+    entries = build_answers(products, client, args.model, args.intents, args.workers, review_index)
+    FAQStore.write(args.out, entries, args.model)
+    total = len(products) * len(args.intents or FAQ_INTENTS)
+    print(f"{len(entries)}/{total} answer(s) → {args.out} ({time.perf_counter() - started:.1f}s)")
+    return 0 if len(entries) == total else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
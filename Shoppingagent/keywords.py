@@ -0,0 +1,166 @@
+from functools import lru_cache
+
+
+# ======================================================
+# 키워드 분류 (Aho-Corasick, 모든 카테고리를 한 번에 스캔)
+# ======================================================
+class KeywordMatcher:
+    """
+    {카테고리: [키워드, ...]} 사전들을 하나의 Aho-Corasick 오토마톤으로 컴파일.
+    - categories(text): text에 부분 문자열로 들어 있는 키워드의 카테고리 전체 (frozenset, 한 번의 스캔)
+    - prefix 사전의 카테고리는 text가 그 키워드로 시작할 때만 (str.startswith와 같음)
+    - 결과는 문자열별로 LRU 캐시 (메모리 항목처럼 매 턴 다시 검사하는 문자열이 많음)
+    스캔 비용은 text 길이에만 비례하므로 키워드/카테고리가 늘어나도 호출 쪽 비용은 거의 그대로.
+    대소문자 처리 등 정규화는 호출 쪽에서 (예: detect_priority는 lower()한 문자열로 조회)
+    """
+
+    def __init__(self, lexicons, prefix_lexicons=None, cache_size=4096):
+        self.lexicons = {c: tuple(ks) for c, ks in lexicons.items()}
+        self.prefix_lexicons = {c: tuple(ks) for c, ks in (prefix_lexicons or {}).items()}
+
+        # 상태 0 = 루트. goto[state] = {문자: 다음 상태}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]         # 이 상태에서 끝나는 키워드들의 (길이, 카테고리들, prefix 카테고리들)
+        keyword_cats = {}
+        for prefix, lexs in ((False, self.lexicons), (True, self.prefix_lexicons)):
+            for cat, keywords in lexs.items():
+                for k in keywords:
+                    if not k:
+                        raise ValueError(f"{cat}: 빈 키워드")
+                    entry = keyword_cats.setdefault(k, (set(), set()))
+                    entry[1 if prefix else 0].add(cat)
+        for k, (cats, prefix_cats) in keyword_cats.items():
+            state = self._insert(k)
+            self._out[state] = ((len(k), frozenset(cats), frozenset(prefix_cats)),)
+        self._build_fail_links()
+
+        self.categories = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _insert(self, keyword):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        return state
+
+    def _build_fail_links(self):
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 접미사로 끝나는 키워드도 이 상태에서 함께 보고
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, cats, prefix_cats in out[state]:
+                found |= cats
+                if prefix_cats and i + 1 == length:
+                    found |= prefix_cats
+        return frozenset(found)
+
+    def has(self, text, category):
+        return category in self.categories(text)
+
+    def has_any(self, text, *categories):
+        return not self.categories(text).isdisjoint(categories)
+
+    def cache_info(self):
+        return self.categories.cache_info()
+
+
+# ======================================================
+# 앱에서 쓰는 키워드 사전
+# ======================================================
+YES_KEYWORDS = [
+    "응", "응응", "ㅇㅇ", "네", "넹", "맞아", "맞아요",
+    "그래", "좋아", "좋아요", "중요하지", "그치", "맞지"
+]
+
+NEGATIVE_KEYWORDS = [
+    "없어", "없다고", "몰라", "모르겠", "잘 모르",
+    "글쎄", "별로", "아닌데", "굳이", "괜찮",
+    "그만", "필요없", "상관없", "안중요", "관심없"
+]
+
+COLOR_KEYWORDS = ["화이트", "블랙", "네이비", "퍼플", "실버", "그레이", "핑크", "보라", "골드"]
+DESIGN_KEYWORDS = ["디자인", "스타일", "예쁜", "깔끔", "세련", "미니멀", "레트로", "감성", "스타일리시"]
+USAGE_KEYWORDS = ["용도", "출퇴근", "운동", "게임", "여행", "공부", "음악 감상"]
+
+# detect_priority: (가장 중요) 메모리에서 최우선 기준 판별 (lower()한 문자열 기준, 위에서부터 먼저 맞는 것)
+PRIORITY_KEYWORDS = {
+    "디자인/스타일": ["디자인", "스타일", "깔끔", "미니멀", "레트로", "트렌디", "design", "style"],
+    "음질": ["음질", "sound", "audio"],
+    "착용감": ["착용감", "편안", "comfortable", "가벼운"],
+    "노이즈캔슬링": ["노이즈", "캔슬링"],
+    "배터리": ["배터리", "battery", "오래 쓰"],
+    "가격/예산": ["가격", "예산", "가성비", "price", "저렴", "싼", "싸게"],
+    "브랜드": ["브랜드", "인지도", "유명"],
+}
+
+# 응답 문장으로 질문 유형(question id) 판별 — 위에서부터 먼저 맞는 것
+QUESTION_KEYWORDS = {
+    "design": ["디자인", "스타일"],
+    "sound": ["음질", "소리", "사운드", "고음", "중음", "저음"],
+    "comfort": ["착용감"],
+    "battery": ["배터리"],
+    "budget": ["예산", "가격대"],
+}
+
+# product_detail 단계 질문 의도 (faq_store.match_intent, lower()한 문자열 기준)
+FAQ_INTENT_KEYWORDS = {
+    "negative_review": ["부정적", "단점", "안 좋은", "안좋은", "나쁜", "불만", "아쉬운", "아쉽", "악평", "별로인"],
+    "battery": ["배터리", "충전", "사용 시간", "사용시간", "재생 시간", "재생시간", "오래 가", "오래가"],
+    "noise_cancelling": ["노이즈", "캔슬링", "소음", "차음", "anc"],
+    "comfort": ["착용감", "편안", "편한", "편해", "무게", "무거", "가벼", "귀 아", "귀가 아", "압박"],
+    "sound": ["음질", "소리", "사운드", "저음", "베이스"],
+}
+
+# 있으면 저장된 답변 대신 LLM으로 (다른 제품과 비교 / 특정 상황 전제 / 추천 요청 등)
+FAQ_BLOCK_KEYWORDS = [
+    "비교", "보다", "차이", "다른 제품", "다른 거", "다른거", "vs", "어느 게", "어느게", "뭐가 더",
+    "추천", "게임", "운동", "아이폰", "갤럭시", "노트북", "안경",
+]
+
+LEXICONS = {
+    "negative": NEGATIVE_KEYWORDS,
+    "color": COLOR_KEYWORDS,
+    "color_word": ["색상"],
+    "prefer_word": ["선호"],
+    "design": DESIGN_KEYWORDS,
+    "usage": USAGE_KEYWORDS,
+    "sound_mention": ["음질", "소리", "사운드"],
+    "price_mention": ["예산", "가격", "얼마", "가격대"],
+    "drift": ["스마트폰", "휴대폰", "핸드폰", "아이폰", "갤럭시"],
+    "reco_request": ["추천", "골라줘", "추천해줘", "추천 받을게"],
+    "summary_yes": ["좋아요", "네", "맞아요", "추천"],
+}
+LEXICONS.update({f"priority:{name}": ks for name, ks in PRIORITY_KEYWORDS.items()})
+LEXICONS.update({f"question:{qid}": ks for qid, ks in QUESTION_KEYWORDS.items()})
+LEXICONS.update({f"faq:{intent}": ks for intent, ks in FAQ_INTENT_KEYWORDS.items()})
+LEXICONS["faq_block"] = FAQ_BLOCK_KEYWORDS
+
+PREFIX_LEXICONS = {
+    "yes": YES_KEYWORDS,
+}
+
+# import 시 한 번만 컴파일 (app.py는 rerun마다 다시 실행되지만 이 모듈은 프로세스당 한 번)
+KEYWORDS = KeywordMatcher(LEXICONS, PREFIX_LEXICONS)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# ======================================================
+# LLM 응답 캐시 (메모리 LRU + 선택적 SQLite)
+# ======================================================
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    """공백/줄바꿈 차이만 있는 프롬프트는 같은 키가 되도록 정리"""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class LLMCache:
+    """
+    (모델, temperature, 정규화된 messages) → 응답 텍스트 캐시.
+    - 1차: 프로세스 메모리 LRU (max_entries)
+    - 2차: sqlite_path가 있으면 SQLite 파일 (재시작 후에도 유지, sqlite_max_entries 초과 시 오래된 것부터 삭제)
+    - ttl 초가 지난 항목은 두 계층 모두에서 만료 처리
+    """
+
+    def __init__(self, max_entries=1024, ttl=24 * 3600, sqlite_path=None, sqlite_max_entries=50000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_max_entries = sqlite_max_entries
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()       # key → (created_at, value)
+        self._db = None
+        self._writes_since_evict = 0
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "sqlite_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model, messages, temperature):
+        payload = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "messages": [
+                    {"role": m["role"], "content": normalize_prompt(m["content"])}
+                    for m in messages
+                ],
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # --------------------------------------------------
+    # 조회 / 저장
+    # --------------------------------------------------
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._lru.get(key)
+            if item is not None:
+                created_at, value = item
+                if now - created_at <= self.ttl:
+                    self._lru.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._lru[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl:
+                        self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._put_memory(key, created_at, value)
+                        self._stats["hits"] += 1
+                        self._stats["sqlite_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+            self._stats["sets"] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= 100:
+                    self._evict_sqlite(now)
+                self._db.commit()
+
+    def _put_memory(self, key, created_at, value):
+        self._lru[key] = (created_at, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_sqlite(self, now):
+        self._writes_since_evict = 0
+        self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        count = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.sqlite_max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_entries"] = len(self._lru)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
@@ -0,0 +1,230 @@
+import atexit
+import queue
+import random
+import threading
+import time
+
+
+# ======================================================
+# 백그라운드 로그 전송기 (B_raw / session_summary 공용)
+# ======================================================
+class LogShipper:
+    """
+    로그 row를 메모리 큐에 넣어두고, 워커 스레드가 모아서 append_rows로 한 번에 전송.
+    - submit(): 큐가 가득 차면 put_timeout 만큼만 기다리고 버림 (채팅 응답을 막지 않음)
+    - 배치 크기(batch_size) 또는 대기 시간(flush_interval) 중 먼저 도달하는 쪽에서 전송
+    - 전송 실패 시 지터가 섞인 지수 백오프로 재시도
+    - flush(): 세션 종료 시 남은 로그를 비울 때 사용
+    """
+
+    def __init__(
+        self,
+        append_rows,
+        batch_size=50,
+        flush_interval=2.0,
+        max_queue=5000,
+        put_timeout=0.05,
+        max_retries=5,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        on_sent=None,
+        on_failed=None,
+        on_flushed=None,
+    ):
+        # append_rows(sheet_name, rows) → 실제 전송 함수 (실패 시 예외)
+        self._append_rows = append_rows
+        # on_sent(sheet_name, rows) → 전송 성공 후 호출 (WAL 전송 완료 표시용)
+        self._on_sent = on_sent
+        # on_failed(sheet_name, rows, error) → 재시도 후에도 전송 실패했을 때 호출 (지표용)
+        self._on_failed = on_failed
+        # on_flushed(sheet_name, rows, seconds) → 배치 하나를 보내는 데 걸린 시간 (재시도/백오프 포함, 지표용)
+        self._on_flushed = on_flushed
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = 0                      # 큐 + 전송 중인 row 수
+        self._cond = threading.Condition()
+        self._flush_now = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # 카운터
+        self._stats = {
+            "submitted": 0,
+            "sent": 0,
+            "dropped": 0,        # 큐가 가득 차서 버린 row
+            "failed": 0,         # 재시도 후에도 전송 실패한 row
+            "retries": 0,
+            "batches": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+            "total_flush_latency": 0.0,
+        }
+
+    # --------------------------------------------------
+    # 시작 / 종료
+    # --------------------------------------------------
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self, timeout=5.0):
+        """남은 로그를 최대 timeout 초 동안 전송한 뒤 워커 종료"""
+        self.flush(timeout=timeout)
+        self._stop.set()
+        self._flush_now.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    # --------------------------------------------------
+    # 적재
+    # --------------------------------------------------
+    def submit(self, row, sheet="B_raw"):
+        """
+        row 하나를 큐에 적재. 큐가 가득 차 있으면 put_timeout 동안만 기다린 뒤 False 반환.
+        """
+        with self._cond:
+            self._pending += 1
+        try:
+            self._queue.put((sheet, row), timeout=self.put_timeout)
+        except queue.Full:
+            with self._cond:
+                self._pending -= 1
+                self._stats["dropped"] += 1
+                self._cond.notify_all()
+            return False
+
+        with self._cond:
+            self._stats["submitted"] += 1
+        return True
+
+    def flush(self, timeout=5.0):
+        """큐에 쌓인 로그를 즉시 전송하고, 다 비워질 때까지(최대 timeout 초) 대기"""
+        deadline = time.monotonic() + timeout
+        self._flush_now.set()
+        with self._cond:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def queue_depth(self):
+        """아직 워커가 꺼내가지 않은 row 수"""
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s["queue_depth"] = self._queue.qsize()
+            s["pending"] = self._pending
+        s["avg_flush_latency"] = (
+            s["total_flush_latency"] / s["batches"] if s["batches"] else 0.0
+        )
+        return s
+
+    # --------------------------------------------------
+    # 워커
+    # --------------------------------------------------
+    def _collect_batch(self):
+        """batch_size 만큼 모이거나 flush_interval이 지나면 배치 반환"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._flush_now.is_set() or self._stop.is_set():
+                # flush 요청이면 지금 큐에 있는 것만 바로 가져감
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect_batch()
+            if not batch:
+                self._flush_now.clear()
+                continue
+
+            # 시트별로 묶어서 순서 유지한 채 전송
+            by_sheet = {}
+            for sheet, row in batch:
+                by_sheet.setdefault(sheet, []).append(row)
+
+            for sheet, rows in by_sheet.items():
+                self._send(sheet, rows)
+
+            with self._cond:
+                self._pending -= len(batch)
+                if self._queue.empty():
+                    self._flush_now.clear()
+                self._cond.notify_all()
+
+    def _send(self, sheet, rows):
+        attempt = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                self._append_rows(sheet, rows)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    with self._cond:
+                        self._stats["failed"] += len(rows)
+                    print("Logging Error:", e)
+                    if self._on_failed:
+                        try:
+                            self._on_failed(sheet, rows, e)
+                        except Exception as cb_error:
+                            print("Logging Error:", cb_error)
+                    return False
+                with self._cond:
+                    self._stats["retries"] += 1
+                # 지터 섞인 지수 백오프 (종료 중이면 바로 재시도)
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                self._stop.wait(delay * random.uniform(0.5, 1.5))
+                continue
+
+            latency = time.perf_counter() - started
+            with self._cond:
+                self._stats["sent"] += len(rows)
+                self._stats["batches"] += 1
+                self._stats["last_flush_latency"] = latency
+                self._stats["max_flush_latency"] = max(self._stats["max_flush_latency"], latency)
+                self._stats["total_flush_latency"] += latency
+
+            if self._on_flushed:
+                try:
+                    self._on_flushed(sheet, rows, latency)
+                except Exception as e:
+                    print("Logging Error:", e)
+            if self._on_sent:
+                try:
+                    self._on_sent(sheet, rows)
+                except Exception as e:
+                    print("Logging Error:", e)
+            return True
@@ -0,0 +1,90 @@
+import re
+
+from keywords import KEYWORDS
+from recommender import extract_budget
+
+
+# ======================================================
+# 규칙 기반 메모리 추출 (LLM 호출 전 fast path)
+# app.extract_memory가 먼저 부르고, 못 뽑거나 애매하면 extract_memory_with_gpt로 넘어감
+# ======================================================
+BRAND_ALIASES = {
+    "Sony": ["소니", "sony"],
+    "Bose": ["보스", "bose"],
+    "Apple": ["애플", "에어팟", "apple", "airpods"],
+    "Sennheiser": ["젠하이저", "sennheiser"],
+    "JBL": ["제이비엘", "jbl"],
+    "AKG": ["akg"],
+    "Anker": ["앤커", "앵커", "anker", "사운드코어"],
+    "Microsoft": ["마이크로소프트", "microsoft", "서피스"],
+}
+
+COLOR_ALIASES = {
+    "블랙": ["블랙", "검정", "검은색", "까만"],
+    "화이트": ["화이트", "흰색", "하얀"],
+    "네이비": ["네이비", "남색"],
+    "블루": ["블루", "파란", "파랑"],
+    "퍼플": ["퍼플", "보라"],
+    "실버": ["실버", "(?<!검)은색"],
+    "그레이": ["그레이", "회색"],
+    "핑크": ["핑크", "분홍"],
+    "골드": ["골드", "금색"],
+}
+
+# (패턴, 저장할 메모리 문장) — extract_memory_with_gpt 프롬프트의 [변환 규칙 예시]와 동일
+MEMORY_RULES = [
+    (re.compile(r"착용감|귀\s*(가\s*)?아|편안|편한|편하"), "착용감이 편한 제품을 선호하고 있어요."),
+    (re.compile(r"음악|노래|감상"), "주로 음악 감상 용도로 사용할 예정이에요."),
+    (re.compile(r"출퇴근|출근|퇴근|통근"), "출퇴근 시 사용할 용도예요."),
+    (re.compile(r"예쁜|이쁜|디자인"), "트렌디한 디자인/스타일을 중요하게 생각해요."),
+    (re.compile(r"화려|레트로"), "원하는 디자인/스타일이 뚜렷한 편이에요."),
+    (re.compile(r"깔끔|심플|무난"), "심플한 디자인을 선호해요."),
+    (re.compile(r"노이즈|소음|시끄"), "노이즈캔슬링 기능을 고려하고 있어요."),
+]
+BRAND_PATTERNS = [
+    (re.compile("|".join(re.escape(a) for a in aliases), re.IGNORECASE), brand)
+    for brand, aliases in BRAND_ALIASES.items()
+]
+COLOR_PATTERNS = [
+    (re.compile("|".join(aliases)), color)
+    for color, aliases in COLOR_ALIASES.items()
+]
+
+# 규칙만으로 판단하기 애매한 발화 (질문, 비교/조건, 부정 표현 등) → LLM에 맡김
+LOW_CONFIDENCE_PATTERN = re.compile(r"\?|뭐|어때|어떤|할까|될까|말고|빼고|싫|않|안\s|못|대신|보다|차이")
+
+
+def extract_memory_with_rules(user_input: str):
+    """
+    발화에서 규칙으로 확실하게 뽑을 수 있는 메모리 문장만 추출.
+    반환: (메모리 문장 리스트, 확신 여부)
+    """
+    text = user_input.strip()
+    memories = []
+
+    for pattern, sentence in MEMORY_RULES:
+        if pattern.search(text):
+            memories.append(sentence)
+
+    brands = [brand for pattern, brand in BRAND_PATTERNS if pattern.search(text)]
+    if brands:
+        memories.append(f"선호하는 브랜드는 {', '.join(brands)} 쪽이에요.")
+
+    colors = [color for pattern, color in COLOR_PATTERNS if pattern.search(text)]
+    if colors:
+        memories.append(f"색상은 {', '.join(colors)} 계열을 선호해요.")
+
+    budget = extract_budget([text])
+    budget_confident = True
+    if budget:
+        if budget % 10000 == 0:
+            memories.append(f"예산은 약 {budget // 10000}만 원 이내로 생각하고 있어요.")
+        else:
+            budget_confident = False
+
+    confident = (
+        budget_confident
+        and not KEYWORDS.has(text, "negative")
+        and not LOW_CONFIDENCE_PATTERN.search(text)
+    )
+    return memories, confident
@@ -0,0 +1,57 @@
+import re
+from functools import lru_cache
+
+
+# ======================================================
+# 메모리 문장 정규화 (정규식 미리 컴파일 + 결과 캐시)
+# ======================================================
+PRIORITY_MARK = "(가장 중요)"
+
+# 문장 끝 어미 정리 (순서대로 적용)
+_ENDING_RULES = [
+    (re.compile(r'로 생각하고 있어요\.?$'), ''),
+    (re.compile(r'이에요\.?$'), ''),
+    (re.compile(r'에요\.?$'), ''),
+    (re.compile(r'다\.?$'), ''),
+]
+
+_REPLACEMENTS = [
+    ('비싼것까진 필요없', '비싼 것 필요 없음'),
+    ('필요없', '필요 없음'),
+]
+
+# 조사 + 서술어 꼬리 정리
+_TAIL_RULES = [
+    (re.compile(r'(을|를)\s*선호$'), ' 선호'),
+    (re.compile(r'(을|를)\s*고려하고$'), ' 고려'),
+    (re.compile(r'(이|가)\s*필요$'), ' 필요'),
+    (re.compile(r'(에서)\s*들을$'), ''),
+]
+
+
+@lru_cache(maxsize=8192)
+def naturalize_memory(text: str) -> str:
+    """메모리 문장을 통일된 형태로 정리 (같은 문장은 캐시된 결과를 그대로 사용)"""
+    t = text.strip()
+    t = t.replace("노이즈 캔슬링", "노이즈캔슬링")
+    is_priority = PRIORITY_MARK in t
+    t = t.replace(PRIORITY_MARK, "").strip()
+
+    for pattern, repl in _ENDING_RULES:
+        t = pattern.sub(repl, t)
+
+    for old, new in _REPLACEMENTS:
+        t = t.replace(old, new)
+
+    for pattern, repl in _TAIL_RULES:
+        t = pattern.sub(repl, t)
+
+    t = t.strip()
+    if is_priority:
+        t = PRIORITY_MARK + " " + t
+    return t
+
+
+def join_memory_text(memory):
+    """프롬프트에 넣는 메모리 블록 (정규화한 문장을 줄바꿈으로 연결)"""
+    return "\n".join([naturalize_memory(m) for m in memory])
@@ -0,0 +1,239 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ======================================================
+# Prometheus 텍스트 포맷 지표 (외부 의존성 없는 최소 구현)
+# ======================================================
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels {sorted(labels)} != {sorted(self.labelnames)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels_text(self.labelnames, k)} {_num(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """set()으로 값을 넣거나, fn을 주면 scrape 시점에 fn()으로 계산"""
+
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, fn=None):
+        super().__init__(name, documentation)
+        self._value = 0
+        self._fn = fn
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def collect(self):
+        value = self._fn() if self._fn else self._value
+        return self.header() + [f"{self.name} {_num(value)}"]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labels → [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def time(self, **labels):
+        """with hist.time(label=...): 블록 소요 시간 기록"""
+        return _Timer(self, labels)
+
+    def collect(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self.header()
+        for key, s in items:
+            cumulative = 0
+            for le, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(
+                    f"{self.name}_bucket{_labels_text(self.labelnames, key, [('le', _num(le))])} {cumulative}"
+                )
+            lines.append(f"{self.name}_bucket{_labels_text(self.labelnames, key, [('le', '+Inf')])} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels_text(self.labelnames, key)} {_num(s[-2])}")
+            lines.append(f"{self.name}_count{_labels_text(self.labelnames, key)} {s[-1]}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "started")
+
+    def __init__(self, hist, labels):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, fn=None):
+        return self.register(Gauge(name, documentation, fn))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def exposition(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            lines.extend(m.collect())
+        return "\n".join(lines) + "\n"
+
+
+# ======================================================
+# 사이드 HTTP 포트 (/metrics)
+# ======================================================
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def start_http_server(registry, port, addr="0.0.0.0"):
+    """
+    registry를 http://addr:port/metrics 로 노출하는 데몬 스레드 서버.
+    같은 프로세스에서 같은 포트로 여러 번 불려도(Streamlit rerun 등) 서버는 하나만 띄우고,
+    이후 호출은 서버가 노출할 registry만 교체 (캐시 초기화로 registry가 새로 만들어져도 scrape는 최신 registry).
+    """
+    with _servers_lock:
+        if port in _servers:
+            _servers[port].registry = registry
+            return _servers[port]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = self.server.registry.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        server.registry = registry
+        threading.Thread(target=server.serve_forever, name=f"metrics-http-{port}", daemon=True).start()
+        _servers[port] = server
+        return server
+
+
+class SessionTracker:
+    """최근 ttl 초 안에 rerun이 있었던 세션 수 (활성 세션 게이지용)"""
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+
+    def active(self):
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            stale = [sid for sid, t in self._last_seen.items() if t < cutoff]
+            for sid in stale:
+                del self._last_seen[sid]
+            return len(self._last_seen)
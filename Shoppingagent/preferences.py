@@ -0,0 +1,149 @@
+import re
+from functools import lru_cache
+
+from keywords import KEYWORDS, PRIORITY_KEYWORDS
+from recommender import extract_budget
+
+
+# ======================================================
+# 메모리 문장 → 구조화된 선호 정보
+# ======================================================
+PRIORITY_MARK = "(가장 중요)"
+PALETTE = ("블랙", "화이트", "네이비", "블루", "퍼플", "보라", "실버", "그레이", "핑크", "골드")
+_BRAND_SENTENCE = re.compile(r"선호하는 브랜드는\s*(.+?)\s*쪽")
+
+# 점수 계산 / 추천 이유에 쓰는 기능 언급 (문장에 부분 문자열로 들어 있는지)
+FEATURE_WORDS = ("디자인/스타일", "음질", "착용감", "노이즈", "노이즈캔슬링", "가성비", "예산", "색상", "브랜드")
+
+
+class MemoryFact:
+    """메모리 문장 하나를 한 번만 파싱한 결과 (같은 문장은 parse_memory 캐시로 재사용)"""
+
+    __slots__ = ("text", "is_priority", "priority", "budget", "is_budget_sentence",
+                 "is_color_sentence", "colors", "usage", "brands", "features", "design_word")
+
+    def __init__(self, text):
+        self.text = text
+        self.is_priority = PRIORITY_MARK in text
+        self.priority = _sentence_priority(text) if self.is_priority else None
+        self.budget = extract_budget([text])
+        self.is_budget_sentence = "예산은 약" in text
+        self.is_color_sentence = _is_color_sentence(text)
+        self.colors = tuple(c for c in PALETTE if c in text)
+        self.usage = KEYWORDS.has(text, "usage")
+        m = _BRAND_SENTENCE.search(text)
+        self.brands = tuple(b.strip() for b in m.group(1).split(",") if b.strip()) if m else ()
+        self.features = frozenset(w for w in FEATURE_WORDS if w in text)
+        self.design_word = KEYWORDS.has(text, "design")
+
+
+def _sentence_priority(text):
+    """detect_priority와 같은 규칙: 키워드로 기준 이름, 없으면 문장 그대로"""
+    cats = KEYWORDS.categories(text.lower())
+    for name in PRIORITY_KEYWORDS:
+        if f"priority:{name}" in cats:
+            return name
+    return text.replace(PRIORITY_MARK, "").strip()
+
+
+def _is_color_sentence(text):
+    t = text.replace(PRIORITY_MARK, "")
+    cats = KEYWORDS.categories(t)
+    if "color_word" in cats and "prefer_word" in cats:
+        return True
+    return "color" in cats
+
+
+@lru_cache(maxsize=4096)
+def parse_memory(text):
+    return MemoryFact(text)
+
+
+class Preferences:
+    """
+    st.session_state.memory(문장 리스트)와 나란히 유지하는 구조화된 선호 정보.
+    - append / pop / set / reset으로 문장 리스트와 같은 변경을 반영 (문장 파싱은 parse_memory 캐시)
+    - budget, priority, colors, usage, brands, 기능 플래그는 변경 시점에 미리 계산 → 읽기는 속성 조회
+    - recommender.MemoryFeatures와 같은 속성을 갖고 있어서 CatalogIndex.scores/top_k에 그대로 넘길 수 있음
+    - to_memory()는 원래 문장 리스트를 그대로 돌려줌
+    """
+
+    __slots__ = ("_facts", "budget", "priority", "colors", "usage", "brands",
+                 "has_budget", "design_priority", "mentions",
+                 "priority_design", "priority_sound", "priority_comfort",
+                 "noise_count", "value_count", "color_memories")
+
+    def __init__(self, memory=()):
+        self._facts = [parse_memory(m) for m in memory]
+        self._refresh()
+
+    @classmethod
+    def from_memory(cls, memory):
+        return cls(memory)
+
+    def to_memory(self):
+        return [f.text for f in self._facts]
+
+    def matches(self, memory):
+        """memory 리스트와 같은 문장들을 반영하고 있는지 (다른 경로로 메모리가 바뀌었는지 확인용)"""
+        facts = self._facts
+        if len(facts) != len(memory):
+            return False
+        return all(f.text is m or f.text == m for f, m in zip(facts, memory))
+
+    def __len__(self):
+        return len(self._facts)
+
+    def __iter__(self):
+        return iter(self._facts)
+
+    # --------------------------------------------------
+    # 변경 (문장 리스트와 같은 연산)
+    # --------------------------------------------------
+    def append(self, text):
+        self._facts.append(parse_memory(text))
+        self._refresh()
+
+    def pop(self, index):
+        fact = self._facts.pop(index)
+        self._refresh()
+        return fact.text
+
+    def set(self, index, text):
+        self._facts[index] = parse_memory(text)
+        self._refresh()
+
+    def reset(self, memory):
+        self._facts = [parse_memory(m) for m in memory]
+        self._refresh()
+
+    # --------------------------------------------------
+    # 집계 (문장 수만큼의 속성 조회, 문자열 검사 없음)
+    # --------------------------------------------------
+    def _refresh(self):
+        facts = self._facts
+        self.budget = next((f.budget for f in facts if f.budget is not None), None)
+        self.priority = next((f.priority for f in facts if f.is_priority), None)
+        self.colors = tuple(dict.fromkeys(c for f in facts if f.is_color_sentence for c in f.colors))
+        self.usage = any(f.usage for f in facts)
+        self.brands = tuple(dict.fromkeys(b for f in facts for b in f.brands))
+
+        mentions = {}
+        for f in facts:
+            for w in f.features:
+                mentions[w] = mentions.get(w, 0) + 1
+        self.mentions = mentions
+        self.has_budget = "예산" in mentions
+        self.design_priority = any(f.is_priority and f.design_word for f in facts)
+
+        has_priority = any(f.is_priority for f in facts)
+        self.priority_design = has_priority and "디자인/스타일" in mentions
+        self.priority_sound = has_priority and "음질" in mentions
+        self.priority_comfort = has_priority and "착용감" in mentions
+        self.noise_count = mentions.get("노이즈", 0)
+        self.value_count = mentions.get("가성비", 0)
+        self.color_memories = [f.text for f in facts if "색상" in f.features]
+
+    def mentioned(self, word):
+        """FEATURE_WORDS 중 하나가 어떤 메모리 문장에든 들어 있는지"""
+        return word in self.mentions
@@ -0,0 +1,184 @@
+import re
+
+import numpy as np
+
+
+# ======================================================
+# 메모리 기반 점수 계산 (기준 구현)
+# ======================================================
+def extract_budget(mems):
+    for m in mems:
+        m1 = re.search(r"(\d+)\s*만\s*원", m)
+        if m1:
+            return int(m1.group(1)) * 10000
+        txt = m.replace(",", "")
+        m2 = re.search(r"(\d{2,7})\s*원", txt)
+        if m2:
+            return int(m2.group(1))
+    return None
+
+
+def score_item_with_memory(item, mems):
+    score = 0
+
+    mtext = " ".join(mems)
+    budget = extract_budget(mems)
+
+    # (1) 최우선 기준 강점 보정
+    if "(가장 중요)" in mtext:
+        if "디자인/스타일" in mtext and "디자인" in item["tags"]:
+            score += 50
+        if "음질" in mtext and "음질" in item["tags"]:
+            score += 50
+        if "착용감" in mtext and "착용감" in item["tags"]:
+            score += 50
+
+    # (2) 일반 기준 반영
+    for m in mems:
+        if "노이즈" in m and "노이즈캔슬링" in item["tags"]:
+            score += 20
+        if "가성비" in m and "가성비" in item["tags"]:
+            score += 20
+        if "색상" in m:
+            for col in item["color"]:
+                if col in m:
+                    score += 10
+
+    # (3) 랭크 보정
+    score -= item["rank"]
+
+    # ---------------------------
+    # (4) 🟡 예산 보정 — 가장 중요!
+    # ---------------------------
+    if budget:
+        if item["price"] > budget:
+            diff = item["price"] - budget
+            if diff > 100000:          # 10만원 초과
+                score -= 200
+            else:
+                score -= 80
+        else:
+            score += 30  # 예산 이내면 가산점
+
+    return score
+
+
+# ======================================================
+# 벡터화 점수 계산 (카탈로그 인덱스)
+# ======================================================
+class MemoryFeatures:
+    """
+    한 턴의 메모리 리스트를 점수 계산에 필요한 값으로 한 번만 파싱한 결과.
+    score_item_with_memory가 아이템마다 반복하던 문자열 검사를 여기서 한 번에 끝냄.
+    """
+
+    __slots__ = ("priority_design", "priority_sound", "priority_comfort",
+                 "noise_count", "value_count", "color_memories", "budget")
+
+    def __init__(self, mems):
+        mtext = " ".join(mems)
+        has_priority = "(가장 중요)" in mtext
+        self.priority_design = has_priority and "디자인/스타일" in mtext
+        self.priority_sound = has_priority and "음질" in mtext
+        self.priority_comfort = has_priority and "착용감" in mtext
+
+        self.noise_count = sum(1 for m in mems if "노이즈" in m)
+        self.value_count = sum(1 for m in mems if "가성비" in m)
+        self.color_memories = [m for m in mems if "색상" in m]
+        self.budget = extract_budget(mems)
+
+
+class CatalogIndex:
+    """
+    카탈로그를 한 번만 컬럼 배열로 변환해두고, 턴마다 NumPy 한 번의 패스로 전체 점수 계산.
+    - 태그: 태그별 bool 배열 (역색인)
+    - 색상: 아이템 × 색상 어휘 개수 행렬
+    - 가격/랭크: 숫자 배열
+    """
+
+    def __init__(self, items):
+        self.items = list(items)
+        n = len(self.items)
+
+        self.price = np.array([it["price"] for it in self.items])
+        self.rank = np.array([it["rank"] for it in self.items])
+
+        # 태그 역색인: tag → 아이템 bool 마스크
+        self.tag_masks = {}
+        for i, it in enumerate(self.items):
+            for t in it["tags"]:
+                mask = self.tag_masks.get(t)
+                if mask is None:
+                    mask = self.tag_masks[t] = np.zeros(n, dtype=bool)
+                mask[i] = True
+
+        # 색상 어휘 + 아이템별 색상 등장 횟수
+        self.colors = sorted({c for it in self.items for c in it["color"]})
+        col_pos = {c: j for j, c in enumerate(self.colors)}
+        self.color_counts = np.zeros((n, len(self.colors)), dtype=np.int64)
+        for i, it in enumerate(self.items):
+            for c in it["color"]:
+                self.color_counts[i, col_pos[c]] += 1
+
+    def __len__(self):
+        return len(self.items)
+
+    def _tag(self, tag):
+        mask = self.tag_masks.get(tag)
+        return mask if mask is not None else np.zeros(len(self.items), dtype=bool)
+
+    def scores(self, features):
+        """모든 아이템 점수 (score_item_with_memory와 동일한 값)"""
+        dtype = np.result_type(self.rank.dtype, np.int64)
+        score = np.zeros(len(self.items), dtype=dtype)
+
+        # (1) 최우선 기준 강점 보정
+        if features.priority_design:
+            score += 50 * self._tag("디자인")
+        if features.priority_sound:
+            score += 50 * self._tag("음질")
+        if features.priority_comfort:
+            score += 50 * self._tag("착용감")
+
+        # (2) 일반 기준 반영
+        if features.noise_count:
+            score += 20 * features.noise_count * self._tag("노이즈캔슬링")
+        if features.value_count:
+            score += 20 * features.value_count * self._tag("가성비")
+        if features.color_memories and self.colors:
+            # 색상 어휘별로 "그 색이 들어간 색상 메모리 개수"
+            hits = np.array(
+                [sum(1 for m in features.color_memories if c in m) for c in self.colors],
+                dtype=np.int64,
+            )
+            score += 10 * (self.color_counts @ hits)
+
+        # (3) 랭크 보정
+        score -= self.rank
+
+        # (4) 예산 보정
+        budget = features.budget
+        if budget:
+            over = self.price > budget
+            far_over = (self.price - budget) > 100000
+            score += np.where(over, np.where(far_over, -200, -80), 30)
+
+        return score
+
+    def top_k(self, features, k=3):
+        """
+        점수 상위 k개 아이템. 동점이면 카탈로그 순서 유지
+        (기존 list.sort(key=-score)의 안정 정렬 결과와 동일).
+        """
+        n = len(self.items)
+        if n == 0:
+            return []
+        k = min(k, n)
+        score = self.scores(features)
+
+        # argpartition으로 k번째 점수를 구한 뒤, 그 이상인 후보만 (점수 내림차순, 인덱스 오름차순) 정렬
+        kth = np.argpartition(-score, k - 1)[:k]
+        threshold = score[kth].min()
+        cand = np.flatnonzero(score >= threshold)
+        order = cand[np.lexsort((cand, -score[cand]))][:k]
+        return [self.items[i] for i in order]
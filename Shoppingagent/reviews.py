@@ -0,0 +1,332 @@
+"""
+제품별 리뷰 검색 인덱스 (로컬, 네트워크 없음).
+
+리뷰 원본(JSONL, 한 줄에 {"product": 제품명, "text": 리뷰, "rating": 선택})을 글자 n-gram BM25로 색인하고,
+product_detail 질문과 관련된 리뷰 발췌 top-k만 프롬프트에 넣는다.
+
+    python reviews.py data/reviews.jsonl --out runtime/review_index
+    python reviews.py data/reviews.jsonl --query "Sony WH-CH720N" "배터리 오래 가?"
+    python reviews.py data/reviews.jsonl --seed data/catalog.jsonl     # 기본 리뷰 파일 다시 만들기
+
+- data/reviews.jsonl은 카탈로그의 review_one 문장 + 태그별 대표 후기 문장으로 만든 기본(seed) 코퍼스
+  (실제 리뷰를 모으면 같은 형식으로 교체하면 되고, 인덱스는 원본이 바뀌면 자동으로 다시 만들어짐)
+
+- 한국어는 띄어쓰기/조사 변화가 많아서 단어 대신 어절 안의 2~3글자 n-gram을 색인어로 사용
+- 역색인은 CSR 배열(indptr / doc_ids / weights)로 저장하고 np.load(mmap_mode="r")로 열어서 시작 비용이 작음
+  (다시 색인하면 새 세대 디렉터리에 쓰고 meta.json만 교체 → 열려 있는 mmap은 건드리지 않음)
+- 문서는 제품별로 연속 구간에 모아두어, 질의 때는 색인어마다 그 제품 구간만 잘라서 점수 합산
+- BM25 가중치는 색인할 때 미리 계산 → 질의 = 배열 슬라이스 + bincount
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+
+INDEX_VERSION = 2
+NGRAM_SIZES = (2, 3)
+K1 = 1.2
+B = 0.75
+
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def ngrams(text):
+    """어절별 2~3글자 n-gram (한 글자 어절은 그대로)"""
+    grams = []
+    for word in _NON_WORD.sub(" ", text.lower()).split():
+        if len(word) == 1:
+            grams.append(word)
+            continue
+        for n in NGRAM_SIZES:
+            grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+def read_reviews(path):
+    """리뷰 JSONL → [(제품명, 리뷰, 평점 또는 None)] (빈 리뷰는 건너뜀)"""
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            text = (obj.get("text") or "").strip()
+            if text:
+                out.append((obj["product"], text, obj.get("rating")))
+    return out
+
+
+# 기본 코퍼스용 태그별 후기 문장 (카탈로그 태그 → 그 장점을 말하는 짧은 리뷰)
+SEED_TAG_REVIEWS = {
+    "가성비": "가격 대비 기능이 충분해서 만족스러워요.",
+    "배터리": "배터리가 오래 가서 충전 걱정이 거의 없어요.",
+    "노이즈캔슬링": "노이즈캔슬링을 켜면 지하철 소음이 많이 줄어요.",
+    "편안함": "오래 써도 머리 압박이 적어서 편안해요.",
+    "가벼움": "무게가 가벼워서 들고 다니기 부담이 없어요.",
+    "음질": "음질이 선명하고 저음도 풍부한 편이에요.",
+    "무난한 음질": "음질은 튀지 않고 무난하게 듣기 좋아요.",
+    "균형 음질": "저음과 고음이 균형 잡힌 사운드예요.",
+    "착용감": "이어패드가 부드러워서 착용감이 좋아요.",
+    "통화품질": "통화할 때 상대방이 목소리가 깨끗하게 들린대요.",
+    "브랜드": "브랜드 인지도가 있어서 믿고 샀어요.",
+    "트렌디": "요즘 스타일이라 어디에 써도 잘 어울려요.",
+    "디자인": "디자인이 깔끔하고 예뻐서 만족해요.",
+    "고급": "마감이 고급스럽고 만듦새가 좋아요.",
+    "프리미엄": "비싼 만큼 전반적인 완성도가 높아요.",
+    "여행": "여행이나 비행기에서 장시간 쓰기 좋아요.",
+    "업무": "재택근무나 화상회의용으로 쓰기 편해요.",
+}
+
+
+def seed_reviews(catalog_path):
+    """카탈로그 → 기본 리뷰 [(제품명, 리뷰, None)] (review_one 문장 + 태그별 후기 문장, 평점 없음)"""
+    out = []
+    with open(catalog_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            texts = [item.get("review_one", "")] + [SEED_TAG_REVIEWS.get(t, "") for t in item.get("tags", [])]
+            out.extend((item["name"], text, None) for text in texts if text)
+    return out
+
+
+def write_reviews(path, reviews):
+    with open(path, "w", encoding="utf-8") as f:
+        for product, text, rating in reviews:
+            obj = {"product": product, "text": text}
+            if rating is not None:
+                obj["rating"] = rating
+            f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+
+
+class Review:
+    __slots__ = ("text", "rating", "score")
+
+    def __init__(self, text, rating, score):
+        self.text = text
+        self.rating = rating
+        self.score = score
+
+    def snippet(self, max_chars=160):
+        text = " ".join(self.text.split())
+        if len(text) > max_chars:
+            text = text[:max_chars - 1].rstrip() + "…"
+        return f"(★{self.rating:g}) {text}" if self.rating is not None else text
+
+
+class ReviewIndex:
+    """
+    BM25 역색인. 배열은 build()로 만들거나 load()로 디스크에서 mmap.
+    - vocab: n-gram → 색인어 id
+    - indptr / doc_ids / weights: 색인어 id별 (문서 id 오름차순) 게시 목록과 BM25 가중치
+    - products: 제품명 → [시작 문서 id, 끝 문서 id)
+    - 본문은 texts(utf-8 바이트) + offsets로 보관
+    """
+
+    def __init__(self, vocab, indptr, doc_ids, weights, products, texts, offsets, ratings, meta=None):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.products = products
+        self.texts = texts
+        self.offsets = offsets
+        self.ratings = ratings
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    # --------------------------------------------------
+    # 색인
+    # --------------------------------------------------
+    @classmethod
+    def build(cls, reviews):
+        """reviews: [(제품명, 리뷰, 평점)] — 제품 순서대로 묶어서 문서 id 부여"""
+        order = {}
+        for product, _, _ in reviews:
+            order.setdefault(product, len(order))
+        docs = sorted(reviews, key=lambda r: order[r[0]])   # 안정 정렬 → 같은 제품 안에서는 원래 순서
+
+        products = {}
+        vocab = {}
+        term_docs = []      # 색인어 id별 [(문서 id, tf)]
+        lengths = np.zeros(len(docs), dtype=np.float32)
+        for doc_id, (product, text, _) in enumerate(docs):
+            products.setdefault(product, [doc_id, doc_id])[1] = doc_id + 1
+            counts = Counter(ngrams(text))
+            lengths[doc_id] = sum(counts.values())
+            for gram, tf in counts.items():
+                term = vocab.get(gram)
+                if term is None:
+                    term = vocab[gram] = len(term_docs)
+                    term_docs.append([])
+                term_docs[term].append((doc_id, tf))
+
+        n_docs = len(docs)
+        avgdl = float(lengths.mean()) if n_docs else 0.0
+        indptr = np.zeros(len(term_docs) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in term_docs])
+        doc_ids = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        idf = np.empty(len(term_docs), dtype=np.float32)
+        for term, postings in enumerate(term_docs):
+            lo, hi = indptr[term], indptr[term + 1]
+            doc_ids[lo:hi] = [d for d, _ in postings]
+            tfs[lo:hi] = [tf for _, tf in postings]
+            df = len(postings)
+            idf[term] = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        term_of_posting = np.repeat(np.arange(len(term_docs)), np.diff(indptr))
+        norm = K1 * (1.0 - B + B * lengths[doc_ids] / max(avgdl, 1e-9))
+        weights = (idf[term_of_posting] * tfs * (K1 + 1.0) / (tfs + norm)).astype(np.float32)
+
+        encoded = [text.encode("utf-8") for _, text, _ in docs]
+        offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded])
+        texts = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        ratings = np.array(
+            [np.nan if r is None else float(r) for _, _, r in docs], dtype=np.float32
+        )
+        products = {name: tuple(span) for name, span in products.items()}
+        return cls(vocab, indptr, doc_ids, weights, products, texts, offsets, ratings, {"avgdl": avgdl})
+
+    # --------------------------------------------------
+    # 검색
+    # --------------------------------------------------
+    def review(self, doc_id, score=0.0):
+        text = bytes(self.texts[self.offsets[doc_id]:self.offsets[doc_id + 1]]).decode("utf-8")
+        rating = float(self.ratings[doc_id])
+        return Review(text, None if np.isnan(rating) else rating, score)
+
+    def search(self, product, query, k=4):
+        """product 리뷰 중 query와 관련 높은 순서로 최대 k개 (점수 0인 리뷰는 제외)"""
+        span = self.products.get(product)
+        if span is None or k <= 0:
+            return []
+        start, end = span
+        terms = {self.vocab[g] for g in ngrams(query) if g in self.vocab}
+        if not terms:
+            return []
+
+        local, weights = [], []
+        for term in terms:
+            lo, hi = self.indptr[term], self.indptr[term + 1]
+            ids = self.doc_ids[lo:hi]
+            # 게시 목록은 문서 id 오름차순 → 이 제품 구간만 이분 탐색으로 잘라냄
+            a, b = np.searchsorted(ids, (start, end))
+            if a < b:
+                local.append(ids[a:b] - start)
+                weights.append(self.weights[lo + a:lo + b])
+        if not local:
+            return []
+
+        scores = np.bincount(np.concatenate(local), weights=np.concatenate(weights), minlength=end - start)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")][:k]
+        return [self.review(start + int(i), float(scores[i])) for i in top]
+
+    # --------------------------------------------------
+    # 저장 / 불러오기
+    # --------------------------------------------------
+    ARRAYS = ("indptr", "doc_ids", "weights", "texts", "offsets", "ratings")
+    KEEP_GENERATIONS = 2
+
+    def save(self, directory, source=None):
+        """
+        배열은 새 하위 디렉터리(세대)에 .npy로 쓰고, 다 쓴 뒤 meta.json을 os.replace로 교체해서 그 세대를 가리킴.
+        이미 mmap으로 열려 있는 이전 세대 파일은 덮어쓰지 않음 (같은 디렉터리를 앱과 배치 작업이 함께 써도 안전).
+        오래된 세대는 최근 KEEP_GENERATIONS개만 남기고 삭제 (POSIX에서는 열려 있는 mmap도 그대로 유효).
+        """
+        os.makedirs(directory, exist_ok=True)
+        generation = f"gen-{time.time_ns()}-{os.getpid()}"
+        os.makedirs(os.path.join(directory, generation))
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, generation, f"{name}.npy"), getattr(self, name))
+        meta = dict(self.meta, version=INDEX_VERSION, ngram_sizes=list(NGRAM_SIZES), k1=K1, b=B,
+                    products=self.products, vocab=self.vocab, source=source, built=time.time(),
+                    generation=generation)
+        tmp = os.path.join(directory, f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+        self._prune(directory, keep=generation)
+
+    @classmethod
+    def _prune(cls, directory, keep):
+        generations = sorted(
+            (d for d in os.listdir(directory) if d.startswith("gen-") and d != keep),
+            key=lambda d: int(d.split("-")[1]),
+        )
+        # 방금 교체 직전에 meta.json을 읽은 프로세스가 있을 수 있으므로 직전 세대까지는 남김
+        for old in generations[:max(0, len(generations) - (cls.KEEP_GENERATIONS - 1))]:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"{directory}: 인덱스 버전 {meta.get('version')} ≠ {INDEX_VERSION}")
+        folder = os.path.join(directory, meta["generation"])
+        arrays = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r") for name in cls.ARRAYS}
+        vocab = meta.pop("vocab")
+        products = {name: tuple(span) for name, span in meta.pop("products").items()}
+        return cls(vocab=vocab, products=products, meta=meta, **arrays)
+
+    @classmethod
+    def open(cls, reviews_path, directory):
+        """
+        directory의 인덱스가 reviews_path와 같은 원본(mtime/크기)으로 만들어졌으면 mmap으로 열고,
+        아니면 새로 만들어 저장. reviews_path가 없으면 None.
+        """
+        try:
+            st = os.stat(reviews_path)
+        except OSError:
+            return None
+        source = {"path": os.path.abspath(reviews_path), "mtime": st.st_mtime, "size": st.st_size}
+        try:
+            index = cls.load(directory)
+            if index.meta.get("source") == source:
+                return index
+        except (OSError, ValueError):
+            pass
+        index = cls.build(read_reviews(reviews_path))
+        index.save(directory, source=source)
+        return cls.load(directory)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("reviews", help="리뷰 JSONL ({product, text, rating})")
+    parser.add_argument("--out", default=os.path.join(here, "runtime", "review_index"))
+    parser.add_argument("--query", nargs=2, metavar=("PRODUCT", "QUESTION"), help="색인 후 검색 결과 출력")
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--seed", metavar="CATALOG", help="카탈로그로 기본 리뷰 파일(reviews)을 다시 만든 뒤 색인")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        write_reviews(args.reviews, seed_reviews(args.seed))
+    started = time.perf_counter()
+    index = ReviewIndex.open(args.reviews, args.out)
+    print(f"{len(index)} review(s), {len(index.vocab)} n-gram(s), {len(index.products)} product(s) "
+          f"→ {args.out} ({time.perf_counter() - started:.2f}s)")
+    if args.query:
+        for r in index.search(args.query[0], args.query[1], k=args.k):
+            print(f"{r.score:7.3f}  {r.snippet()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
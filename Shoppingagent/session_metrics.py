@@ -0,0 +1,251 @@
+"""
+세션 요약 지표 집계 (온라인 + 오프라인 공용).
+
+앱에서는 log_event가 이벤트마다 SessionAggregator.update()를 호출해 카운터만 갱신하고,
+요약 row는 summary_row()로 언제든 바로 만든다.
+
+오프라인에서는 B_raw JSONL/CSV export를 한 번만 훑어서 모든 세션의 요약을 다시 계산:
+
+    python session_metrics.py b_raw.jsonl --out session_summary.csv
+"""
+import argparse
+import csv
+import json
+import sys
+
+
+# log_event가 만드는 entry의 컬럼 순서 (= B_raw 시트 컬럼 순서)
+EVENT_COLUMNS = (
+    "timestamp", "session_id", "condition", "user_name", "phase", "event_type", "source",
+    "text", "value", "new_value", "old_value", "index", "memory_count", "seq",
+)
+
+# session_summary 시트 컬럼 순서 (summary_row와 동일)
+SUMMARY_COLUMNS = (
+    "session_id", "nickname", "phone_number", "primary_style", "condition",
+    "total_turns", "explore_turns", "summary_turns", "compare_turns", "detail_turns",
+    "mem_add", "mem_delete", "mem_update", "mem_edit_total",
+    "user_add_count", "user_delete_count", "human_edit_total",
+    "total_duration", "final_choice", "decision_time",
+)
+
+# phase → 턴 수 컬럼
+_PHASE_TURNS = {
+    "explore": "explore_turns",
+    "summary": "summary_turns",
+    "comparison": "compare_turns",
+    "product_detail": "detail_turns",
+}
+
+
+class SessionAggregator:
+    """
+    한 세션의 요약 지표를 이벤트 하나당 O(1)로 갱신하는 누적 카운터.
+    write_session_summary가 logs를 여러 번 훑던 계산과 같은 값을 낸다.
+    """
+
+    __slots__ = (
+        "events", "total_turns", "phase_turns",
+        "mem_add", "mem_delete", "mem_update",
+        "user_add_count", "user_delete_count",
+        "first_ts", "last_ts",
+        "final_choice", "final_ts", "reco_ts",
+        "user_name", "condition",
+    )
+
+    def __init__(self):
+        self.events = 0
+        self.total_turns = 0
+        self.phase_turns = dict.fromkeys(_PHASE_TURNS.values(), 0)
+        self.mem_add = 0
+        self.mem_delete = 0
+        self.mem_update = 0
+        self.user_add_count = 0
+        self.user_delete_count = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.final_choice = None      # 첫 final_decision의 value
+        self.final_ts = None
+        self.reco_ts = None           # 첫 show_candidates 시각
+        self.user_name = ""
+        self.condition = ""
+
+    @classmethod
+    def from_events(cls, entries):
+        agg = cls()
+        for e in entries:
+            agg.update(e)
+        return agg
+
+    def update(self, e):
+        self.events += 1
+        etype = e["event_type"]
+
+        # ---- TURN COUNTS ----
+        if etype == "user_message":
+            self.total_turns += 1
+            col = _PHASE_TURNS.get(e["phase"])
+            if col:
+                self.phase_turns[col] += 1
+        elif etype == "assistant_message":
+            self.total_turns += 1
+
+        # ---- MEMORY EDIT COUNTS ----
+        elif etype == "memory_add":
+            self.mem_add += 1
+            if e.get("source") == "user":
+                self.user_add_count += 1
+        elif etype == "memory_delete":
+            self.mem_delete += 1
+            if e.get("source") == "user":
+                self.user_delete_count += 1
+        elif etype == "memory_update":
+            self.mem_update += 1
+
+        # ---- 첫 추천 / 첫 최종 결정 ----
+        elif etype == "final_decision":
+            if self.final_ts is None:
+                self.final_choice = e["value"]
+                self.final_ts = e["timestamp"]
+        elif etype == "show_candidates":
+            if self.reco_ts is None:
+                self.reco_ts = e["timestamp"]
+
+        # ---- TIME ----
+        ts = e["timestamp"]
+        if self.first_ts is None or ts < self.first_ts:
+            self.first_ts = ts
+        if self.last_ts is None or ts > self.last_ts:
+            self.last_ts = ts
+
+        if e.get("user_name"):
+            self.user_name = e["user_name"]
+        if e.get("condition"):
+            self.condition = e["condition"]
+
+    def summary_row(self, session_id, nickname, phone_number, primary_style, condition):
+        """session_summary 시트에 들어갈 row (SUMMARY_COLUMNS 순서)"""
+        mem_edit_total = self.mem_add + self.mem_delete + self.mem_update
+        total_duration = self.last_ts - self.first_ts if self.events else 0
+        final_choice = self.final_choice if self.final_ts is not None else ""
+        decision_time = (
+            self.final_ts - self.reco_ts
+            if self.final_ts is not None and self.reco_ts is not None
+            else ""
+        )
+        return [
+            session_id,
+            nickname,
+            phone_number,
+            primary_style,
+            condition,
+            self.total_turns,
+            self.phase_turns["explore_turns"],
+            self.phase_turns["summary_turns"],
+            self.phase_turns["compare_turns"],
+            self.phase_turns["detail_turns"],
+            self.mem_add,
+            self.mem_delete,
+            self.mem_update,
+            mem_edit_total,
+            self.user_add_count,
+            self.user_delete_count,
+            self.user_add_count + self.user_delete_count,
+            total_duration,
+            final_choice,
+            decision_time,
+        ]
+
+
+# ======================================================
+# 오프라인 재계산 (B_raw export → session_summary)
+# ======================================================
+def _coerce(entry):
+    """export에서 문자열이 된 timestamp를 숫자로"""
+    ts = entry.get("timestamp")
+    if isinstance(ts, str):
+        entry["timestamp"] = float(ts)
+    return entry
+
+
+def iter_events(path):
+    """
+    B_raw export 파일의 이벤트 dict를 순서대로 반환.
+    - .jsonl: entry dict 한 줄씩 (또는 시트 row 그대로의 JSON 배열)
+    - .csv: 시트 export (첫 줄이 헤더면 헤더 사용, 아니면 EVENT_COLUMNS 순서)
+    """
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return
+            if first and first[0] == "timestamp":
+                header = first
+            else:
+                header = EVENT_COLUMNS
+                yield _coerce(dict(zip(header, first)))
+            for row in reader:
+                if row:
+                    yield _coerce(dict(zip(header, row)))
+        return
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if isinstance(obj, list):
+                obj = dict(zip(EVENT_COLUMNS, obj))
+            yield _coerce(obj)
+
+
+def aggregate_events(events):
+    """이벤트 스트림 한 번 순회 → {session_id: SessionAggregator} (세션 등장 순서 유지)"""
+    sessions = {}
+    for e in events:
+        sid = e["session_id"]
+        agg = sessions.get(sid)
+        if agg is None:
+            agg = sessions[sid] = SessionAggregator()
+        agg.update(e)
+    return sessions
+
+
+def offline_summary_rows(events):
+    """
+    export에서 다시 만든 요약 row들.
+    phone_number / primary_style은 B_raw에 기록되지 않으므로 빈 값.
+    """
+    for sid, agg in aggregate_events(events).items():
+        yield agg.summary_row(sid, agg.user_name, "", "", agg.condition)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="B_raw export로 session_summary 다시 계산")
+    parser.add_argument("paths", nargs="+", help="B_raw export 파일 (.jsonl / .csv)")
+    parser.add_argument("--out", help="결과 CSV 경로 (생략하면 stdout)")
+    args = parser.parse_args(argv)
+
+    def events():
+        for path in args.paths:
+            yield from iter_events(path)
+
+    out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(SUMMARY_COLUMNS)
+        n = 0
+        for row in offline_summary_rows(events()):
+            writer.writerow(row)
+            n += 1
+    finally:
+        if args.out:
+            out.close()
+    print(f"{n} session(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+# ======================================================
+# 세션 상태 영속 저장소 (SQLite / 파일 기반 KV)
+# ======================================================
+# 길게 늘어나기만 하는 리스트 → 새로 붙은 항목만 append
+APPEND_KEYS = ("messages", "logs", "turn_timings")
+
+_SID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionStoreError(ValueError):
+    """세션 저장/복원 오류"""
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def check_session_id(session_id):
+    """쿼리 파라미터로 들어온 sid는 파일 경로/키로도 쓰이므로 형식 확인"""
+    if not isinstance(session_id, str) or not _SID_PATTERN.match(session_id):
+        raise SessionStoreError(f"잘못된 session_id: {session_id!r}")
+    return session_id
+
+
+class SessionStore:
+    """
+    세션 하나 = 상태 blob 1개 + APPEND_KEYS 리스트별 항목 (seq 순서).
+    save()는 바뀐 부분만 기록:
+    - 리스트: 지난번 저장 이후 새로 붙은 항목만 append (길이가 줄었으면 그 위치부터 잘라냄)
+      (앱에서 messages/logs는 append만 하므로, 이미 저장된 항목을 제자리에서 바꾼 건 반영하지 않음)
+    - 나머지 값: JSON 해시가 달라졌을 때만 통째로 교체 (작은 dict라 부담 없음)
+    하위 클래스는 _read_state / _write_state / _read_items / _append_items / _truncate / _count 구현.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}     # session_id → {"state_hash": str, "counts": {kind: n}}
+
+    # --------------------------------------------------
+    # 공개 API
+    # --------------------------------------------------
+    def load(self, session_id):
+        """저장된 세션 상태 dict (없으면 None)"""
+        check_session_id(session_id)
+        with self._lock:
+            state = self._read_state(session_id)
+            if state is None:
+                return None
+            counts = {}
+            for kind in APPEND_KEYS:
+                items = self._read_items(session_id, kind)
+                state[kind] = items
+                counts[kind] = len(items)
+            self._meta[session_id] = {
+                "state_hash": self._state_hash(state),
+                "counts": counts,
+            }
+            return state
+
+    def save(self, session_id, state):
+        """state(dict)를 이전 저장분과 비교해 증분 기록. 기록한 항목 수 반환"""
+        check_session_id(session_id)
+        written = 0
+        with self._lock:
+            meta = self._meta.get(session_id)
+            if meta is None:
+                # 이 프로세스에서 처음 보는 세션 → 저장소에 있는 길이부터 이어서 기록
+                meta = self._meta[session_id] = {
+                    "state_hash": None,
+                    "counts": {kind: self._count(session_id, kind) for kind in APPEND_KEYS},
+                }
+
+            for kind in APPEND_KEYS:
+                items = state.get(kind) or []
+                done = meta["counts"].get(kind, 0)
+                if len(items) < done:
+                    self._truncate(session_id, kind, len(items))
+                    done = len(items)
+                if len(items) > done:
+                    self._append_items(session_id, kind, done, [_dumps(x) for x in items[done:]])
+                    written += len(items) - done
+                meta["counts"][kind] = len(items)
+
+            state_hash = self._state_hash(state)
+            if state_hash != meta["state_hash"]:
+                scalars = {k: v for k, v in state.items() if k not in APPEND_KEYS}
+                self._write_state(session_id, _dumps(scalars))
+                meta["state_hash"] = state_hash
+                written += 1
+        return written
+
+    def forget(self, session_id):
+        """프로세스 내 증분 기록 정보만 삭제 (저장된 데이터는 유지)"""
+        with self._lock:
+            self._meta.pop(session_id, None)
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _state_hash(state):
+        scalars = {k: v for k, v in state.items() if k not in APPEND_KEYS}
+        return hashlib.sha1(_dumps(scalars).encode("utf-8")).hexdigest()
+
+    # --------------------------------------------------
+    # 백엔드 구현
+    # --------------------------------------------------
+    def _read_state(self, session_id):
+        raise NotImplementedError
+
+    def _write_state(self, session_id, data):
+        raise NotImplementedError
+
+    def _read_items(self, session_id, kind):
+        raise NotImplementedError
+
+    def _append_items(self, session_id, kind, start_seq, rows):
+        raise NotImplementedError
+
+    def _truncate(self, session_id, kind, n):
+        raise NotImplementedError
+
+    def _count(self, session_id, kind):
+        raise NotImplementedError
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    단일 SQLite 파일. 같은 호스트의 여러 프로세스(레플리카)가 함께 써도 되도록 WAL 모드.
+    - sessions: session_id → 상태 blob
+    - session_items: (session_id, kind, seq) → 항목 JSON (append-only)
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_items ("
+            " session_id TEXT NOT NULL, kind TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, kind, seq)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def _read_state(self, session_id):
+        row = self._db.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write_state(self, session_id, data):
+        self._db.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+            (session_id, data, time.time()),
+        )
+        self._db.commit()
+
+    def _read_items(self, session_id, kind):
+        rows = self._db.execute(
+            "SELECT data FROM session_items WHERE session_id = ? AND kind = ? ORDER BY seq",
+            (session_id, kind),
+        ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def _append_items(self, session_id, kind, start_seq, rows):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO session_items (session_id, kind, seq, data) VALUES (?, ?, ?, ?)",
+            [(session_id, kind, start_seq + i, data) for i, data in enumerate(rows)],
+        )
+        self._db.commit()
+
+    def _truncate(self, session_id, kind, n):
+        self._db.execute(
+            "DELETE FROM session_items WHERE session_id = ? AND kind = ? AND seq >= ?",
+            (session_id, kind, n),
+        )
+        self._db.commit()
+
+    def _count(self, session_id, kind):
+        row = self._db.execute(
+            "SELECT COUNT(*) FROM session_items WHERE session_id = ? AND kind = ?",
+            (session_id, kind),
+        ).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class FileKVSessionStore(SessionStore):
+    """
+    공유 KV 저장소(Redis 등) 대신 쓰는 디렉터리 기반 구현. 공유 볼륨에 두면 레플리카 간 공유 가능.
+    - <dir>/<session_id>/state.json : 상태 blob (임시 파일 → rename으로 원자적 교체, KV의 SET)
+    - <dir>/<session_id>/<kind>.jsonl : [seq, 항목] 한 줄씩 append (KV의 RPUSH)
+    같은 seq가 두 번 기록되면 나중 줄이 우선, 크래시로 잘린 마지막 줄은 무시.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id, name):
+        return os.path.join(self.directory, session_id, name)
+
+    def _read_state(self, session_id):
+        path = self._path(session_id, "state.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self, session_id, data):
+        path = self._path(session_id, "state.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read_lines(self, session_id, kind):
+        path = self._path(session_id, f"{kind}.jsonl")
+        by_seq = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    try:
+                        seq, data = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    by_seq[seq] = data
+        return [by_seq[s] for s in sorted(by_seq)]
+
+    def _read_items(self, session_id, kind):
+        return self._read_lines(session_id, kind)
+
+    def _append_items(self, session_id, kind, start_seq, rows):
+        path = self._path(session_id, f"{kind}.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = "".join(f"[{start_seq + i},{data}]\n" for i, data in enumerate(rows))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _truncate(self, session_id, kind, n):
+        items = self._read_lines(session_id, kind)[:n]
+        path = self._path(session_id, f"{kind}.jsonl")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(f"[{i},{_dumps(x)}]\n" for i, x in enumerate(items)))
+        os.replace(tmp, path)
+
+    def _count(self, session_id, kind):
+        return len(self._read_lines(session_id, kind))
+
+
+def open_session_store(backend, path):
+    """SESSION_STORE 설정값 → 저장소 (off/none이면 None)"""
+    backend = (backend or "").lower()
+    if backend in ("", "off", "none", "0"):
+        return None
+    if backend == "sqlite":
+        return SQLiteSessionStore(path)
+    if backend in ("file", "kv"):
+        return FileKVSessionStore(path)
+    raise SessionStoreError(f"알 수 없는 SESSION_STORE: {backend}")
@@ -0,0 +1,95 @@
+import threading
+
+
+# ======================================================
+# 공용 Google Sheets 클라이언트 (프로세스 전체 공유)
+# ======================================================
+def _is_api_error(e):
+    """gspread APIError인지 (gspread를 import할 수 없는 스텁 환경이면 False → 원래 예외를 그대로 올림)"""
+    try:
+        from gspread.exceptions import APIError
+    except ImportError:
+        return False
+    return isinstance(e, APIError)
+
+
+class SheetsClient:
+    """
+    인증된 gspread 클라이언트 하나와 Spreadsheet/Worksheet 핸들을 캐시해서 재사용.
+    - gspread / requests는 처음 쓸 때 import (앱 첫 화면 로딩 시간에서 제외)
+    - 토큰 만료는 google-auth AuthorizedSession이 알아서 refresh
+    - 401/404 응답을 받으면 핸들(필요하면 인증까지)을 다시 만들고 한 번 더 시도
+    - 여러 Streamlit 세션/워커 스레드에서 동시에 써도 되도록 lock으로 보호
+    """
+
+    REBUILD_STATUS = (401, 404)
+
+    def __init__(self, client_factory, spreadsheet="shopping_logs", pool_maxsize=8):
+        # client_factory() → gspread.Client (인증 포함)
+        self._client_factory = client_factory
+        self.spreadsheet_name = spreadsheet
+        self.pool_maxsize = pool_maxsize
+
+        self._lock = threading.RLock()
+        self._client = None
+        self._spreadsheet = None
+        self._worksheets = {}
+
+    # --------------------------------------------------
+    # 핸들 캐시
+    # --------------------------------------------------
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                gc = self._client_factory()
+                self._mount_pool(gc)
+                self._client = gc
+            return self._client
+
+    def spreadsheet(self):
+        with self._lock:
+            if self._spreadsheet is None:
+                self._spreadsheet = self.client().open(self.spreadsheet_name)
+            return self._spreadsheet
+
+    def worksheet(self, name):
+        with self._lock:
+            ws = self._worksheets.get(name)
+            if ws is None:
+                ws = self.spreadsheet().worksheet(name)
+                self._worksheets[name] = ws
+            return ws
+
+    def invalidate(self, reauthorize=False):
+        """캐시된 핸들 버리기 (reauthorize=True면 인증 세션까지 새로)"""
+        with self._lock:
+            self._spreadsheet = None
+            self._worksheets = {}
+            if reauthorize:
+                self._client = None
+
+    def _mount_pool(self, gc):
+        # gspread 5.x: gc.session / 6.x: gc.http_client.session
+        session = getattr(gc, "session", None)
+        if session is None and hasattr(gc, "http_client"):
+            session = gc.http_client.session
+        if session is not None:
+            from requests.adapters import HTTPAdapter
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_maxsize)
+            session.mount("https://", adapter)
+
+    # --------------------------------------------------
+    # 쓰기
+    # --------------------------------------------------
+    def append_rows(self, name, rows):
+        """worksheet에 여러 줄 추가 (API 호출 1회). 핸들이 낡았으면 재생성 후 1회 재시도"""
+        try:
+            return self.worksheet(name).append_rows(rows, value_input_option="RAW")
+        except Exception as e:
+            if not _is_api_error(e):
+                raise
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status not in self.REBUILD_STATUS:
+                raise
+            self.invalidate(reauthorize=(status == 401))
+            return self.worksheet(name).append_rows(rows, value_input_option="RAW")
@@ -0,0 +1,139 @@
+"""
+OpenAI 호환 로컬 스텁 서버 (POST /v1/chat/completions, stream / non-stream).
+
+    python stub_server.py --cassette runtime/llm_cassette.jsonl --latency recorded --port 8787
+    OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=sk-local streamlit run app.py
+
+카세트를 주면 녹화된 응답을 재생하고, 없으면 stubs.default_responder로 응답.
+앱 코드는 그대로 두고 실제 OpenAI SDK의 HTTP 경로까지 포함해서 오프라인으로 측정할 때 사용.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cassette import Cassette, CassetteMiss
+from stubs import Latency, StubOpenAI, default_responder
+
+
+def _plain(obj):
+    """stubs._Obj 트리 → JSON으로 보낼 dict"""
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if hasattr(obj, "__dict__"):
+        return {k: _plain(v) for k, v in vars(obj).items()}
+    return obj
+
+
+def make_handler(client):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.split("?")[0].rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                return
+            try:
+                req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                res = client.chat.completions.create(
+                    model=req.get("model", "gpt-4o-mini"),
+                    messages=req.get("messages") or [],
+                    temperature=req.get("temperature"),
+                    stream=bool(req.get("stream")),
+                    stream_options=req.get("stream_options"),
+                )
+            except CassetteMiss as e:
+                self._send_json(404, {"error": {"message": f"cassette miss: {e}", "type": "cassette_miss"}})
+                return
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {"error": {"message": str(e), "type": "invalid_request_error"}})
+                return
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            created = int(time.time())
+            if not req.get("stream"):
+                payload = _plain(res)
+                payload.update(id=completion_id, object="chat.completion", created=created)
+                self._send_json(200, payload)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for chunk in res:
+                    payload = _plain(chunk)
+                    payload.update(
+                        id=completion_id, object="chat.completion.chunk", created=created, model=res.model
+                    )
+                    self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                res.close()     # 클라이언트가 스트림을 먼저 닫음
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(client, port=8787, addr="127.0.0.1"):
+    """데몬 스레드로 서버를 띄우고 server 객체를 돌려줌 (port=0이면 빈 포트 자동 선택 → server.server_port)"""
+    server = ThreadingHTTPServer((addr, port), make_handler(client))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"openai-stub-{server.server_port}", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cassette", help="재생할 카세트 (JSONL). 없으면 고정 응답")
+    parser.add_argument("--strict", action="store_true", help="카세트에 없는 요청은 404로 응답")
+    parser.add_argument("--latency", default="0.3", help="첫 토큰까지 지연(초) 또는 'recorded' (카세트 기록값에서 샘플링)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--token-interval", type=float, default=0.01, help="스트리밍 chunk 간격(초)")
+    parser.add_argument("--seed", type=int, help="recorded 지연 샘플링 시드")
+    parser.add_argument("--addr", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args(argv)
+
+    responder = None
+    if args.cassette:
+        cassette = Cassette(args.cassette)
+        responder = cassette.responder(strict=args.strict, fallback=default_responder)
+    if args.latency == "recorded":
+        if not args.cassette:
+            parser.error("--latency recorded needs --cassette")
+        latency = Latency(sampler=cassette.latency_sampler(args.seed))
+    else:
+        latency = Latency(float(args.latency), args.jitter, seed=args.seed)
+
+    client = StubOpenAI(responder=responder, latency=latency, token_interval=args.token_interval)
+    server = ThreadingHTTPServer((args.addr, args.port), make_handler(client))
+    server.daemon_threads = True
+    print(f"OpenAI stub on http://{args.addr}:{server.server_port}/v1"
+          + (f" ({len(cassette)} recorded call(s))" if args.cassette else ""))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+import json
+import random
+import threading
+import time
+
+
+# ======================================================
+# 부하 테스트 / 오프라인 실행용 OpenAI · gspread 스텁
+# ======================================================
+class Latency:
+    """
+    호출 지연 설정. base 초 + [0, jitter) 균등 분포.
+    sampler를 주면 sampler()가 돌려주는 값을 그대로 사용 (녹화된 지연 재생 등).
+    """
+
+    def __init__(self, base=0.0, jitter=0.0, sampler=None, seed=None):
+        self.base = base
+        self.jitter = jitter
+        self.sampler = sampler
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        if self.sampler is not None:
+            return max(0.0, self.sampler())
+        if not self.jitter:
+            return self.base
+        with self._lock:
+            return self.base + self._rnd.random() * self.jitter
+
+    def sleep(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+def estimate_tokens(text):
+    """토큰 수 대략치 (한글 위주 텍스트 기준 2글자 ≈ 1토큰)"""
+    return max(1, len(text or "") // 2)
+
+
+# --------------------------------------------------
+# OpenAI 응답 객체 (chat.completions 응답에서 앱이 쓰는 속성만)
+# --------------------------------------------------
+class _Obj:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+def make_usage(prompt_tokens, completion_tokens, cached_tokens=0):
+    return _Obj(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        prompt_tokens_details=_Obj(cached_tokens=cached_tokens),
+    )
+
+
+class PromptCacheSim:
+    """
+    OpenAI 프롬프트 캐시 흉내: 앞서 보낸 요청과 같은 접두부가 min_tokens 이상이면
+    그 길이만큼(step 토큰 단위로 내림) cached_tokens로 보고. 토큰 수는 estimate_tokens와 같은 2글자 ≈ 1토큰.
+    """
+
+    def __init__(self, min_tokens=1024, step=128, max_entries=200_000):
+        self.min_tokens = min_tokens
+        self.step = step
+        self.max_entries = max_entries
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, messages):
+        text = "".join(f"{m.get('role', '')}\n{m.get('content', '')}\n" for m in messages)
+        keys = [hash(text[:n]) for n in range(self.min_tokens * 2, len(text) + 1, self.step * 2)]
+        cached = 0
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key not in self._seen:
+                    break
+                cached = self.min_tokens + i * self.step
+            if len(self._seen) + len(keys) > self.max_entries:
+                self._seen.clear()
+            self._seen.update(keys)
+        return cached
+
+
+def make_completion(content, model, prompt_tokens, completion_tokens=None, cached_tokens=0):
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(content)
+    usage = make_usage(prompt_tokens, completion_tokens, cached_tokens)
+    message = _Obj(role="assistant", content=content)
+    return _Obj(
+        id="chatcmpl-stub",
+        model=model,
+        choices=[_Obj(index=0, message=message, finish_reason="stop")],
+        usage=usage,
+    )
+
+
+class StubStream:
+    """stream=True 응답. chunk_chars 글자씩 token_interval 간격으로 delta 전달"""
+
+    def __init__(self, content, model, prompt_tokens, include_usage=False, chunk_chars=4, token_interval=0.0,
+                 completion_tokens=None, cached_tokens=0):
+        self.content = content
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self.completion_tokens = estimate_tokens(content) if completion_tokens is None else completion_tokens
+        self.include_usage = include_usage
+        self.chunk_chars = chunk_chars
+        self.token_interval = token_interval
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(0, len(self.content), self.chunk_chars):
+            if self.closed:
+                return
+            if self.token_interval:
+                time.sleep(self.token_interval)
+            delta = _Obj(role="assistant", content=self.content[i:i + self.chunk_chars])
+            yield _Obj(choices=[_Obj(index=0, delta=delta, finish_reason=None)], usage=None)
+        # 실제 API처럼 마지막 chunk에 finish_reason (usage chunk는 그 뒤)
+        yield _Obj(choices=[_Obj(index=0, delta=_Obj(role=None, content=None), finish_reason="stop")], usage=None)
+        if self.include_usage:
+            yield _Obj(choices=[], usage=make_usage(self.prompt_tokens, self.completion_tokens, self.cached_tokens))
+
+    def close(self):
+        self.closed = True
+
+
+def default_responder(messages, **kwargs):
+    """프롬프트 종류만 보고 그럴듯한 고정 응답 (부하 테스트용)"""
+    prompt = messages[-1]["content"] if messages else ""
+    if '"memories"' in prompt:
+        # 메모리 추출: 규칙 기반 추출이 대부분 처리하므로 LLM 경로는 '추가 없음'
+        return json.dumps({"memories": []}, ensure_ascii=False)
+    if "product_detail" in prompt:
+        return "이 제품은 배터리가 오래가고 착용감이 가벼운 편이에요. 다른 부분도 더 궁금하신가요?"
+    return "말씀해주셔서 감사해요! 착용감과 음질 중 어떤 쪽이 더 중요하신가요?"
+
+
+class StubOpenAI:
+    """
+    OpenAI() 대신 쓰는 클라이언트. client.chat.completions.create(...)만 지원.
+    - responder(messages, **kwargs) → 응답 텍스트
+      (또는 {"content": ..., "usage": {...}} — 녹화된 토큰 수를 그대로 돌려줄 때)
+    - latency: 요청 ~ 첫 토큰까지 지연 (Latency 또는 초 단위 숫자)
+    - token_interval: 스트리밍 chunk 사이 간격
+    - prompt_cache: 녹화된 cached_tokens가 없을 때 PromptCacheSim으로 계산 (None이면 항상 0)
+    """
+
+    def __init__(self, responder=None, latency=0.0, token_interval=0.0, prompt_cache=True):
+        self.responder = responder or default_responder
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency)
+        self.token_interval = token_interval
+        self.prompt_cache = PromptCacheSim() if prompt_cache is True else prompt_cache or None
+        self.chat = _Obj(completions=_Obj(create=self.create))
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, stream=False, stream_options=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        self.latency.sleep()
+        reply = self.responder(messages, model=model, **kwargs)
+        usage = {}
+        if isinstance(reply, dict):
+            reply, usage = reply["content"], reply.get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = usage.get("completion_tokens")
+        cached_tokens = usage.get("cached_tokens")
+        if cached_tokens is None:
+            cached_tokens = self.prompt_cache.cached_tokens(messages) if self.prompt_cache else 0
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        if stream:
+            return StubStream(
+                reply,
+                model,
+                prompt_tokens,
+                include_usage=bool((stream_options or {}).get("include_usage")),
+                token_interval=self.token_interval,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+            )
+        return make_completion(reply, model, prompt_tokens, completion_tokens, cached_tokens)
+
+
+# --------------------------------------------------
+# gspread 스텁
+# --------------------------------------------------
+class StubWorksheet:
+    def __init__(self, title, latency, keep_rows=True):
+        self.title = title
+        self.latency = latency
+        self.keep_rows = keep_rows
+        self.rows = []
+        self.row_count = 0
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows, value_input_option=None, **kwargs):
+        self.latency.sleep()
+        with self._lock:
+            self.row_count += len(rows)
+            if self.keep_rows:
+                self.rows.extend(list(r) for r in rows)
+
+    def append_row(self, row, value_input_option=None, **kwargs):
+        self.append_rows([row], value_input_option=value_input_option)
+
+    def get_all_values(self):
+        with self._lock:
+            return [[str(v) for v in r] for r in self.rows]
+
+
+class StubSpreadsheet:
+    def __init__(self, title, latency, keep_rows=True):
+        self.title = title
+        self._latency = latency
+        self._keep_rows = keep_rows
+        self._worksheets = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, name):
+        with self._lock:
+            ws = self._worksheets.get(name)
+            if ws is None:
+                ws = self._worksheets[name] = StubWorksheet(name, self._latency, self._keep_rows)
+            return ws
+
+
+class StubGSpreadClient:
+    """gspread.authorize(...) 결과 대신 쓰는 클라이언트. 시트 내용은 프로세스 메모리에만 보관"""
+
+    def __init__(self, latency=0.0, keep_rows=True):
+        self.latency = latency if isinstance(latency, Latency) else Latency(latency)
+        self.keep_rows = keep_rows
+        self._spreadsheets = {}
+        self._lock = threading.Lock()
+
+    def open(self, title):
+        with self._lock:
+            ss = self._spreadsheets.get(title)
+            if ss is None:
+                ss = self._spreadsheets[title] = StubSpreadsheet(title, self.latency, self.keep_rows)
+            return ss
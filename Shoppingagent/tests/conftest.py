@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 테스트는 Shoppingagent/ 안의 모듈을 그대로 import (benchmarks/와 같은 방식)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
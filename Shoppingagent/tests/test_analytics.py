@@ -0,0 +1,101 @@
+"""
+analytics.session_summary(pandas)와 session_metrics.offline_summary_rows(SessionAggregator)가
+같은 B_raw export에서 같은 session_summary 값을 내는지.
+"""
+import json
+import math
+import random
+import sys
+
+import pytest
+
+from analytics import read_events, session_summary, write_frame
+from session_metrics import EVENT_COLUMNS, SUMMARY_COLUMNS, iter_events, offline_summary_rows
+
+
+def event(sid, ts, event_type, phase="explore", source="agent", value="", user_name="", condition="B", seq=0):
+    e = dict.fromkeys(EVENT_COLUMNS, "")
+    e.update(timestamp=ts, session_id=sid, condition=condition, user_name=user_name, phase=phase,
+             event_type=event_type, source=source, value=value, seq=seq)
+    return e
+
+
+def synthetic_export(seed=0):
+    """세션별로는 기록 순서대로, 세션 사이는 무작위로 끼워 넣은 이벤트 목록"""
+    rnd = random.Random(seed)
+    sessions = {}
+    # s1: 정상 흐름 (추천 → 결정), s2: 추천 없이 결정 (decision_time 빈 값), s3: 결정 없음
+    # s4: 시각이 뒤섞인 이벤트 + 추천/결정이 두 번 (첫 번째만 사용), s5: 이벤트 하나
+    for sid in ("s1", "s2", "s3", "s4"):
+        events = sessions[sid] = []
+        t = 1000.0 + rnd.random() * 100
+        events.append(event(sid, t, "session_start"))
+        for phase in ("explore", "summary", "comparison", "product_detail"):
+            for _ in range(rnd.randint(1, 3)):
+                t += rnd.uniform(1, 20)
+                events.append(event(sid, t, "user_message", phase=phase, source="user", user_name=f"{sid}-name"))
+                t += rnd.uniform(1, 5)
+                events.append(event(sid, t, "assistant_message", phase=phase))
+                if rnd.random() < 0.5:
+                    t += 1
+                    kind = rnd.choice(["memory_add", "memory_delete", "memory_update"])
+                    events.append(event(sid, t, kind, phase=phase, source=rnd.choice(["user", "agent"])))
+        if sid in ("s1", "s4"):
+            t += 3
+            events.append(event(sid, t, "show_candidates", phase="comparison"))
+        if sid in ("s1", "s2", "s4"):
+            t += 7.5
+            events.append(event(sid, t, "final_decision", phase="purchase_decision", value=f"{sid}-choice"))
+    # s4: 늦게 기록됐지만 시각은 가장 이른 이벤트, 시각이 거꾸로 된 두 번째 추천 / 결정
+    sessions["s4"] += [
+        event("s4", 900.0, "memory_add", source="user"),
+        event("s4", 2000.0, "show_candidates", phase="comparison"),
+        event("s4", 1990.0, "final_decision", phase="purchase_decision", value="second"),
+    ]
+    sessions["s5"] = [event("s5", 1500.0, "user_message", source="user", condition="")]
+
+    out = []
+    while sessions:
+        sid = rnd.choice(sorted(sessions))
+        out.append(sessions[sid].pop(0))
+        if not sessions[sid]:
+            del sessions[sid]
+    return out
+
+
+def normalize(value):
+    if value == "" or value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    return float(value)
+
+
+def test_pandas_summary_matches_aggregator(tmp_path):
+    path = tmp_path / "b_raw.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for e in synthetic_export():
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    expected = {row[0]: dict(zip(SUMMARY_COLUMNS, row)) for row in offline_summary_rows(iter_events(str(path)))}
+    frame = session_summary(read_events([str(path)]))
+    got = {row["session_id"]: row for row in frame.to_dict("records")}
+
+    assert list(frame.columns) == list(SUMMARY_COLUMNS)
+    assert list(got) == list(expected)
+    assert expected["s2"]["decision_time"] == "" and expected["s3"]["final_choice"] == ""
+    assert expected["s4"]["final_choice"] != "second"
+    for sid, row in expected.items():
+        for col in SUMMARY_COLUMNS:
+            a, b = normalize(got[sid][col]), normalize(row[col])
+            if isinstance(b, float):
+                assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), (sid, col, a, b)
+            else:
+                assert a == b, (sid, col, a, b)
+
+
+def test_parquet_output_without_pyarrow_is_a_clear_error(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)     # import pyarrow → ImportError
+    frame = session_summary(read_events([]))
+    with pytest.raises(ValueError, match="pyarrow"):
+        write_frame(frame, str(tmp_path / "sessions.parquet"))
@@ -0,0 +1,81 @@
+"""
+chat_render.TranscriptRenderer: rerun 때 새로 추가되거나 바뀐 메시지만 다시 렌더링하고, 결과 HTML은 전체 재생성과 같은지.
+"""
+import html
+
+from chat_render import TranscriptRenderer, bubble_html
+
+
+def full_render(messages, extra=()):
+    """변경 전 render_chat처럼 매번 전체를 새로 만든 HTML"""
+    body = ""
+    for msg in messages:
+        safe = html.escape(msg["content"]).replace("\n", "<br>")
+        cls = "chat-bubble-ai" if msg["role"] == "assistant" else "chat-bubble-user"
+        body += f"<div class='chat-bubble {cls}'>{safe}</div>"
+    tail = "".join(bubble_html(role, content, cursor) for role, content, cursor in extra)
+    return f"<div class='chat-display-area'>{body}{tail}</div>"
+
+
+def make_messages(n):
+    return [
+        {"role": "assistant" if i % 2 == 0 else "user", "content": f"메시지 {i} <b>&\n줄바꿈"}
+        for i in range(n)
+    ]
+
+
+def test_only_new_messages_are_rendered():
+    renderer = TranscriptRenderer()
+    messages = make_messages(10)
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 10
+
+    # 변경 없는 rerun
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 10
+
+    # 메시지 2개 추가 → 2개만
+    messages += make_messages(12)[10:]
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 12
+
+
+def test_changed_message_rerenders_from_that_position():
+    renderer = TranscriptRenderer()
+    messages = make_messages(10)
+    renderer.render(messages)
+
+    messages[7] = {"role": "assistant", "content": "수정된 메시지"}
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 10 + 3       # 7, 8, 9
+
+    messages[3] = dict(messages[3], role="assistant")    # 같은 내용이어도 role이 바뀌면 다시
+    renderer.render(messages)
+    assert renderer.rendered == 13 + 7
+
+
+def test_removed_messages_are_dropped_without_rerendering():
+    renderer = TranscriptRenderer()
+    messages = make_messages(10)
+    renderer.render(messages)
+    del messages[6:]
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 10
+
+
+def test_extra_bubbles_are_not_cached():
+    renderer = TranscriptRenderer()
+    messages = make_messages(3)
+    extra = [("assistant", "스트리밍 중", "▌")]
+    assert renderer.render(messages, extra=extra) == full_render(messages, extra)
+    assert renderer.render(messages) == full_render(messages)
+    assert renderer.rendered == 3
+
+
+def test_window_shows_latest_messages_only():
+    renderer = TranscriptRenderer()
+    messages = make_messages(10)
+    assert renderer.render(messages, window=4) == full_render(messages[-4:])
+    assert renderer.render(messages, window=50) == full_render(messages)
+    assert renderer.render(messages, window=None) == full_render(messages)
+    assert renderer.rendered == 10
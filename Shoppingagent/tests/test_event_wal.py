@@ -0,0 +1,122 @@
+"""
+event_wal: 세그먼트를 첫 기록 때만 여는지, 크래시 후 재전송이 (session_id, seq) 기준으로 한 번만 일어나는지.
+"""
+import glob
+import os
+
+import pytest
+
+from event_wal import EventWAL, event_key, replay_unsent
+
+
+def make_entry(session_id, seq):
+    # log_event와 같이 session_id는 2번째, seq는 마지막 컬럼
+    return {"timestamp": 1000.0 + seq, "session_id": session_id, "event_type": "user_message", "seq": seq}
+
+
+class FakeSheets:
+    def __init__(self):
+        self.rows = {}
+        self.reads = 0
+
+    def append_rows(self, sheet, rows):
+        self.rows.setdefault(sheet, []).extend(rows)
+
+    def worksheet(self, sheet):
+        fake = self
+
+        class Worksheet:
+            def get_all_values(self):
+                fake.reads += 1
+                return list(fake.rows.get(sheet, []))
+
+        return Worksheet()
+
+    def keys(self, sheet="B_raw"):
+        return [event_key(r[1], r[-1]) for r in self.rows.get(sheet, [])]
+
+
+def segment_files(directory):
+    return sorted(glob.glob(os.path.join(directory, EventWAL.SEGMENT_GLOB)))
+
+
+@pytest.fixture
+def wals():
+    opened = []
+
+    def open_wal(directory):
+        wal = EventWAL(str(directory))
+        opened.append(wal)
+        return wal
+
+    yield open_wal
+    for wal in opened:
+        wal.close()
+
+
+def crash(wal):
+    """close() 없이 프로세스가 죽은 것처럼: 기록은 OS 버퍼까지만, 마지막 줄은 잘림"""
+    wal.sync()
+    with open(wal._segment_path, "a", encoding="utf-8") as f:
+        f.write('{"session_id": "s1", "seq"')
+    wal._stop.set()
+
+
+def test_no_segment_until_first_append(tmp_path, wals):
+    wal = wals(tmp_path)
+    wal.close()
+    wals(tmp_path).close()
+    assert segment_files(tmp_path) == []
+
+    wal = wals(tmp_path)
+    wal.append(make_entry("s1", 1))
+    wal.close()
+    assert [os.path.basename(p) for p in segment_files(tmp_path)] == ["segment-000001.jsonl"]
+
+
+def test_replay_after_crash_sends_each_event_once(tmp_path, wals):
+    # 1) 첫 프로세스: 5개 기록, 앞 2개만 시트 전송 + sent.keys 기록 후 크래시
+    sheets = FakeSheets()
+    wal = wals(tmp_path)
+    entries = [make_entry("s1", i) for i in range(1, 6)]
+    for e in entries:
+        wal.append(e)
+    sheets.append_rows("B_raw", [list(e.values()) for e in entries[:2]])
+    wal.mark_sent([event_key("s1", 1), event_key("s1", 2)])
+    crash(wal)
+
+    # 2) 재시작: 남은 3개만 재전송, 시트는 읽지 않음
+    assert replay_unsent(wals(tmp_path), sheets) == 3
+    assert sheets.reads == 0
+    assert sheets.keys() == [event_key("s1", i) for i in range(1, 6)]
+
+    # 3) 다시 재시작해도 (세그먼트가 compact로 지워졌든 아니든) 중복 전송 없음
+    assert replay_unsent(wals(tmp_path), sheets) == 0
+    assert sorted(sheets.keys()) == sorted(set(sheets.keys()))
+    assert segment_files(tmp_path) == []
+
+
+def test_check_sheet_skips_events_sent_before_mark(tmp_path, wals):
+    # 시트 전송은 끝났는데 sent.keys 기록 전에 죽은 경우
+    sheets = FakeSheets()
+    wal = wals(tmp_path)
+    entries = [make_entry("s2", i) for i in range(1, 4)]
+    for e in entries:
+        wal.append(e)
+    sheets.append_rows("B_raw", [list(entries[0].values())])
+    crash(wal)
+
+    assert replay_unsent(wals(tmp_path), sheets, check_sheet=True) == 2
+    assert sheets.reads == 1
+    assert sheets.keys() == [event_key("s2", i) for i in range(1, 4)]
+    assert replay_unsent(wals(tmp_path), sheets, check_sheet=True) == 0
+
+
+def test_live_segment_is_not_replayed(tmp_path, wals):
+    # 이번 프로세스가 기록 중인 이벤트는 shipper가 보내므로 replay 대상이 아님
+    sheets = FakeSheets()
+    wal = wals(tmp_path)
+    wal.append(make_entry("s3", 1))
+    assert wal.closed_segments() == []
+    assert replay_unsent(wal, sheets) == 0
+    assert sheets.rows == {}
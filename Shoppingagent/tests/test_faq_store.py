@@ -0,0 +1,163 @@
+"""
+faq_store: 질문 의도 판별 / 저장된 답변 사용 조건 / 예산 초과 문구.
+저장된 답변은 사람이 검토하지 않고 그대로 나가므로, 확신이 없거나 제품 정보가 바뀐 경우에는 반드시 LLM으로 넘어가야 함.
+"""
+import json
+
+import pytest
+
+from faq_store import (
+    FAQ_INTENTS,
+    FAQ_VERSION,
+    MAX_QUESTION_CHARS,
+    FAQStore,
+    match_intent,
+    product_hash,
+    with_budget_notice,
+)
+
+PRODUCT = {
+    "name": "Sony WH-CH720N",
+    "brand": "Sony",
+    "price": 149000,
+    "color": ["블랙", "화이트"],
+    "rating": 4.5,
+    "tags": ["노이즈캔슬링", "가벼움"],
+    "review_one": "가볍고 배터리가 오래가요.",
+}
+
+
+def make_store(tmp_path, answers, product=PRODUCT):
+    path = tmp_path / "faq.jsonl"
+    FAQStore.write(str(path), [
+        {
+            "product": product["name"],
+            "intent": intent,
+            "question": FAQ_INTENTS[intent],
+            "product_hash": product_hash(product),
+            "answer": answer,
+        }
+        for intent, answer in answers.items()
+    ], model="stub")
+    return FAQStore(str(path), check_interval=0)
+
+
+# ======================================================
+# match_intent
+# ======================================================
+@pytest.mark.parametrize("intent, question", sorted(FAQ_INTENTS.items()))
+def test_representative_questions_are_confident(intent, question):
+    # 답변 생성에 쓰는 대표 질문은 자기 의도로 확실하게 판별되어야 함
+    assert match_intent(question) == (intent, 1.0)
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("배터리 오래 가?", "battery"),
+    ("착용감 괜찮아?", "comfort"),
+    ("단점이 뭐야?", "negative_review"),
+    ("ANC 성능은?", "noise_cancelling"),
+])
+def test_short_single_intent_question(question, intent):
+    assert match_intent(question) == (intent, 1.0)
+
+
+@pytest.mark.parametrize("question", [
+    "배터리랑 음질은 어때?",          # 의도 두 개
+    "가격은 얼마야?",                # 의도 없음
+    "",
+    None,
+])
+def test_no_single_intent(question):
+    assert match_intent(question) == (None, 0.0)
+
+
+@pytest.mark.parametrize("question", [
+    "다른 제품보다 배터리 오래 가?",
+    "게임할 때 음질 괜찮아?",
+    "에어팟이랑 노이즈캔슬링 차이는?",
+])
+def test_block_words_keep_intent_but_zero_confidence(question):
+    intent, confidence = match_intent(question)
+    assert intent is not None
+    assert confidence == 0.0
+
+
+def test_long_question_is_not_confident():
+    question = "배터리가 하루 종일 밖에서 쓰고 집에 와서도 남아 있을 정도로 충분한가요?"
+    assert len(question) > MAX_QUESTION_CHARS
+    assert match_intent(question) == ("battery", 0.5)
+
+
+# ======================================================
+# FAQStore.answer
+# ======================================================
+def test_confident_question_uses_stored_answer(tmp_path):
+    store = make_store(tmp_path, {"battery": "현재 선택된 이 헤드셋은 배터리가 오래가요."})
+    assert store.answer(PRODUCT, "배터리 성능은 어떨까?") == ("battery", "현재 선택된 이 헤드셋은 배터리가 오래가요.")
+
+
+@pytest.mark.parametrize("question", [
+    "배터리랑 음질은 어때?",
+    "다른 제품보다 배터리 오래 가?",
+    "배터리가 하루 종일 밖에서 쓰고 집에 와서도 남아 있을 정도로 충분한가요?",
+])
+def test_non_confident_question_goes_to_llm(tmp_path, question):
+    store = make_store(tmp_path, {"battery": "배터리 답변", "sound": "음질 답변"})
+    assert store.answer(PRODUCT, question) is None
+
+
+def test_long_question_allowed_with_lower_threshold(tmp_path):
+    store = make_store(tmp_path, {"battery": "배터리 답변"})
+    question = "배터리가 하루 종일 밖에서 쓰고 집에 와서도 남아 있을 정도로 충분한가요?"
+    assert store.answer(PRODUCT, question, min_confidence=0.5) == ("battery", "배터리 답변")
+
+
+def test_missing_intent_answer_goes_to_llm(tmp_path):
+    store = make_store(tmp_path, {"battery": "배터리 답변"})
+    assert store.answer(PRODUCT, "음질은 어때?") is None
+
+
+@pytest.mark.parametrize("change", [
+    {"price": 129000},
+    {"review_one": "배터리가 생각보다 빨리 닳아요."},
+    {"tags": ["노이즈캔슬링"]},
+])
+def test_stale_product_hash_is_rejected(tmp_path, change):
+    store = make_store(tmp_path, {"battery": "배터리 답변"})
+    changed = dict(PRODUCT, **change)
+    assert product_hash(changed) != product_hash(PRODUCT)
+    assert store.answer(changed, "배터리 성능은 어떨까?") is None
+    assert store.answer(PRODUCT, "배터리 성능은 어떨까?") == ("battery", "배터리 답변")
+
+
+def test_unrelated_fields_do_not_invalidate(tmp_path):
+    store = make_store(tmp_path, {"battery": "배터리 답변"})
+    assert store.answer(dict(PRODUCT, img="https://example.com/x.png"), "배터리 성능은 어떨까?") is not None
+
+
+@pytest.mark.parametrize("header", [
+    {"faq_version": FAQ_VERSION + 1},
+    {"prompt_hash": "0" * 12},
+])
+def test_other_version_or_prompt_is_ignored(tmp_path, header):
+    store = make_store(tmp_path, {"battery": "배터리 답변"})
+    lines = (tmp_path / "faq.jsonl").read_text(encoding="utf-8").splitlines()
+    lines[0] = json.dumps(dict(json.loads(lines[0]), **header))
+    (tmp_path / "faq.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    store = FAQStore(str(tmp_path / "faq.jsonl"), check_interval=0)
+    assert len(store) == 0
+    assert store.answer(PRODUCT, "배터리 성능은 어떨까?") is None
+
+
+def test_missing_file_is_empty(tmp_path):
+    store = FAQStore(str(tmp_path / "none.jsonl"))
+    assert len(store) == 0
+    assert store.answer(PRODUCT, "배터리 성능은 어떨까?") is None
+
+
+# ======================================================
+# 예산 초과 문구
+# ======================================================
+def test_budget_notice_prefixes_answer():
+    answer = with_budget_notice("  현재 선택된 이 헤드셋은 배터리가 오래가요.", 120000)
+    assert answer == "예산(약 120,000원)을 약간 초과하지만, 현재 선택된 이 헤드셋은 배터리가 오래가요."
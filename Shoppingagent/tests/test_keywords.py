@@ -0,0 +1,133 @@
+"""
+keywords.KeywordMatcher가 이전 코드의 any(k in text for k in [...]) / startswith 판정과 같은 결과를 내는지.
+이전 판정식은 바꾸기 전 app.py에 있던 키워드 목록을 그대로 옮겨 둠 (사전이 실수로 바뀌어도 여기서 걸림).
+"""
+import random
+
+import pytest
+
+from keywords import KEYWORDS, LEXICONS, PREFIX_LEXICONS, KeywordMatcher
+
+FRAGMENTS = [
+    "출퇴근할 때", "지하철에서", "쓸 거예요", "예산은 20만원", "노이즈캔슬링", "중요해요", "화이트 색상이",
+    "좋아요", "네", "응응", "잘 모르겠어요", "상관없어요", "추천해줘", "골라줘", "아이폰이랑", "디자인",
+    "음질이", "소리가", "착용감", "배터리", "가격대", "선호해요", "(가장 중요)", "Design", "SOUND", "싸게",
+    "가벼운", "레트로 감성", "게임", "여행", "음악 감상", "브랜드 인지도", "그냥", "ㅇㅇ", "맞아요 ",
+    "스마트폰", "갤럭시", "고음", "저음", "얼마", "추천 받을게", "별로", "관심없", "필요없", "보라색",
+]
+
+NEGATIVE = ["없어", "없다고", "몰라", "모르겠", "잘 모르", "글쎄", "별로", "아닌데", "굳이", "괜찮",
+            "그만", "필요없", "상관없", "안중요", "관심없"]
+YES = ["응", "응응", "ㅇㅇ", "네", "넹", "맞아", "맞아요", "그래", "좋아", "좋아요", "중요하지", "그치", "맞지"]
+COLORS = ["화이트", "블랙", "네이비", "퍼플", "실버", "그레이", "핑크", "보라", "골드"]
+DESIGN = ["디자인", "스타일", "예쁜", "깔끔", "세련", "미니멀", "레트로", "감성", "스타일리시"]
+USAGE = ["용도", "출퇴근", "운동", "게임", "여행", "공부", "음악 감상"]
+
+
+def _any(text, keywords):
+    return any(k in text for k in keywords)
+
+
+# 이전 app.py 판정식 → KeywordMatcher 판정식
+PREDICATES = {
+    "is_negative_response": (
+        lambda t: _any(t, NEGATIVE),
+        lambda t: KEYWORDS.has(t, "negative"),
+    ),
+    "yes_answer": (
+        lambda t: any(t.startswith(k) or t == k for k in YES),
+        lambda t: KEYWORDS.has(t, "yes"),
+    ),
+    "color_memory": (
+        lambda t: ("색상" in t and "선호" in t) or _any(t, COLORS),
+        lambda t: (KEYWORDS.has(t, "color_word") and KEYWORDS.has(t, "prefer_word")) or KEYWORDS.has(t, "color"),
+    ),
+    "design_memory": (
+        lambda t: _any(t, DESIGN),
+        lambda t: KEYWORDS.has(t, "design"),
+    ),
+    "usage_memory": (
+        lambda t: _any(t, USAGE),
+        lambda t: KEYWORDS.has(t, "usage"),
+    ),
+    "price_filter": (
+        lambda t: _any(t, ["음질", "소리", "사운드"]) and not _any(t, ["예산", "가격", "얼마", "가격대"]),
+        lambda t: "sound_mention" in KEYWORDS.categories(t) and "price_mention" not in KEYWORDS.categories(t),
+    ),
+    "design_filter": (
+        lambda t: _any(t, ["음질", "소리", "사운드"]) and not _any(t, DESIGN + ["색상"]),
+        lambda t: KEYWORDS.has(t, "sound_mention") and not KEYWORDS.has_any(t, "design", "color_word"),
+    ),
+    "drift": (
+        lambda t: _any(t, ["스마트폰", "휴대폰", "핸드폰", "아이폰", "갤럭시"]),
+        lambda t: KEYWORDS.has(t, "drift"),
+    ),
+    "reco_request": (
+        lambda t: _any(t, ["추천", "골라줘", "추천해줘", "추천 받을게"]),
+        lambda t: KEYWORDS.has(t, "reco_request"),
+    ),
+    "summary_yes": (
+        lambda t: _any(t, ["좋아요", "네", "맞아요", "추천"]),
+        lambda t: KEYWORDS.has(t, "summary_yes"),
+    ),
+    "question_design": (
+        lambda t: "디자인" in t or "스타일" in t,
+        lambda t: KEYWORDS.has(t, "question:design"),
+    ),
+    "question_sound": (
+        lambda t: _any(t, ["음질", "소리", "사운드", "고음", "중음", "저음"]),
+        lambda t: KEYWORDS.has(t, "question:sound"),
+    ),
+    "question_comfort": (lambda t: "착용감" in t, lambda t: KEYWORDS.has(t, "question:comfort")),
+    "question_battery": (lambda t: "배터리" in t, lambda t: KEYWORDS.has(t, "question:battery")),
+    "question_budget": (
+        lambda t: "예산" in t or "가격대" in t,
+        lambda t: KEYWORDS.has(t, "question:budget"),
+    ),
+}
+
+
+def make_texts(n=3000, seed=0):
+    rnd = random.Random(seed)
+    texts = [" ".join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(1, 8))) for _ in range(n)]
+    # 키워드 자체, 앞뒤에 다른 글자가 붙은 경우, 빈 문자열
+    keywords = {k for ks in list(LEXICONS.values()) + list(PREFIX_LEXICONS.values()) for k in ks}
+    for k in sorted(keywords):
+        texts += [k, f"음 {k}", f"{k}요", k[:-1]]
+    return texts + ["", " ", "ㅇ"]
+
+
+TEXTS = make_texts()
+
+
+@pytest.mark.parametrize("name", sorted(PREDICATES))
+def test_matches_old_predicate(name):
+    old, new = PREDICATES[name]
+    mismatches = [t for t in TEXTS if old(t) != new(t)]
+    assert mismatches == []
+
+
+def test_categories_match_any_scan_over_all_lexicons():
+    for text in TEXTS:
+        expected = {c for c, ks in LEXICONS.items() if any(k in text for k in ks)}
+        expected |= {c for c, ks in PREFIX_LEXICONS.items() if any(text.startswith(k) for k in ks)}
+        assert KEYWORDS.categories(text) == expected, text
+
+
+def test_overlapping_keywords_follow_fail_links():
+    # 접두/접미사가 겹치는 키워드 (he / she / his / hers 고전 예제)
+    matcher = KeywordMatcher({"a": ["he"], "b": ["she"], "c": ["his"], "d": ["hers"]}, {"p": ["sh"]})
+    assert matcher.categories("ushers") == {"a", "b", "d"}
+    assert matcher.categories("shis") == {"c", "p"}
+    assert matcher.categories("hhis") == {"c"}
+    assert matcher.categories("") == frozenset()
+
+
+def test_prefix_category_only_at_start():
+    assert KEYWORDS.has("네 좋아요", "yes")
+    assert not KEYWORDS.has("그건 아니고 네", "yes")
+
+
+def test_empty_keyword_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher({"x": [""]})
@@ -0,0 +1,144 @@
+"""
+log_shipper.LogShipper: 배치 전송 / 큐가 가득 찼을 때 버리기 / 재시도 / flush.
+"""
+import threading
+import time
+
+import pytest
+
+from log_shipper import LogShipper
+
+
+class FakeSheets:
+    """append_rows 호출을 기록하고, fail_times번까지는 예외를 냄"""
+
+    def __init__(self, fail_times=0, block=None):
+        self.calls = []
+        self.fail_times = fail_times
+        self.block = block
+        self.lock = threading.Lock()
+
+    def append_rows(self, sheet, rows):
+        if self.block is not None:
+            self.block.wait()
+        with self.lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("quota")
+            self.calls.append((sheet, list(rows)))
+
+    def rows(self, sheet):
+        return [r for s, rows in self.calls if s == sheet for r in rows]
+
+
+def make_shipper(sheets, **kwargs):
+    kwargs.setdefault("flush_interval", 0.05)
+    kwargs.setdefault("backoff_base", 0.001)
+    return LogShipper(sheets.append_rows, **kwargs)
+
+
+@pytest.fixture
+def started():
+    shippers = []
+
+    def start(shipper):
+        shippers.append(shipper.start())
+        return shipper
+
+    yield start
+    for s in shippers:
+        s.close(timeout=1.0)
+
+
+def test_rows_are_sent_in_batches_per_sheet(started):
+    sheets = FakeSheets()
+    shipper = make_shipper(sheets, batch_size=10)
+    for i in range(25):
+        assert shipper.submit([i], sheet="B_raw" if i % 5 else "session_summary")
+    started(shipper)
+
+    assert shipper.flush(timeout=2.0)
+    assert sheets.rows("B_raw") == [[i] for i in range(25) if i % 5]
+    assert sheets.rows("session_summary") == [[i] for i in range(0, 25, 5)]
+    assert all(len(rows) <= 10 for _, rows in sheets.calls)
+    assert len(sheets.calls) < 25
+    stats = shipper.stats()
+    assert stats["sent"] == stats["submitted"] == 25
+    assert stats["queue_depth"] == stats["pending"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    sheets = FakeSheets()
+    shipper = make_shipper(sheets, max_queue=3, put_timeout=0.01)   # 워커를 띄우지 않아 큐가 비지 않음
+    results = [shipper.submit([i]) for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert shipper.queue_depth() == 3
+    stats = shipper.stats()
+    assert stats["dropped"] == 2
+    assert stats["pending"] == 3
+
+
+def test_failed_append_is_retried_then_reported(started):
+    sheets = FakeSheets(fail_times=2)
+    flushed = []
+    shipper = make_shipper(sheets, on_flushed=lambda sheet, rows, seconds: flushed.append((sheet, len(rows), seconds)))
+    shipper.submit(["a"])
+    started(shipper)
+
+    assert shipper.flush(timeout=2.0)
+    assert sheets.rows("B_raw") == [["a"]]
+    assert shipper.stats()["retries"] == 2
+    assert [(s, n) for s, n, _ in flushed] == [("B_raw", 1)]
+    assert flushed[0][2] >= 0
+
+
+def test_gives_up_after_max_retries(started):
+    sheets = FakeSheets(fail_times=100)
+    failed, sent = [], []
+    shipper = make_shipper(
+        sheets, max_retries=2,
+        on_failed=lambda sheet, rows, error: failed.append((sheet, rows, type(error).__name__)),
+        on_sent=lambda sheet, rows: sent.append(rows),
+    )
+    shipper.submit(["a"])
+    started(shipper)
+
+    assert shipper.flush(timeout=2.0)
+    assert failed == [("B_raw", [["a"]], "RuntimeError")]
+    assert sent == []
+    stats = shipper.stats()
+    assert stats["failed"] == 1 and stats["sent"] == 0 and stats["retries"] == 2
+
+
+def test_flush_sends_before_flush_interval(started):
+    sheets = FakeSheets()
+    shipper = make_shipper(sheets, batch_size=100, flush_interval=30.0)
+    started(shipper)
+    shipper.submit(["a"])
+    shipper.submit(["b"])
+
+    started_at = time.monotonic()
+    assert shipper.flush(timeout=2.0)
+    assert time.monotonic() - started_at < 2.0
+    assert sheets.rows("B_raw") == [["a"], ["b"]]
+
+
+def test_flush_timeout_is_bounded(started):
+    block = threading.Event()
+    sheets = FakeSheets(block=block)
+    shipper = make_shipper(sheets)
+    started(shipper)
+    shipper.submit(["a"])
+
+    started_at = time.monotonic()
+    assert shipper.flush(timeout=0.1) is False
+    assert time.monotonic() - started_at < 1.0
+    block.set()
+    assert shipper.flush(timeout=2.0)
+    assert sheets.rows("B_raw") == [["a"]]
+
+
+def test_flush_with_nothing_pending_returns_immediately():
+    shipper = make_shipper(FakeSheets())
+    assert shipper.flush(timeout=0)
@@ -0,0 +1,43 @@
+"""
+memory_rules.extract_memory_with_rules: 규칙으로 확실하게 뽑는 경우 / 애매해서 LLM으로 넘기는 경우.
+확신(confident)이 True인데 memories가 있으면 LLM 호출 없이 그대로 저장되므로, 넘겨야 할 발화가 새지 않는지 확인.
+"""
+import pytest
+
+from memory_rules import extract_memory_with_rules
+
+BRAND = "선호하는 브랜드는 {} 쪽이에요."
+COMFORT = "착용감이 편한 제품을 선호하고 있어요."
+COMMUTE = "출퇴근 시 사용할 용도예요."
+COLOR = "색상은 {} 계열을 선호해요."
+NOISE = "노이즈캔슬링 기능을 고려하고 있어요."
+BUDGET = "예산은 약 {}만 원 이내로 생각하고 있어요."
+
+CASES = [
+    # (발화, 메모리, 확신)
+    ("소니 제품이 좋아요", [BRAND.format("Sony")], True),
+    ("에어팟 맥스 같은 거", [BRAND.format("Apple")], True),
+    ("JBL이나 보스", [BRAND.format("Bose, JBL")], True),
+    ("착용감이 제일 중요해요", [COMFORT], True),
+    ("오래 써도 귀가 아프지 않았으면", [COMFORT], False),          # 부정 표현 → LLM
+    ("출퇴근할 때 쓸 거예요", [COMMUTE], True),
+    ("통근용", [COMMUTE], True),
+    ("검은색이 좋아요", [COLOR.format("블랙")], True),
+    ("은색이나 흰색", [COLOR.format("화이트, 실버")], True),
+    ("노이즈캔슬링 있는 거", [NOISE], True),
+    ("지하철이 시끄러워서", [NOISE], True),
+    ("예산은 20만원 정도", [BUDGET.format(20)], True),
+    ("30 만 원 이하로", [BUDGET.format(30)], True),
+    ("출퇴근용이고 예산 15만원", [COMMUTE, BUDGET.format(15)], True),
+    ("155,000원까지", [], False),                                   # 만 원 단위가 아닌 예산 → LLM
+    ("소니 말고 보스?", [BRAND.format("Sony, Bose")], False),      # 질문 / 제외 조건 → LLM
+    ("노이즈캔슬링은 필요 없어요", [NOISE], False),                  # 부정 응답 → LLM
+    ("착용감보다 음질", [COMFORT], False),                            # 비교 → LLM
+    ("그냥 아무거나요", [], True),                                   # 규칙 없음 → LLM (memories가 비어 있음)
+]
+
+
+@pytest.mark.parametrize("text, memories, confident", CASES, ids=[c[0] for c in CASES])
+def test_extract_memory_with_rules(text, memories, confident):
+    assert extract_memory_with_rules(text) == (memories, confident)
+
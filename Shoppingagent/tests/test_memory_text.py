@@ -0,0 +1,93 @@
+"""
+memory_text.naturalize_memory(미리 컴파일한 정규식 + 캐시)가 이전 app.py 구현과 같은 문장을 만드는지.
+"""
+import random
+import re
+
+import pytest
+
+from memory_text import join_memory_text, naturalize_memory
+
+
+def old_naturalize_memory(text):
+    """이전 app.py 구현 그대로"""
+    t = text.strip()
+    t = t.replace("노이즈 캔슬링", "노이즈캔슬링")
+    is_priority = "(가장 중요)" in t
+    t = t.replace("(가장 중요)", "").strip()
+
+    t = re.sub(r'로 생각하고 있어요\.?$', '', t)
+    t = re.sub(r'이에요\.?$', '', t)
+    t = re.sub(r'에요\.?$', '', t)
+    t = re.sub(r'다\.?$', '', t)
+
+    t = t.replace('비싼것까진 필요없', '비싼 것 필요 없음')
+    t = t.replace('필요없', '필요 없음')
+
+    t = re.sub(r'(을|를)\s*선호$', ' 선호', t)
+    t = re.sub(r'(을|를)\s*고려하고$', ' 고려', t)
+    t = re.sub(r'(이|가)\s*필요$', ' 필요', t)
+    t = re.sub(r'(에서)\s*들을$', '', t)
+
+    t = t.strip()
+    if is_priority:
+        t = "(가장 중요) " + t
+    return t
+
+
+SAMPLES = [
+    "예산은 약 20만 원 이내로 생각하고 있어요.",
+    "주로 출퇴근 용도로 사용할 예정이에요.",
+    "블랙 색상을 선호",
+    "노이즈 캔슬링이 필요",
+    "비싼것까진 필요없어요.",
+    "착용감을 고려하고",
+    "지하철에서 들을",
+    "음질이 좋다.",
+    "(가장 중요) 디자인/스타일을 선호",
+    "  (가장 중요)   노이즈 캔슬링 기능이 필요  ",
+    "가성비가 중요하다",
+    "필요없",
+    "에요",
+    "이에요.",
+    "",
+    "   ",
+]
+
+PARTS = ["예산은 약 30만 원", "노이즈 캔슬링", "디자인", "화이트 색상", "착용감", "출퇴근", "지하철", "음질", "비싼것까진 "]
+ENDINGS = ["로 생각하고 있어요.", "이에요.", "에요", "다.", "다", "필요없", "을 선호", "를  선호", "을 고려하고",
+           "이 필요", "가 필요", "에서 들을", "에서  들을", "", ".", " "]
+
+
+def make_sentences(n=2000, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        t = " ".join(rnd.sample(PARTS, rnd.randint(1, 3))) + rnd.choice(ENDINGS)
+        if rnd.random() < 0.4:
+            t = rnd.choice(["(가장 중요) ", "(가장 중요)", " "]) + t
+        out.append(t)
+    return out
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_samples_match_old_implementation(text):
+    assert naturalize_memory(text) == old_naturalize_memory(text)
+
+
+def test_random_sentences_match_old_implementation():
+    for text in make_sentences():
+        assert naturalize_memory(text) == old_naturalize_memory(text), text
+
+
+def test_cached_result_is_stable():
+    text = "노이즈 캔슬링이 필요"
+    assert naturalize_memory(text) == naturalize_memory(text) == old_naturalize_memory(text)
+
+
+def test_join_memory_text_matches_old_prompt_block():
+    rnd = random.Random(1)
+    sentences = make_sentences(200, seed=1)
+    for _ in range(50):
+        memory = rnd.sample(sentences, rnd.randint(0, 8))
+        assert join_memory_text(memory) == "\n".join([old_naturalize_memory(m) for m in memory])
@@ -0,0 +1,193 @@
+"""
+preferences.Preferences / parse_memory가 이전 app.py의 메모리 판정(문장마다 any(k in m ...) 반복)과 같은 결과를 내는지.
+이전 판정식은 바꾸기 전 코드를 그대로 옮겨 둠.
+"""
+import random
+
+import pytest
+
+from preferences import Preferences, parse_memory
+from recommender import MemoryFeatures
+
+SENTENCES = [
+    "예산은 약 20만 원 이내로 생각하고 있어요.",
+    "예산은 약 35만원이에요.",
+    "가격대는 10만원대가 좋아요.",
+    "블랙 색상을 선호해요.",
+    "색상은 화이트 계열을 선호",
+    "보라색이 좋아요.",
+    "실버나 그레이 톤",
+    "디자인/스타일이 중요해요.",
+    "깔끔하고 미니멀한 디자인",
+    "레트로 감성 스타일",
+    "Design 이 제일 중요",
+    "음질이 좋은 제품이 필요",
+    "Sound quality 중요",
+    "착용감이 편안한 제품",
+    "가벼운 무게",
+    "노이즈캔슬링 기능이 필요해요.",
+    "캔슬링 꼭",
+    "배터리가 오래 쓰는 것",
+    "Battery life",
+    "가성비 좋은 거",
+    "저렴한 가격",
+    "싸게 사고 싶어요",
+    "선호하는 브랜드는 Sony, Apple 쪽이에요.",
+    "브랜드 인지도가 있는 제품",
+    "유명한 제품",
+    "출퇴근할 때 사용할 예정이에요.",
+    "주로 음악 감상 용도로 사용할 예정이에요.",
+    "운동할 때 쓸 거예요.",
+    "게임용",
+    "여행 갈 때",
+    "공부할 때 쓸 거예요.",
+    "통화 품질",
+    "그냥 무난한 거",
+]
+
+PRIORITY_MARK = "(가장 중요)"
+DESIGN_KEYWORDS = ["디자인", "스타일", "예쁜", "깔끔", "세련", "미니멀", "레트로", "감성", "스타일리시"]
+USAGE_KEYWORDS = ["용도", "출퇴근", "운동", "게임", "여행", "공부", "음악 감상"]
+
+
+# ======================================================
+# 이전 app.py 판정식
+# ======================================================
+def old_is_color_memory(text):
+    t = text.replace("(가장 중요)", "")
+    if "색상" in t and "선호" in t:
+        return True
+    color_keywords = ["화이트", "블랙", "네이비", "퍼플", "실버", "그레이", "핑크", "보라", "골드"]
+    return any(k in t for k in color_keywords)
+
+
+def old_detect_priority(mem_list):
+    if not mem_list:
+        return None
+    for m in mem_list:
+        if "(가장 중요)" not in m:
+            continue
+        m_low = m.lower()
+        if any(k in m_low for k in ["디자인", "스타일", "깔끔", "미니멀", "레트로", "트렌디", "design", "style"]):
+            return "디자인/스타일"
+        if any(k in m_low for k in ["음질", "sound", "audio"]):
+            return "음질"
+        if any(k in m_low for k in ["착용감", "편안", "comfortable", "가벼운"]):
+            return "착용감"
+        if any(k in m_low for k in ["노이즈", "캔슬링"]):
+            return "노이즈캔슬링"
+        if any(k in m_low for k in ["배터리", "battery", "오래 쓰"]):
+            return "배터리"
+        if any(k in m_low for k in ["가격", "예산", "가성비", "price", "저렴", "싼", "싸게"]):
+            return "가격/예산"
+        if any(k in m_low for k in ["브랜드", "인지도", "유명"]):
+            return "브랜드"
+        return m.replace("(가장 중요)", "").strip()
+    return None
+
+
+def old_dedupe(memory, new_text):
+    """이전 add_memory의 2), 3) 단계 (예산 / 색상 문장 중복 제거)"""
+    stripped = new_text.replace("(가장 중요)", "").strip()
+    if "예산은 약" in stripped:
+        memory = [m for m in memory if "예산은 약" not in m]
+    if old_is_color_memory(stripped):
+        memory = [m for m in memory if not old_is_color_memory(m)]
+    return memory
+
+
+def new_dedupe(memory, new_text):
+    """현재 add_memory와 같은 순서로 Preferences / parse_memory를 사용"""
+    prefs = Preferences.from_memory(memory)
+    fact = parse_memory(new_text.replace(PRIORITY_MARK, "").strip())
+    if fact.is_budget_sentence:
+        prefs.reset([f.text for f in prefs if not f.is_budget_sentence])
+    if fact.is_color_sentence:
+        prefs.reset([f.text for f in prefs if not f.is_color_sentence])
+    return prefs.to_memory()
+
+
+def make_memories(n=500, seed=0):
+    rnd = random.Random(seed)
+    memories = []
+    for _ in range(n):
+        mem = rnd.sample(SENTENCES, rnd.randint(0, 6))
+        if mem and rnd.random() < 0.6:
+            i = rnd.randrange(len(mem))
+            mem[i] = f"{PRIORITY_MARK} {mem[i]}"
+        memories.append(mem)
+    return memories
+
+
+MEMORIES = make_memories()
+
+
+# ======================================================
+# 문장 단위
+# ======================================================
+@pytest.mark.parametrize("text", SENTENCES + [f"{PRIORITY_MARK} {s}" for s in SENTENCES])
+def test_sentence_flags_match_old_predicates(text):
+    fact = parse_memory(text)
+    assert fact.is_budget_sentence == ("예산은 약" in text)
+    assert fact.is_color_sentence == old_is_color_memory(text)
+    assert fact.usage == any(k in text for k in USAGE_KEYWORDS)
+
+
+# ======================================================
+# 메모리 리스트 단위
+# ======================================================
+def test_priority_matches_old_detect_priority():
+    for mem in MEMORIES:
+        assert Preferences.from_memory(mem).priority == old_detect_priority(mem), mem
+
+
+def test_context_flags_match_old_any_scans():
+    for mem in MEMORIES:
+        prefs = Preferences.from_memory(mem)
+        assert prefs.has_budget == any("예산" in m for m in mem), mem
+        assert prefs.design_priority == any(
+            "(가장 중요)" in m and any(k in m for k in DESIGN_KEYWORDS) for m in mem
+        ), mem
+        assert prefs.usage == any(any(k in m for k in USAGE_KEYWORDS) for m in mem), mem
+
+
+def test_scoring_features_match_memory_features():
+    for mem in MEMORIES:
+        prefs, old = Preferences.from_memory(mem), MemoryFeatures(mem)
+        for name in MemoryFeatures.__slots__:
+            assert getattr(prefs, name) == getattr(old, name), (name, mem)
+
+
+def test_budget_and_color_dedupe_match_old_add_memory():
+    rnd = random.Random(1)
+    for mem in MEMORIES:
+        new_text = rnd.choice(SENTENCES)
+        assert new_dedupe(mem, new_text) == old_dedupe(mem, new_text), (mem, new_text)
+
+
+def test_incremental_updates_match_from_memory():
+    rnd = random.Random(2)
+    mem, prefs = [], Preferences()
+    for _ in range(300):
+        op = rnd.choice(["append", "append", "pop", "set", "reset"])
+        if op == "append":
+            text = rnd.choice(SENTENCES)
+            mem.append(text)
+            prefs.append(text)
+        elif op == "pop" and mem:
+            i = rnd.randrange(len(mem))
+            assert prefs.pop(i) == mem.pop(i)
+        elif op == "set" and mem:
+            i = rnd.randrange(len(mem))
+            text = f"{PRIORITY_MARK} {rnd.choice(SENTENCES)}"
+            mem[i] = text
+            prefs.set(i, text)
+        elif op == "reset":
+            mem = rnd.sample(SENTENCES, rnd.randint(0, 4))
+            prefs.reset(mem)
+
+        fresh = Preferences.from_memory(mem)
+        assert prefs.matches(mem)
+        for name in Preferences.__slots__[1:]:
+            assert getattr(prefs, name) == getattr(fresh, name), name
+        assert prefs.priority == old_detect_priority(mem)
@@ -0,0 +1,88 @@
+"""
+recommender.CatalogIndex.scores / top_k가 기준 구현 score_item_with_memory + 안정 정렬과 같은 결과를 내는지.
+(MemoryFeatures와 preferences.Preferences 둘 다 넘겨서 확인)
+"""
+import itertools
+import json
+import os
+import random
+
+import pytest
+
+from preferences import Preferences
+from recommender import CatalogIndex, MemoryFeatures, score_item_with_memory
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "catalog.jsonl")
+
+
+def load_catalog():
+    with open(CATALOG, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def tied_catalog(seed=0):
+    """같은 속성의 아이템이 여러 개 → 점수가 자주 같아져서 동점 정렬(카탈로그 순서)을 확인"""
+    rnd = random.Random(seed)
+    tags = ["디자인", "음질", "착용감", "노이즈캔슬링", "가성비", "배터리"]
+    colors = ["블랙", "화이트", "네이비", "실버"]
+    items = []
+    for i in range(40):
+        items.append({
+            "name": f"item-{i}",
+            "price": rnd.choice([90000, 150000, 200000, 290000, 320000]),
+            "rank": rnd.choice([1, 2, 3]),
+            "tags": rnd.sample(tags, rnd.randint(0, 3)),
+            "color": rnd.sample(colors, rnd.randint(1, 3)),
+        })
+    return items
+
+
+BUDGETS = [None, "예산은 약 10만 원 이내로 생각하고 있어요.", "예산은 약 20만 원 이내로 생각하고 있어요.",
+           "예산은 약 45만 원 이내로 생각하고 있어요.", "150,000원 정도"]
+PRIORITIES = [None, "(가장 중요) 디자인/스타일을 중요하게 보고 있어요.", "(가장 중요) 음질을 중요하게 생각하고 있어요.",
+              "(가장 중요) 착용감이 편한 제품을 선호하고 있어요."]
+FEATURES = [None, "노이즈캔슬링 기능을 고려하고 있어요.", "가성비를 중요하게 생각해요."]
+COLORS = [None, "색상은 블랙 계열을 선호해요.", "색상은 화이트, 네이비 계열을 선호해요."]
+EXTRA = [None, "가성비 좋은 노이즈 제품"]      # 같은 기준이 여러 문장에 나오는 경우 (개수만큼 가산)
+
+
+def memory_grid():
+    for combo in itertools.product(BUDGETS, PRIORITIES, FEATURES, COLORS, EXTRA):
+        yield [m for m in combo if m]
+
+
+MEMORIES = list(memory_grid())
+
+
+def reference_top_k(items, mems, k):
+    """이전 make_recommendation: 점수 내림차순 안정 정렬 후 앞 k개"""
+    scored = [(score_item_with_memory(item, mems), item) for item in items]
+    scored.sort(key=lambda x: -x[0])
+    return [item["name"] for _, item in scored[:k]]
+
+
+@pytest.mark.parametrize("items", [load_catalog(), tied_catalog()], ids=["catalog", "ties"])
+@pytest.mark.parametrize("features_of", [MemoryFeatures, Preferences.from_memory], ids=["features", "preferences"])
+def test_scores_and_top_k_match_reference(items, features_of):
+    index = CatalogIndex(items)
+    for mems in MEMORIES:
+        features = features_of(mems)
+        expected = [score_item_with_memory(item, mems) for item in items]
+        assert index.scores(features).tolist() == expected, mems
+        for k in (1, 3, 5, len(items), len(items) + 2):
+            assert [it["name"] for it in index.top_k(features, k=k)] == reference_top_k(items, mems, k), (mems, k)
+
+
+def test_ties_keep_catalog_order():
+    items = [{"name": n, "price": 100000, "rank": 1, "tags": [], "color": ["블랙"]} for n in "abcde"]
+    index = CatalogIndex(items)
+    assert [it["name"] for it in index.top_k(MemoryFeatures([]), k=3)] == ["a", "b", "c"]
+    # 뒤쪽 아이템만 점수가 오르면 그 아이템이 앞으로, 나머지 동점은 카탈로그 순서
+    items[3]["tags"] = ["노이즈캔슬링"]
+    index = CatalogIndex(items)
+    top = index.top_k(MemoryFeatures(["노이즈캔슬링 기능을 고려하고 있어요."]), k=3)
+    assert [it["name"] for it in top] == ["d", "a", "b"]
+
+
+def test_empty_catalog():
+    assert CatalogIndex([]).top_k(MemoryFeatures([]), k=3) == []
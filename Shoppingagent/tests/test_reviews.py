@@ -0,0 +1,93 @@
+"""
+reviews.ReviewIndex: 검색 순서 / 프롬프트에 들어가는 발췌 크기 제한 / 원본이 바뀌면 다시 색인.
+"""
+import json
+import os
+
+import pytest
+
+from faq_store import product_detail_prompt
+from reviews import ReviewIndex, read_reviews, seed_reviews, write_reviews
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG = os.path.join(HERE, "data", "catalog.jsonl")
+SEED = os.path.join(HERE, "data", "reviews.jsonl")
+
+REVIEWS = [
+    ("A", "배터리가 오래 가요. 배터리 걱정 없어요.", 5),
+    ("A", "배터리는 보통이고 음질이 좋아요.", 4),
+    ("A", "착용감이 편해요.", None),
+    ("A", "디자인이 예뻐요.", 3),
+    ("B", "배터리가 정말 오래 가요.", 5),
+]
+
+PRODUCT = {
+    "name": "A",
+    "brand": "Brand",
+    "price": 100000,
+    "color": ["블랙"],
+    "rating": 4.5,
+    "tags": ["배터리"],
+    "review_one": "배터리가 길어요.",
+}
+
+
+@pytest.fixture
+def index():
+    return ReviewIndex.build(REVIEWS)
+
+
+def test_search_orders_by_relevance_within_product(index):
+    hits = index.search("A", "배터리 오래 가?", k=4)
+    assert [h.text for h in hits] == [REVIEWS[0][1], REVIEWS[1][1]]
+    assert hits[0].score > hits[1].score > 0
+    assert hits[0].rating == 5
+
+
+def test_search_limits_to_k_and_skips_unrelated(index):
+    assert len(index.search("A", "배터리 음질 착용감 디자인", k=2)) == 2
+    assert index.search("A", "통화 품질", k=4) == []
+    assert index.search("없는 제품", "배터리", k=4) == []
+    assert index.search("A", "배터리", k=0) == []
+
+
+def test_snippet_budget_bounds_prompt_size():
+    long_reviews = [("A", "배터리 " * 500 + str(i), 5) for i in range(200)]
+    index = ReviewIndex.build(long_reviews)
+    hits = index.search("A", "배터리", k=4)
+    snippets = [h.snippet(160) for h in hits]
+    assert len(hits) == 4
+    assert all(len(s) <= 160 + len("(★5) ") for s in snippets)
+
+    base = len(product_detail_prompt(PRODUCT, "배터리 어때?"))
+    with_reviews = len(product_detail_prompt(PRODUCT, "배터리 어때?", reviews=snippets))
+    # 리뷰 수(200개 × 2500자)와 상관없이 발췌 4개 분량만 늘어남
+    assert with_reviews - base < 4 * (160 + 20) + 100
+
+
+def test_open_reuses_index_until_source_changes(tmp_path):
+    src, out = tmp_path / "reviews.jsonl", tmp_path / "index"
+    write_reviews(src, REVIEWS)
+
+    first = ReviewIndex.open(str(src), str(out))
+    again = ReviewIndex.open(str(src), str(out))
+    assert again.meta["generation"] == first.meta["generation"]
+
+    write_reviews(src, REVIEWS + [("A", "통화 품질이 깨끗해요.", 4)])
+    rebuilt = ReviewIndex.open(str(src), str(out))
+    assert rebuilt.meta["generation"] != first.meta["generation"]
+    assert [h.text for h in rebuilt.search("A", "통화 품질", k=4)] == ["통화 품질이 깨끗해요."]
+    # 이전 인덱스(mmap)는 다시 색인한 뒤에도 그대로 읽힘
+    assert [h.text for h in first.search("A", "배터리 오래", k=1)] == [REVIEWS[0][1]]
+
+
+def test_open_without_source_file(tmp_path):
+    assert ReviewIndex.open(str(tmp_path / "missing.jsonl"), str(tmp_path / "index")) is None
+
+
+def test_seed_corpus_matches_catalog():
+    # 기본 리뷰 파일은 seed_reviews로 만든 그대로여야 함 (카탈로그를 바꾸면 --seed로 다시 생성)
+    assert read_reviews(SEED) == seed_reviews(CATALOG)
+    with open(CATALOG, encoding="utf-8") as f:
+        names = {json.loads(line)["name"] for line in f if line.strip()}
+    assert {product for product, _, _ in read_reviews(SEED)} == names
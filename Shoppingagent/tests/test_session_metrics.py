@@ -0,0 +1,110 @@
+"""
+session_metrics.SessionAggregator가 이전 write_session_summary(logs를 지표마다 다시 훑던 계산)와 같은 row를 내는지.
+tests/data/recorded_session_logs.jsonl은 스텁 LLM으로 한 세션을 끝까지 진행해서 남긴 ss.logs.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from session_metrics import SUMMARY_COLUMNS, SessionAggregator
+
+RECORDED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recorded_session_logs.jsonl")
+SESSION = ("recorded-session", "테스트", "010-0000-0000", "price", "B")
+
+
+def old_summary_row(logs, session_id, nickname, phone_number, primary_style, condition):
+    """이전 app.py write_session_summary의 row 계산 그대로 (시트 전송 부분만 뺌)"""
+    # ---- TURN COUNTS ----
+    total_turns = sum(
+        1 for e in logs if e["event_type"] in ["user_message", "assistant_message"]
+    )
+    explore_turns = sum(1 for e in logs if e["phase"] == "explore" and e["event_type"] == "user_message")
+    summary_turns = sum(1 for e in logs if e["phase"] == "summary" and e["event_type"] == "user_message")
+    compare_turns = sum(1 for e in logs if e["phase"] == "comparison" and e["event_type"] == "user_message")
+    detail_turns = sum(1 for e in logs if e["phase"] == "product_detail" and e["event_type"] == "user_message")
+
+    # ---- MEMORY EDIT COUNTS (전체) ----
+    mem_add = sum(1 for e in logs if e["event_type"] == "memory_add")
+    mem_delete = sum(1 for e in logs if e["event_type"] == "memory_delete")
+    mem_update = sum(1 for e in logs if e["event_type"] == "memory_update")
+    mem_edit_total = mem_add + mem_delete + mem_update
+
+    # ---- USER-ONLY EDIT COUNTS (버튼 누른 것) ----
+    user_add_count = sum(1 for e in logs if e["event_type"] == "memory_add" and e.get("source") == "user")
+    user_delete_count = sum(1 for e in logs if e["event_type"] == "memory_delete" and e.get("source") == "user")
+
+    # ---- HUMAN TOTAL ----
+    human_edit_total = user_add_count + user_delete_count
+
+    # ---- TIME ----
+    timestamps = [e["timestamp"] for e in logs]
+    total_duration = max(timestamps) - min(timestamps) if timestamps else 0
+
+    # ---- FINAL CHOICE ----
+    final_choice_evt = next((e for e in logs if e["event_type"] == "final_decision"), None)
+    final_choice = final_choice_evt["value"] if final_choice_evt else ""
+
+    # ---- DECISION TIME ----
+    reco_evt = next((e for e in logs if e["event_type"] == "show_candidates"), None)
+    decision_time = final_choice_evt["timestamp"] - reco_evt["timestamp"] if reco_evt and final_choice_evt else ""
+
+    return [
+        session_id, nickname, phone_number, primary_style, condition,
+        total_turns, explore_turns, summary_turns, compare_turns, detail_turns,
+        mem_add, mem_delete, mem_update, mem_edit_total,
+        user_add_count, user_delete_count, human_edit_total,
+        total_duration, final_choice, decision_time,
+    ]
+
+
+def load_recorded():
+    with open(RECORDED, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def edited(logs, seed):
+    """기록된 로그에 사용자 편집 / 시각이 뒤섞인 이벤트 / 중복 결정을 끼워 넣은 변형"""
+    rnd = random.Random(seed)
+    logs = [dict(e) for e in logs]
+    for _ in range(10):
+        base = dict(rnd.choice(logs))
+        base.update(
+            event_type=rnd.choice(["memory_add", "memory_delete", "memory_update", "user_message"]),
+            source=rnd.choice(["user", "agent"]),
+            phase=rnd.choice(["explore", "summary", "comparison", "product_detail", "purchase_decision"]),
+            timestamp=base["timestamp"] + rnd.uniform(-30, 30),
+        )
+        logs.insert(rnd.randrange(len(logs) + 1), base)
+    logs.append(dict(logs[-1], event_type="final_decision", value="두 번째 결정", timestamp=logs[0]["timestamp"] - 5))
+    return logs
+
+
+def test_recorded_log_covers_summary_events():
+    types = {e["event_type"] for e in load_recorded()}
+    assert {"user_message", "assistant_message", "memory_add", "show_candidates", "final_decision"} <= types
+
+
+@pytest.mark.parametrize("variant", ["recorded", "edited-0", "edited-1", "edited-2", "prefix"])
+def test_aggregator_matches_old_write_session_summary(variant):
+    logs = load_recorded()
+    if variant.startswith("edited"):
+        logs = edited(logs, int(variant.split("-")[1]))
+    elif variant == "prefix":
+        # 추천 전에 요약을 만든 경우 (decision_time / final_choice 빈 값)
+        logs = [e for e in logs if e["event_type"] not in ("show_candidates", "final_decision")]
+
+    expected = old_summary_row(logs, *SESSION)
+    got = SessionAggregator.from_events(logs).summary_row(*SESSION)
+    assert len(got) == len(SUMMARY_COLUMNS)
+    assert dict(zip(SUMMARY_COLUMNS, got)) == dict(zip(SUMMARY_COLUMNS, expected))
+
+
+def test_incremental_rows_match_at_every_step():
+    # 앱은 이벤트마다 update()하고 아무 때나 summary_row()를 만듦
+    logs = edited(load_recorded(), 3)
+    agg = SessionAggregator()
+    for i, e in enumerate(logs, 1):
+        agg.update(e)
+        assert agg.summary_row(*SESSION) == old_summary_row(logs[:i], *SESSION)
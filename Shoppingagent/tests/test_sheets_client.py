@@ -0,0 +1,96 @@
+"""
+sheets_client.SheetsClient.append_rows: 낡은 핸들(401/404)만 다시 만들어 재시도하고, 나머지 예외는 그대로 올림.
+gspread가 없는 환경(SHEETS_STUB)에서도 원래 예외가 ImportError로 바뀌지 않아야 함.
+"""
+import sys
+
+import pytest
+
+from sheets_client import SheetsClient
+
+
+class FakeWorksheet:
+    def __init__(self, errors):
+        self.errors = errors
+        self.rows = []
+
+    def append_rows(self, rows, value_input_option=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.rows.extend(rows)
+
+
+class FakeClient:
+    """open()/worksheet()를 부를 때마다 새 핸들 (재생성 횟수 확인용)"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.opened = 0
+        self.worksheets = []
+
+    def open(self, name):
+        self.opened += 1
+        client = self
+
+        class Spreadsheet:
+            def worksheet(self, title):
+                ws = FakeWorksheet(client.errors)
+                client.worksheets.append(ws)
+                return ws
+
+        return Spreadsheet()
+
+
+def make_sheets(errors):
+    clients = []
+
+    def factory():
+        clients.append(FakeClient(errors))
+        return clients[-1]
+
+    return SheetsClient(factory), clients
+
+
+def api_error(status):
+    from gspread.exceptions import APIError
+
+    class Response:
+        status_code = status
+        text = "error"
+
+        def json(self):
+            return {"error": {"code": status, "message": "error", "status": "ERROR"}}
+
+    return APIError(Response())
+
+
+def test_non_api_error_is_raised_without_gspread(monkeypatch):
+    monkeypatch.setitem(sys.modules, "gspread", None)
+    monkeypatch.setitem(sys.modules, "gspread.exceptions", None)
+    sheets, _ = make_sheets([ConnectionError("boom")])
+    with pytest.raises(ConnectionError, match="boom"):
+        sheets.append_rows("B_raw", [[1]])
+
+
+def test_stale_handle_is_rebuilt_once():
+    pytest.importorskip("gspread")
+    sheets, clients = make_sheets([api_error(404)])
+    sheets.append_rows("B_raw", [[1]])
+    assert clients[0].opened == 2
+    assert clients[0].worksheets[-1].rows == [[1]]
+
+
+def test_unauthorized_reauthorizes():
+    pytest.importorskip("gspread")
+    sheets, clients = make_sheets([api_error(401)])
+    sheets.append_rows("B_raw", [[1]])
+    assert len(clients) == 2
+
+
+def test_other_api_errors_are_raised():
+    pytest.importorskip("gspread")
+    from gspread.exceptions import APIError
+    sheets, clients = make_sheets([api_error(429)])
+    with pytest.raises(APIError):
+        sheets.append_rows("B_raw", [[1]])
+    assert clients[0].opened == 1
@@ -0,0 +1,76 @@
+"""
+token_usage: 비용 계산 / summarize / bind_usage로 워커 스레드에서 기록.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from token_usage import UsageRecorder, bind_usage, cost_usd, current_recorder, record_usage, summarize
+
+
+USAGE = {"prompt_tokens": 1000, "completion_tokens": 200, "prompt_tokens_details": {"cached_tokens": 400}}
+
+
+def test_cost_usd_discounts_cached_tokens():
+    assert cost_usd("gpt-4o-mini", 1000, 400, 200) == (600 * 0.15 + 400 * 0.075 + 200 * 0.60) / 1_000_000
+    assert cost_usd("unknown-model", 1000, 0, 200) == 0.0
+
+
+def test_record_usage_without_recorder_returns_record_only():
+    record = record_usage("chat", "gpt-4o-mini", USAGE)
+    assert record["prompt_tokens"] == 1000
+    assert record["cached_tokens"] == 400
+    assert record_usage("chat", "gpt-4o-mini", None) is None
+
+
+def test_summarize_accumulates_into_existing_totals():
+    usage = UsageRecorder()
+    with usage:
+        record_usage("chat", "gpt-4o-mini", USAGE)
+        record_usage("chat", "gpt-4o-mini", USAGE)
+    totals = summarize(usage.drain())
+    summarize([record_usage("chat", "gpt-4o-mini", USAGE)], into=totals)
+    assert totals["chat"]["calls"] == 3
+    assert totals["chat"]["cached_ratio"] == 0.4
+
+
+def test_bind_usage_records_from_worker_threads():
+    usage = UsageRecorder()
+    with usage:
+        fn = bind_usage(lambda i: record_usage(f"site{i % 2}", "gpt-4o-mini", USAGE))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(fn, range(32)))
+    assert current_recorder() is None
+    totals = summarize(usage.drain())
+    assert totals["site0"]["calls"] == totals["site1"]["calls"] == 16
+
+
+def test_same_recorder_entered_on_two_threads_restores_each_threads_own():
+    """
+    A 스레드는 recorder 없이, B 스레드는 outer 안에서 같은 recorder로 들어감.
+    A가 먼저 나가도 A에는 None, B에는 outer가 복원돼야 함 (이전 recorder가 스레드 사이에 섞이지 않음)
+    """
+    shared, outer = UsageRecorder(), UsageRecorder()
+    a_entered, b_entered, a_exited = threading.Event(), threading.Event(), threading.Event()
+    seen = {}
+
+    def thread_a():
+        with shared:
+            a_entered.set()
+            b_entered.wait(5)
+        seen["a"] = current_recorder()
+        a_exited.set()
+
+    def thread_b():
+        with outer:
+            a_entered.wait(5)
+            with shared:
+                b_entered.set()
+                a_exited.wait(5)
+            seen["b"] = current_recorder()
+
+    threads = [threading.Thread(target=thread_a), threading.Thread(target=thread_b)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert seen == {"a": None, "b": outer}
@@ -0,0 +1,136 @@
+import threading
+
+
+# ======================================================
+# LLM 호출별 토큰 사용량 / 비용
+# ======================================================
+# 모델별 100만 토큰당 가격(USD): (입력, 캐시된 입력, 출력)
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def _field(obj, name):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def usage_counts(usage):
+    """
+    OpenAI usage(객체 또는 dict) → (prompt, cached, completion).
+    cached는 prompt_tokens_details.cached_tokens (프롬프트 캐시로 할인된 입력 토큰, prompt에 포함된 값)
+    """
+    prompt = _field(usage, "prompt_tokens") or 0
+    completion = _field(usage, "completion_tokens") or 0
+    cached = _field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0
+    return prompt, cached, completion
+
+
+def cost_usd(model, prompt, cached, completion):
+    """가격표에 없는 모델은 0"""
+    price = PRICES.get(model)
+    if price is None:
+        return 0.0
+    input_price, cached_price, output_price = price
+    return ((prompt - cached) * input_price + cached * cached_price + completion * output_price) / 1_000_000
+
+
+class UsageRecorder:
+    """
+    한 턴 동안 LLM 호출마다 토큰 사용량을 모으는 리스트 (스레드 안전).
+    - with recorder: → 이 스레드에서 record_usage()한 값이 recorder로 들어감
+    - 워커 스레드로 넘기는 함수는 bind_usage(fn)으로 감싸면 같은 recorder에 기록 (tracer.wrap과 같은 방식)
+    - 세션 상태에는 메인 스레드에서 drain()한 결과만 반영
+    """
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def drain(self):
+        with self._lock:
+            records, self._records = self._records, []
+        return records
+
+    def __enter__(self):
+        # 이전 recorder는 스레드별 스택에 보관 (같은 recorder를 여러 워커 스레드가 동시에 with 해도 섞이지 않음)
+        _stack().append(current_recorder())
+        _local.recorder = self
+        return self
+
+    def __exit__(self, *exc):
+        _local.recorder = _stack().pop()
+        return False
+
+
+_local = threading.local()
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current_recorder():
+    return getattr(_local, "recorder", None)
+
+
+def bind_usage(fn):
+    """fn을 다른 스레드에서 실행해도 지금 스레드의 recorder에 기록되도록 감쌈"""
+    recorder = current_recorder()
+    if recorder is None:
+        return fn
+
+    def wrapped(*args, **kwargs):
+        with recorder:
+            return fn(*args, **kwargs)
+
+    return wrapped
+
+
+def record_usage(call_site, model, usage):
+    """usage를 레코드 dict로 바꿔 현재 recorder에 추가하고 돌려줌 (usage가 없으면 None)"""
+    if usage is None:
+        return None
+    prompt, cached, completion = usage_counts(usage)
+    record = {
+        "call_site": call_site,
+        "model": model,
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "completion_tokens": completion,
+        "cost_usd": round(cost_usd(model, prompt, cached, completion), 8),
+    }
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.add(record)
+    return record
+
+
+def summarize(records, into=None):
+    """
+    레코드 목록 → {call_site: {calls, prompt_tokens, cached_tokens, completion_tokens, cost_usd, cached_ratio}}
+    into를 주면 그 dict에 누적 (세션 전체 합계 유지용)
+    """
+    out = {} if into is None else into
+    for r in records:
+        s = out.setdefault(r["call_site"], {
+            "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        })
+        s["calls"] += 1
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens", "cost_usd"):
+            s[key] += r[key]
+    for s in out.values():
+        s["cached_ratio"] = round(s["cached_tokens"] / s["prompt_tokens"], 4) if s["prompt_tokens"] else 0.0
+        s["cost_usd"] = round(s["cost_usd"], 8)
+    return out
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# ======================================================
+# JSONL 추가 기록 (트레이스 / 운영 텔레메트리 공용)
+# ======================================================
+class JsonlWriter:
+    """
+    dict 레코드를 path에 한 줄씩 append (스레드 안전, 파일은 첫 기록 때 열고 계속 유지).
+    path가 비어 있으면 아무것도 하지 않음. 쓰기 실패는 출력만 하고 호출한 쪽으로 올리지 않음.
+    """
+
+    def __init__(self, path, error_label="JSONL Error:"):
+        self.path = path
+        self.error_label = error_label
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def write(self, records):
+        if not self.path or not records:
+            return
+        lines = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+        with self._lock:
+            try:
+                if self._fh is None:
+                    if os.path.dirname(self.path):
+                        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._fh = open(self.path, "a", encoding="utf-8")
+                self._fh.write(lines)
+                self._fh.flush()
+            except OSError as e:
+                print(self.error_label, e)
+
+
+# ======================================================
+# 가벼운 span 트레이싱 (JSONL 트레이스 파일)
+# ======================================================
+class _NullSpan:
+    """트레이싱이 꺼져 있을 때 쓰는 아무것도 안 하는 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+# st.rerun() / st.stop()이 던지는 예외는 오류로 표시하지 않음
+CONTROL_FLOW_EXCEPTIONS = {"RerunException", "StopException"}
+
+
+class Span:
+    __slots__ = ("tracer", "trace", "name", "span_id", "parent_id", "start", "_t0", "duration", "attrs")
+
+    def __init__(self, tracer, trace, name, parent_id, attrs):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._t0
+            self.tracer._finish(self)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and exc_type.__name__ not in CONTROL_FLOW_EXCEPTIONS:
+            self.attrs.setdefault("error", exc_type.__name__)
+        self.tracer._pop(self)
+        self.end()
+        return False
+
+    def to_dict(self):
+        d = {
+            "trace_id": self.trace.trace_id if self.trace else None,
+            "session_id": self.trace.session_id if self.trace else None,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+        }
+        d.update(self.attrs)
+        return d
+
+
+class Trace:
+    """한 번의 rerun(또는 백그라운드 작업)에서 나온 span 묶음"""
+
+    __slots__ = ("trace_id", "session_id", "spans", "closed", "lock")
+
+    def __init__(self, session_id):
+        self.trace_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.spans = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+
+class Tracer:
+    """
+    tracer.trace(...)로 루트 span을 열고, 그 안에서 tracer.span(...)으로 하위 구간 측정.
+    - 루트가 끝나면 trace 전체를 path(JSONL)에 한 번에 기록 (span 하나 = 한 줄)
+    - 트레이스 밖의 span(백그라운드 Sheets 전송 등)은 끝나는 즉시 단독으로 기록
+    - 다른 스레드로 넘기는 함수는 tracer.wrap(fn)으로 감싸면 현재 span 아래에 붙음
+    - enabled=False면 모든 호출이 NULL_SPAN을 돌려주므로 비용은 속성 확인 한 번
+    """
+
+    def __init__(self, path=None, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._local = threading.local()
+        self._writer = JsonlWriter(path, "Trace Error:")
+
+    # --------------------------------------------------
+    # span 열기
+    # --------------------------------------------------
+    def trace(self, name, session_id=None, **attrs):
+        """루트 span. 이미 트레이스 안이면 일반 하위 span으로 동작"""
+        if not self.enabled:
+            return NULL_SPAN
+        if getattr(self._local, "trace", None) is not None:
+            return self.span(name, **attrs)
+        trace = Trace(session_id)
+        self._local.trace = trace
+        self._local.stack = []
+        return Span(self, trace, name, None, attrs)
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        stack = getattr(self._local, "stack", None)
+        parent = stack[-1].span_id if stack else None
+        return Span(self, getattr(self._local, "trace", None), name, parent, attrs)
+
+    def start_span(self, name, **attrs):
+        """with 없이 열고 나중에 span.end()로 닫는 span (스트리밍 응답처럼 여러 함수에 걸치는 구간)"""
+        return self.span(name, **attrs)
+
+    def wrap(self, fn):
+        """fn을 다른 스레드에서 실행해도 지금 트레이스/부모 span 아래에 기록되도록 감쌈"""
+        if not self.enabled:
+            return fn
+        trace = getattr(self._local, "trace", None)
+        stack = list(getattr(self._local, "stack", None) or [])
+
+        def wrapped(*args, **kwargs):
+            prev = (getattr(self._local, "trace", None), getattr(self._local, "stack", None))
+            self._local.trace, self._local.stack = trace, list(stack)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.trace, self._local.stack = prev
+
+        return wrapped
+
+    # --------------------------------------------------
+    # 내부: 스택 / 기록
+    # --------------------------------------------------
+    def _push(self, span):
+        if not hasattr(self._local, "stack") or self._local.stack is None:
+            self._local.stack = []
+        self._local.stack.append(span)
+
+    def _pop(self, span):
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        if span.parent_id is None and span.trace is getattr(self._local, "trace", None):
+            # 루트 span 종료 → 이 스레드의 트레이스 해제
+            self._local.trace = None
+            self._local.stack = None
+
+    def _finish(self, span):
+        trace = span.trace
+        if trace is None:
+            self._emit([span.to_dict()])
+            return
+        with trace.lock:
+            trace.spans.append(span)
+            if span.parent_id is None:
+                trace.closed = True
+                records = [s.to_dict() for s in trace.spans]
+            elif trace.closed:
+                # 루트가 끝난 뒤에 끝난 span (버려진 백그라운드 호출 등)
+                records = [span.to_dict()]
+            else:
+                return
+        self._emit(records)
+
+    def _emit(self, records):
+        self._writer.write(records)
+
+
+def subtree(span):
+    """span과 그 하위 span들의 dict 목록 (시작 시각 순, depth 포함) — 개발자 패널용"""
+    if not isinstance(span, Span) or span.trace is None:
+        return []
+    with span.trace.lock:
+        spans = list(span.trace.spans)
+    if span not in spans:
+        spans.append(span)
+
+    children = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+
+    out = []
+
+    def walk(s, depth):
+        d = s.to_dict()
+        d["depth"] = depth
+        out.append(d)
+        for c in sorted(children.get(s.span_id, []), key=lambda x: x.start):
+            walk(c, depth + 1)
+
+    walk(span, 0)
+    return out